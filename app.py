@@ -1,13 +1,25 @@
-from flask import Flask, render_template, request, jsonify, url_for, redirect
+from flask import (Blueprint, Flask, current_app, has_app_context, make_response, render_template, request, jsonify,
+                   send_from_directory, url_for, redirect)
 import json
+import math
 import os
 import pathlib
+import re
+import threading
 import uuid
 import time
-from datetime import datetime
-from werkzeug.utils import secure_filename
-
-app = Flask(__name__, static_url_path='/static', static_folder='static')
+from datetime import datetime, timezone
+from werkzeug.local import LocalProxy
+import click
+from flask.cli import with_appcontext
+from config_service import ConfigService
+from deck_loader import report
+from deck_store import open_store
+from media_store import MediaStore, MediaTooLarge
+from migrations import pending_migrations, run_migrations
+from rescheduling import reschedule
+from scheduler import Scheduler
+from sqlite_store import migrate_json_to_sqlite
 
 # Dossier data du projet pour la config
 project_data_dir = pathlib.Path(__file__).parent / 'data'
@@ -18,69 +30,212 @@ user_home = pathlib.Path.home()
 app_data_dir = user_home / 'SmartRevisionApp'
 data_dir = app_data_dir / 'data'
 decks_dir = data_dir / 'decks'
+recall_dir = data_dir / 'recall'
 multimedia_dir = data_dir / 'multimedia'
 
-# Création des dossiers
-project_data_dir.mkdir(exist_ok=True)
-project_config_dir.mkdir(exist_ok=True)
-app_data_dir.mkdir(exist_ok=True)
-data_dir.mkdir(exist_ok=True)
-decks_dir.mkdir(exist_ok=True)
-multimedia_dir.mkdir(exist_ok=True)
-
 # Configuration pour l'upload de fichiers
 MULTIMEDIA_FOLDER = str(multimedia_dir)
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 ALLOWED_AUDIO_EXTENSIONS = {'mp3', 'wav', 'ogg'}
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'webm', 'ogg'}
 
-# Créer les dossiers multimedia s'ils n'existent pas
-os.makedirs(os.path.join(MULTIMEDIA_FOLDER, 'images'), exist_ok=True)
-os.makedirs(os.path.join(MULTIMEDIA_FOLDER, 'audio'), exist_ok=True)
-os.makedirs(os.path.join(MULTIMEDIA_FOLDER, 'video'), exist_ok=True)
+# Pagination des listes de cartes
+CARDS_PAGE_SIZE = 50
+CARDS_MAX_PAGE_SIZE = 200
+
+# Taille de la file de révision commune à tous les decks
+REVIEW_QUEUE_SIZE = 100
+REVIEW_QUEUE_MAX_SIZE = 500
+
+# Ancienneté maximale d'une révision faite hors ligne et envoyée plus tard
+MAX_OFFLINE_AGE = 30 * 24 * 3600
+
+def default_config():
+    """Configuration par défaut de l'application"""
+    return {
+        'DATA_FOLDER': str(data_dir),
+        'DECKS_FOLDER': str(decks_dir),
+        'CONFIG_FOLDER': str(project_config_dir),
+        'MULTIMEDIA_FOLDER': MULTIMEDIA_FOLDER,
+        'RECALL_FOLDER': str(recall_dir),
+        'DECK_CACHE_MAX_BYTES': 64 * 1024 * 1024,
+        'REVIEW_JOURNAL_COMPACT_BYTES': 256 * 1024,
+        # Au-delà de cette taille, un deck est découpé en fragments de DECK_CHUNK_CARDS cartes
+        'DECK_SHARD_BYTES': 1024 * 1024,
+        'DECK_CHUNK_CARDS': 500,
+        # Codec des fichiers de decks : 'auto' (orjson si installé, sinon compact), 'compact' ou 'pretty'
+        'DECK_CODEC': os.environ.get('SMART_REVISION_DECK_CODEC', 'auto'),
+        # Backend de stockage des decks : 'json' (un fichier par deck) ou 'sqlite'
+        'DECK_STORE': os.environ.get('SMART_REVISION_STORE', 'json'),
+        'SQLITE_PATH': os.environ.get('SMART_REVISION_SQLITE_PATH', str(data_dir / 'decks.sqlite3')),
+        # Migrations des données en attente : 'background' (thread lancé à la
+        # première requête), 'sync' ou 'off' (commande `flask migrate` uniquement)
+        'MIGRATIONS': os.environ.get('SMART_REVISION_MIGRATIONS', 'background'),
+        # Chargements groupés de decks : nombre de workers et pool 'thread' ou 'process'
+        'DECK_LOAD_WORKERS': int(os.environ.get('SMART_REVISION_LOAD_WORKERS', 8)),
+        'DECK_LOAD_EXECUTOR': os.environ.get('SMART_REVISION_LOAD_EXECUTOR', 'thread'),
+        # Préchargement du cache des decks en arrière-plan à la première requête
+        'DECK_WARMUP': os.environ.get('SMART_REVISION_WARMUP', '0') == '1',
+        # Taille maximale d'une requête (uploads compris), refusée avant d'être lue
+        'MAX_CONTENT_LENGTH': int(os.environ.get('SMART_REVISION_MAX_UPLOAD_MB', 50)) * 1024 * 1024,
+        # Calcul des échéances après une révision : 'sm2' (algorithme SM-2) ou
+        # 'levels' (intervalles fixes des paramètres de difficulté)
+        'SCHEDULER': os.environ.get('SMART_REVISION_SCHEDULER', 'sm2'),
+        # Intervalle (secondes) de surveillance de config.json ; 0 désactive le rechargement à chaud
+        'CONFIG_RELOAD_INTERVAL': 2.0,
+    }
+
+bp = Blueprint('main', __name__)
+
+def create_app(config=None):
+    """Crée l'application.
+
+    Aucun accès disque n'a lieu ici : les dossiers, le stockage des decks et
+    les migrations sont initialisés à la première utilisation (voir init_app_data).
+    """
+    app = Flask(__name__, static_url_path='/static', static_folder='static')
+    app.config.update(default_config())
+    if config:
+        app.config.update(config)
+    app.extensions['smart_revision'] = {'lock': threading.Lock(), 'store': None, 'config': None,
+                                        'media': None, 'migrations': None}
+    app.register_blueprint(bp)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(warm_up_command)
+    app.cli.add_command(migrate_sqlite_command)
+    app.cli.add_command(reschedule_command)
+    return app
+
+def init_app_data(app, migrations=None):
+    """Crée les dossiers de données et ouvre le stockage des decks, une seule fois par application.
+
+    Les migrations en attente sont lancées selon `app.config['MIGRATIONS']`
+    (ou `migrations` s'il est fourni), la surveillance de config.json
+    démarre et, si DECK_WARMUP est activé, le cache des decks est préchargé
+    en arrière-plan. Retourne le stockage des decks.
+    """
+    state = app.extensions['smart_revision']
+    if state['store'] is not None:
+        return state['store']
+    with state['lock']:
+        if state['store'] is not None:
+            return state['store']
+        config = app.config
+        for folder in (config['CONFIG_FOLDER'], config['DECKS_FOLDER'], config['RECALL_FOLDER']):
+            os.makedirs(folder, exist_ok=True)
+        for subfolder in ('images', 'audio', 'video'):
+            os.makedirs(os.path.join(config['MULTIMEDIA_FOLDER'], subfolder), exist_ok=True)
+
+        deck_store = open_store(config)
+        mode = migrations or config['MIGRATIONS']
+        if mode != 'off' and pending_migrations(config['DATA_FOLDER']):
+            if mode == 'sync':
+                run_migrations(deck_store, config['DATA_FOLDER'])
+            else:
+                thread = threading.Thread(target=_run_migrations_in_background,
+                                          args=(deck_store, config['DATA_FOLDER']),
+                                          name='smart-revision-migrations', daemon=True)
+                thread.start()
+                state['migrations'] = thread
+
+        config_service = ConfigService(pathlib.Path(config['CONFIG_FOLDER']) / 'config.json',
+                                       pathlib.Path(config['DATA_FOLDER']) / 'locks')
+        if config['CONFIG_RELOAD_INTERVAL']:
+            config_service.watch(config['CONFIG_RELOAD_INTERVAL'])
+        state['config'] = config_service
+        state['media'] = MediaStore(config['MULTIMEDIA_FOLDER'], max_bytes=config['MAX_CONTENT_LENGTH'])
+        if config['DECK_WARMUP']:
+            threading.Thread(target=_warm_up_in_background, args=(deck_store,),
+                             name='smart-revision-warm-up', daemon=True).start()
+        state['store'] = deck_store
+        return deck_store
+
+def _run_migrations_in_background(deck_store, data_folder):
+    try:
+        applied = run_migrations(deck_store, data_folder)
+        if applied:
+            print(f"Migrations appliquées : {', '.join(applied)}")
+    except Exception as e:
+        print(f"Error running migrations: {e}")
+
+def _warm_up_in_background(deck_store):
+    try:
+        summary = report(deck_store.warm_up())
+        print(f"Decks préchargés : {summary['loaded']} en {summary['seconds']:.2f} s cumulées, "
+              f"{len(summary['failed'])} erreur(s)")
+        for deck_id, error in summary['failed'].items():
+            print(f"Error reading deck {deck_id}: {error}")
+    except Exception as e:
+        print(f"Error warming up decks: {e}")
+
+def get_store():
+    """Stockage des decks de l'application courante (l'application par défaut hors contexte)"""
+    return init_app_data(current_app._get_current_object() if has_app_context() else app)
+
+# Stockage des decks utilisé par toutes les routes
+store = LocalProxy(get_store)
+
+def get_config_service():
+    """Configuration en mémoire de l'application courante"""
+    current = current_app._get_current_object() if has_app_context() else app
+    init_app_data(current)
+    return current.extensions['smart_revision']['config']
+
+# Configuration (config.json) lue par les routes, sans accès disque
+config_service = LocalProxy(get_config_service)
 
-app.config['DATA_FOLDER'] = str(data_dir)
-app.config['DECKS_FOLDER'] = str(decks_dir)
-app.config['CONFIG_FOLDER'] = str(project_config_dir)
-app.config['MULTIMEDIA_FOLDER'] = MULTIMEDIA_FOLDER
+def get_media_store():
+    """Fichiers multimédia de l'application courante"""
+    current = current_app._get_current_object() if has_app_context() else app
+    init_app_data(current)
+    return current.extensions['smart_revision']['media']
+
+media = LocalProxy(get_media_store)
+
+@bp.before_app_request
+def ensure_app_data():
+    init_app_data(current_app._get_current_object())
+
+def not_modified(etag, last_modified=None):
+    """Réponse 304 si le client a déjà cette version, sinon None
+
+    If-None-Match est prioritaire sur If-Modified-Since (RFC 9110).
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif last_modified is not None and request.if_modified_since is not None:
+        fresh = int(last_modified) <= request.if_modified_since.timestamp()
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return with_validators(make_response('', 304), etag, last_modified)
+
+def with_validators(response, etag, last_modified=None):
+    """Ajoute ETag et Last-Modified ; le client doit revalider à chaque usage"""
+    response = make_response(response)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+    response.cache_control.no_cache = True
+    return response
 
 def get_all_decks():
     """Récupère tous les decks"""
     decks = []
     try:
-        for file in decks_dir.glob('*.json'):
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    deck = json.load(f)
-                    deck['id'] = file.stem
-                    decks.append(deck)
-            except Exception as e:
-                print(f"Error reading deck {file}: {e}")
-                continue
+        for result in store.load_decks():
+            if result.error is not None:
+                print(f"Error reading deck {result.key}: {result.error}")
+            else:
+                decks.append(result.value)
     except Exception as e:
-        print(f"Error scanning decks directory: {e}")
+        print(f"Error scanning decks: {e}")
     return decks
 
 def get_deck(deck_id):
     """Récupère un deck par son ID"""
-    # Essayer d'abord avec l'extension .json
-    file_path = decks_dir / f"{deck_id}.json"
-    if not file_path.exists():
-        # Si le fichier n'existe pas, vérifier si deck_id contient déjà l'extension
-        if deck_id.endswith('.json'):
-            file_path = decks_dir / deck_id
-        else:
-            return None
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            deck = json.load(f)
-            # Stocker l'ID sans l'extension .json
-            deck['id'] = deck_id.replace('.json', '')
-            return deck
-    except Exception as e:
-        print(f"Error reading deck {deck_id}: {e}")
-        return None
+    return store.get_deck(deck_id)
 
 def save_deck(deck_data):
     # Nettoie le nom du deck pour l'utiliser comme nom de fichier
@@ -95,66 +250,66 @@ def save_deck(deck_data):
     deck = {
         "id": deck_id,
         "deck_name": deck_data['name'],
+        "name": deck_id,
         "date_created": timestamp,
         "flashcards": []
     }
     
-    # Crée le fichier JSON
-    file_path = decks_dir / f"{deck_id}.json"
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(deck, f, ensure_ascii=False, indent=2)
+    # Crée le deck dans le stockage
+    store.create_deck(deck_id, deck)
     
     return deck
 
 def delete_deck_file(deck_id):
-    file_path = decks_dir / f"{deck_id}.json"
-    if file_path.exists():
-        file_path.unlink()
-        return True
-    return False
+    return store.delete_deck(deck_id)
 
 def allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 def save_uploaded_file(file, subfolder):
+    """Enregistre un upload par contenu ; un fichier déjà reçu n'est pas dupliqué"""
     if file and file.filename:
-        filename = secure_filename(file.filename)
-        unique_filename = f"{str(uuid.uuid4())}_{filename}"
-        file_path = os.path.join(MULTIMEDIA_FOLDER, subfolder, unique_filename)
-        file.save(file_path)
-        return os.path.join('multimedia', subfolder, unique_filename)
+        return media.save(file.stream, subfolder, file.filename)
     return None
 
-def update_deck_names():
-    """Met à jour tous les decks pour ajouter la clé 'name'"""
-    for deck_file in decks_dir.glob('*.json'):
-        try:
-            with open(deck_file, 'r', encoding='utf-8') as f:
-                deck = json.load(f)
-            
-            if 'name' not in deck:
-                # Le nom du fichier sans l'extension .json
-                deck['name'] = deck_file.stem
-                
-                with open(deck_file, 'w', encoding='utf-8') as f:
-                    json.dump(deck, f, ensure_ascii=False, indent=4)
-                print(f"Updated deck: {deck_file}")
-        except Exception as e:
-            print(f"Error updating deck {deck_file}: {e}")
-
-# Appeler la fonction au démarrage de l'application
-update_deck_names()
-
-@app.route('/')
+# Fichier nommé par l'empreinte de son contenu (voir media_store.py)
+CONTENT_ADDRESSED = re.compile(r'^([0-9a-f]{64})(\.[a-z0-9]+)?$')
+
+# Un fichier multimédia n'est jamais réécrit sous le même nom
+MEDIA_MAX_AGE = 365 * 24 * 3600
+
+@bp.route('/multimedia/<path:filename>')
+def serve_media(filename):
+    """Sert un fichier multimédia (requêtes Range et conditionnelles comprises)
+
+    Les chemins enregistrés dans les cartes (`multimedia/<type>/<nom>`) sont
+    directement utilisables comme URL. Le fichier est envoyé par le serveur
+    WSGI (sendfile quand il le permet), avec une réponse 206 pour un Range.
+    """
+    match = CONTENT_ADDRESSED.match(filename.rsplit('/', 1)[-1])
+    # ETag fort : l'empreinte du contenu, ou celle calculée par werkzeug
+    etag = match.group(1) if match else True
+    response = send_from_directory(current_app.config['MULTIMEDIA_FOLDER'], filename,
+                                   conditional=True, etag=etag, max_age=MEDIA_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@bp.app_errorhandler(413)
+def request_too_large(error):
+    return jsonify({'error': 'Fichier trop volumineux'}), 413
+
+@bp.route('/')
 def home():
-    decks = get_all_decks()
-    return render_template('index.html', decks=decks)
+    decks = store.list_summaries()
+    due_count = sum(deck.get('due_now') or 0 for deck in decks)
+    return render_template('index.html', decks=decks, due_count=due_count)
 
-@app.route('/create-deck')
+@bp.route('/create-deck')
 def create_deck_page():
     return render_template('create_deck.html')
 
-@app.route('/api/decks', methods=['POST'])
+@bp.route('/api/decks', methods=['POST'])
 def create_deck():
     """Crée un nouveau deck"""
     data = request.get_json()
@@ -169,11 +324,15 @@ def create_deck():
     clean_name = clean_name.replace(' ', '_').lower()
     
     # Vérifier si un deck avec ce nom existe déjà
-    deck_path = decks_dir / f"{clean_name}.json"
-    if deck_path.exists():
+    try:
+        exists = store.has_deck_name(clean_name)
+    except Exception as e:
+        print(f"Error reading decks: {e}")
+        return jsonify({'error': str(e)}), 500
+    if exists:
         return jsonify({
             'error': 'Un deck avec ce nom existe déjà',
-            'suggestion': f"{deck_name} ({len(list(decks_dir.glob('*.json')))})"
+            'suggestion': f"{deck_name} ({store.count_decks()})"
         }), 409
     
     # Créer le nouveau deck
@@ -186,45 +345,105 @@ def create_deck():
     
     # Sauvegarder le deck
     try:
-        with open(deck_path, 'w', encoding='utf-8') as f:
-            json.dump(deck, f, indent=4, ensure_ascii=False)
-        print(f"Deck saved to: {deck_path}")
+        store.create_deck(clean_name, deck)
+        print(f"Deck saved: {clean_name}")
         return jsonify({'success': True, 'deck': deck})
     except Exception as e:
         print(f"Error saving deck: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/decks/<deck_name>')
+@bp.route('/decks/<deck_name>')
 def view_deck(deck_name):
     """Affiche un deck spécifique."""
+    # La page dépend du deck et de la frontière entre cartes dues et à venir :
+    # pas de Last-Modified, une carte qui devient due change la page. La
+    # version et le nombre de cartes dues viennent du résumé du deck : une
+    # requête conditionnelle à jour ne charge pas le deck.
+    current_time = int(time.time())
+    due_version = store.due_version(deck_name, current_time)
+    due_count = due_version[1] if due_version else 0
+    etag = '-'.join(map(str, due_version)) if due_version else None
+    if etag:
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
     deck = get_deck(deck_name)
     if deck is None:
         return redirect('/')
-    
-    # Ajouter le nom du deck aux données
-    deck['name'] = deck_name
-    
-    current_time = int(time.time())
-    cards_to_review_now = []
-    cards_to_review_later = []
 
-    for card in deck.get('flashcards', []):
-        next_review = card.get('next_review', 0)
-        if next_review <= current_time:
-            cards_to_review_now.append(card)
-        else:
-            card['next_review_display'] = datetime.fromtimestamp(next_review).strftime('%d/%m/%Y %H:%M')
-            cards_to_review_later.append(card)
+    # Ajouter le nom du deck aux données (copie : le deck est partagé par le cache)
+    deck = dict(deck, name=deck_name)
     
-    # Trier les cartes à réviser plus tard par date de révision croissante
-    cards_to_review_later.sort(key=lambda x: x.get('next_review', 0))
-
-    return render_template('deck.html', 
+    # Seule la première page de chaque liste est rendue, la suite est
+    # chargée au défilement via /api/decks/<id>/cards
+    cards_to_review_now, now_cursor = store.list_cards(
+        deck_name, due='now', limit=CARDS_PAGE_SIZE, now=current_time)
+    # Cartes à réviser plus tard, triées par date de révision croissante
+    later_page, later_cursor = store.list_cards(
+        deck_name, due='later', limit=CARDS_PAGE_SIZE, now=current_time)
+    cards_to_review_later = [
+        dict(card, next_review_display=datetime.fromtimestamp(card['next_review']).strftime('%d/%m/%Y %H:%M'))
+        for card in later_page
+    ]
+    card_count = store.count_due(deck_name, float('inf'))
+
+    page = render_template('deck.html', 
                          deck=deck,
                          cards_to_review_now=cards_to_review_now,
-                         cards_to_review_later=cards_to_review_later)
+                         cards_to_review_later=cards_to_review_later,
+                         now_cursor=now_cursor,
+                         later_cursor=later_cursor,
+                         due_count=due_count,
+                         card_count=card_count,
+                         page_size=CARDS_PAGE_SIZE)
+    return with_validators(page, etag) if etag else page
+
+@bp.route('/api/decks/<deck_id>/cards', methods=['GET'])
+def list_cards(deck_id):
+    """Liste paginée des cartes d'un deck
+
+    Paramètres : sort (next_review, created, failures), due (now, later),
+    cursor (champ next_cursor de la page précédente), limit et fields
+    (champs séparés par des virgules ; l'ID est toujours renvoyé).
+    """
+    if not store.deck_exists(deck_id):
+        return jsonify({'error': 'Deck non trouvé'}), 404
+
+    try:
+        limit = int(request.args.get('limit', CARDS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Paramètre limit invalide'}), 400
+    limit = min(max(limit, 1), CARDS_MAX_PAGE_SIZE)
+    fields = request.args.get('fields')
+    fields = [field for field in fields.split(',') if field] if fields else None
+
+    # Même version que la page du deck : le filtre due dépend de l'heure
+    now = int(time.time())
+    due_version = store.due_version(deck_id, now)
+    etag = '-'.join(map(str, due_version)) if due_version else None
+    if etag:
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
 
-@app.route('/decks/<deck_id>/add-card')
+    try:
+        cards, next_cursor = store.list_cards(
+            deck_id,
+            sort=request.args.get('sort', 'next_review'),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            fields=fields,
+            due=request.args.get('due'),
+            now=now
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = jsonify({'cards': cards, 'next_cursor': next_cursor})
+    return with_validators(response, etag) if etag else response
+
+@bp.route('/decks/<deck_id>/add-card')
 def add_card_page(deck_id):
     """Page d'ajout de carte"""
     deck = get_deck(deck_id)
@@ -232,11 +451,14 @@ def add_card_page(deck_id):
         return redirect('/')
     return render_template('add_card.html', deck=deck)
 
-@app.route('/api/decks/<deck_id>/cards', methods=['POST'])
+@bp.route('/api/decks/<deck_id>/cards', methods=['POST'])
 def add_card(deck_id):
     """Ajoute une carte à un deck"""
-    deck = get_deck(deck_id)
-    if deck is None:
+    # Carte avec fichiers joints : formulaire multipart
+    if not request.is_json and (request.files or request.form):
+        return add_card_api(deck_id)
+
+    if not store.deck_exists(deck_id):
         return jsonify({'error': 'Deck non trouvé'}), 404
 
     data = request.get_json()
@@ -263,31 +485,24 @@ def add_card(deck_id):
     }
 
     # Ajouter la carte au deck
-    if 'flashcards' not in deck:
-        deck['flashcards'] = []
-    deck['flashcards'].append(new_card)
-
-    # Sauvegarder le deck
-    deck_path = decks_dir / f"{deck_id}.json"
-    with open(deck_path, 'w', encoding='utf-8') as f:
-        json.dump(deck, f, ensure_ascii=False, indent=2)
+    if not store.add_card(deck_id, new_card):
+        return jsonify({'error': 'Deck non trouvé'}), 404
 
     return jsonify(new_card), 201
 
-@app.route('/api/decks/<deck_id>', methods=['DELETE'])
+@bp.route('/api/decks/<deck_id>', methods=['DELETE'])
 def delete_deck(deck_id):
     if delete_deck_file(deck_id):
         return '', 204
     return jsonify({'error': 'Deck non trouvé'}), 404
 
-@app.route('/api/decks/<deck_id>/cards', methods=['POST'])
+@bp.route('/api/decks/<deck_id>/cards', methods=['POST'])
 def add_card_api(deck_id):
     if not request.files and not request.form:
         return jsonify({'error': 'Aucune donnée reçue'}), 400
 
     try:
-        deck = get_deck(deck_id)
-        if deck is None:
+        if not store.deck_exists(deck_id):
             return jsonify({'error': 'Deck non trouvé'}), 404
 
         # Récupérer les données du formulaire
@@ -336,127 +551,105 @@ def add_card_api(deck_id):
                 new_card['multimedia']['video'] = save_uploaded_file(file, 'video')
 
         # Ajouter la carte au deck
-        if 'flashcards' not in deck:
-            deck['flashcards'] = []
-        deck['flashcards'].append(new_card)
-        save_deck(deck)
+        if not store.add_card(deck_id, new_card):
+            return jsonify({'error': 'Deck non trouvé'}), 404
 
         return jsonify(new_card), 201
 
+    except MediaTooLarge as e:
+        return jsonify({'error': str(e)}), 413
     except Exception as e:
         print(f"Erreur lors de l'ajout de la carte: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/decks/<deck_name>/cards/<card_id>', methods=['DELETE'])
+@bp.route('/api/decks/<deck_name>/cards/<card_id>', methods=['DELETE'])
 def delete_card(deck_name, card_id):
     """Supprime une carte d'un deck"""
     try:
-        # Charger le deck
-        deck_path = decks_dir / f"{deck_name}.json"
-        if not deck_path.exists():
+        # Supprimer la carte du deck
+        deleted = store.delete_card(deck_name, card_id)
+        if deleted is None:
             return jsonify({'error': 'Deck non trouvé'}), 404
 
-        with open(deck_path, 'r', encoding='utf-8') as f:
-            deck = json.load(f)
-
-        # Vérifier si la carte existe
-        found = False
-        new_flashcards = []
-        for card in deck['flashcards']:
-            if str(card.get('id')) == str(card_id):
-                found = True
-            else:
-                new_flashcards.append(card)
-
-        if not found:
+        if not deleted:
             return jsonify({'error': 'Carte non trouvée'}), 404
 
-        # Mettre à jour le deck avec la carte supprimée
-        deck['flashcards'] = new_flashcards
-        
-        # Sauvegarder le deck
-        with open(deck_path, 'w', encoding='utf-8') as f:
-            json.dump(deck, f, ensure_ascii=False, indent=2)
-
         return jsonify({'success': True}), 200
 
     except Exception as e:
         print(f"Erreur lors de la suppression de la carte: {e}")
         return jsonify({'error': 'Erreur lors de la suppression'}), 500
 
-@app.route('/api/config')
+@bp.route('/api/config')
 def get_config():
     """Récupère la configuration des niveaux de difficulté"""
-    config_path = project_config_dir / 'config.json'
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return jsonify(json.load(f))
-    except FileNotFoundError:
+    version = config_service.version()
+    if version is None:
         return jsonify({'error': 'Configuration non trouvée'}), 404
+    cached = not_modified(*version)
+    if cached is not None:
+        return cached
+    return with_validators(jsonify(config_service.get()), *version)
 
-@app.route('/api/config/difficulty', methods=['POST'])
+@bp.route('/api/config/difficulty', methods=['POST'])
 def update_difficulty():
     """Met à jour le temps limite pour un niveau de difficulté"""
-    config_path = project_config_dir / 'config.json'
-    
-    try:
-        # Charger la configuration existante
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
-        data = request.get_json()
-        level = data.get('level')
-        time_limit = data.get('time_limit')
-        
-        if not level or not time_limit:
-            return jsonify({'error': 'Paramètres manquants'}), 400
-            
-        if level not in config['difficulty_levels']:
-            return jsonify({'error': 'Niveau de difficulté invalide'}), 400
-            
-        # Mettre à jour le temps limite
+    data = request.get_json()
+    level = data.get('level')
+    time_limit = data.get('time_limit')
+
+    if not level or not time_limit:
+        return jsonify({'error': 'Paramètres manquants'}), 400
+
+    def set_time_limit(config):
+        if level not in config.get('difficulty_levels', {}):
+            raise ValueError('Niveau de difficulté invalide')
         config['difficulty_levels'][level]['time_limit'] = time_limit
-        
-        # Sauvegarder la configuration
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
-            
+
+    try:
+        config_service.update(set_time_limit)
         return jsonify({'success': True})
-        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # Routes pour les paramètres de difficulté
-@app.route('/settings/difficulty')
+@bp.route('/settings/difficulty')
 def difficulty_settings_page():
     """Affiche la page des paramètres de difficulté."""
-    response = get_difficulty_settings()
-    settings = response.get_json() if response.status_code == 200 else {}
+    try:
+        settings = load_difficulty_settings()
+    except Exception:
+        settings = {}
     return render_template('difficulty_settings.html', settings=settings)
 
-@app.route('/api/settings/difficulty', methods=['GET'])
+@bp.route('/api/settings/difficulty', methods=['GET'])
 def get_difficulty_settings():
     """Récupère les paramètres de difficulté"""
-    config_path = project_config_dir / 'config.json'
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            return jsonify(config['difficulty_levels'])
-    except FileNotFoundError:
-        # Valeurs par défaut
-        default_settings = {
-            'very_hard': 3,
-            'hard': 5,
-            'medium': 7,
-            'easy': 9,
-            'very_easy': 11
-        }
-        # Sauvegarder les valeurs par défaut
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump({'difficulty_levels': default_settings}, f, indent=4, ensure_ascii=False)
-        return jsonify(default_settings)
-
-@app.route('/api/settings/difficulty', methods=['POST'])
+    version = config_service.version()
+    if version is not None:
+        cached = not_modified(*version)
+        if cached is not None:
+            return cached
+    settings = load_difficulty_settings()
+    # Le fichier a pu être créé avec les valeurs par défaut
+    return with_validators(jsonify(settings), *config_service.version())
+
+# Valeurs par défaut des paramètres de difficulté
+DEFAULT_DIFFICULTY_SETTINGS = {
+    'very_hard': 3,
+    'hard': 5,
+    'medium': 7,
+    'easy': 9,
+    'very_easy': 11
+}
+
+def load_difficulty_settings():
+    """Paramètres de difficulté, enregistrés avec les valeurs par défaut s'ils sont absents"""
+    return config_service.setdefault('difficulty_levels', dict(DEFAULT_DIFFICULTY_SETTINGS))
+
+@bp.route('/api/settings/difficulty', methods=['POST'])
 def update_difficulty_settings():
     """Met à jour les paramètres de difficulté"""
     data = request.get_json()
@@ -476,25 +669,41 @@ def update_difficulty_settings():
                 'error': f'Le temps pour {times[i][0]} doit être inférieur à {times[i+1][0]}'
             }), 400
 
+    def set_levels(config):
+        config['difficulty_levels'] = data
+
     # Sauvegarde des paramètres
-    config_path = project_config_dir / 'config.json'
     try:
-        if config_path.exists():
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-        else:
-            config = {}
-
-        config['difficulty_levels'] = data
-        
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
-            
+        config_service.update(set_levels)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/decks/<deck_name>/review')
+@bp.route('/api/settings/difficulty/reschedule', methods=['POST'])
+def reschedule_cards():
+    """Recalcule les échéances des cartes avec les paramètres de difficulté actuels.
+
+    Avec `dry_run`, retourne seulement la charge de révision par jour avant et après.
+    """
+    if current_app.config['SCHEDULER'] != 'levels':
+        return jsonify({'error': "Les échéances ne dépendent des paramètres de difficulté qu'avec "
+                                 "le planificateur 'levels'"}), 409
+    data = request.get_json(silent=True) or {}
+    deck_ids = data.get('deck_ids')
+    if deck_ids is not None and not (isinstance(deck_ids, list) and all(store.deck_exists(d) for d in deck_ids)):
+        return jsonify({'error': 'Deck non trouvé'}), 404
+    try:
+        summary = reschedule(store, load_difficulty_settings(), deck_ids, dry_run=bool(data.get('dry_run')))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Paramètres de difficulté invalides: {e}'}), 400
+    return jsonify(summary)
+
+def review_scheduler():
+    """Planificateur des révisions selon la politique configurée"""
+    policy = current_app.config['SCHEDULER']
+    return Scheduler(policy, load_difficulty_settings() if policy == 'levels' else None)
+
+@bp.route('/decks/<deck_name>/review')
 def start_review(deck_name):
     """Démarre une session de révision pour un deck"""
     print(f"Démarrage de la révision pour le deck: {deck_name}")
@@ -506,11 +715,10 @@ def start_review(deck_name):
     
     # S'assurer que le deck a un nom
     if 'name' not in deck:
-        deck['name'] = deck_name
+        deck = dict(deck, name=deck_name)
     
     current_time = int(time.time())
-    cards_to_review = [card for card in deck.get('flashcards', []) 
-                      if card.get('next_review', 0) <= current_time]
+    cards_to_review = store.due_cards(deck_name, current_time)
     
     print(f"Nombre de cartes à réviser: {len(cards_to_review)}")
     print(f"Deck passé à la template: {deck}")
@@ -521,44 +729,199 @@ def start_review(deck_name):
         
     return render_template('review.html', deck=deck, cards=cards_to_review)
 
-@app.route('/api/decks/<deck_name>/cards/<card_id>/review', methods=['POST'])
+def review_queue_cards():
+    """Cartes dues de tous les decks selon les paramètres limit et tags de la requête
+
+    Chaque carte porte l'ID de son deck (`deck_id`). Lève ValueError si
+    limit est invalide.
+    """
+    try:
+        limit = int(request.args.get('limit', REVIEW_QUEUE_SIZE))
+    except ValueError:
+        raise ValueError('Paramètre limit invalide')
+    limit = min(max(limit, 1), REVIEW_QUEUE_MAX_SIZE)
+    tags = request.args.get('tags')
+    tags = [tag for tag in tags.split(',') if tag] if tags else None
+    queue = store.due_queue(int(time.time()), limit=limit, tags=tags)
+    # Copie : les cartes sont partagées par le cache des decks
+    return [dict(card, deck_id=deck_id) for deck_id, card in queue]
+
+@bp.route('/review/all')
+def review_all():
+    """Session de révision des cartes dues de tous les decks, par échéance"""
+    try:
+        cards_to_review = review_queue_cards()
+    except ValueError:
+        return redirect('/')
+    if not cards_to_review:
+        return redirect('/')
+    return render_template('review.html', deck=None, cards=cards_to_review)
+
+@bp.route('/api/review/due', methods=['GET'])
+def review_queue():
+    """File des cartes dues de tous les decks
+
+    Paramètres : limit et tags (séparés par des virgules ; une carte est
+    retenue si elle porte au moins un de ces tags).
+    """
+    try:
+        cards = review_queue_cards()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'cards': cards})
+
+@bp.route('/api/decks/<deck_name>/cards/<card_id>/review', methods=['POST'])
 def update_card_review(deck_name, card_id):
-    """Met à jour une carte après une révision"""
+    """Met à jour une carte après une révision
+
+    L'échéance est calculée ici par le planificateur : un `next_interval`
+    envoyé par le client est ignoré.
+    """
     data = request.get_json()
-    if not data or 'quality' not in data or 'next_interval' not in data:
+    if not data or 'quality' not in data:
         return jsonify({'error': 'Données manquantes'}), 400
+    scheduler = review_scheduler()
+    try:
+        quality = scheduler.parse_quality(data['quality'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
         
-    deck = get_deck(deck_name)
-    if deck is None:
+    if not store.deck_exists(deck_name):
         return jsonify({'error': 'Deck non trouvé'}), 404
         
-    # Trouver la carte
-    card = None
-    for c in deck['flashcards']:
-        if str(c.get('id')) == str(card_id):
-            card = c
-            break
-            
+    # Mettre à jour les statistiques et les dates de révision sur l'état
+    # courant de la carte, relu sous le verrou du deck
+    reviewed_at = int(time.time())
+    card, = store.apply_reviews(
+        deck_name, [{'card_id': card_id}],
+        lambda card, review: scheduler.review(card, quality, reviewed_at))
     if card is None:
         return jsonify({'error': 'Carte non trouvée'}), 404
         
-    # Mettre à jour les statistiques de la carte
-    if data['quality'] >= 3:
-        card['statistics']['successes'] = card['statistics'].get('successes', 0) + 1
-    else:
-        card['statistics']['failures'] = card['statistics'].get('failures', 0) + 1
-        
-    # Mettre à jour les dates de révision
+    return jsonify({'success': True, 'next_review': card['next_review']})
+
+def parse_reviewed_at(value, now):
+    """Date d'une révision envoyée par le client, ramenée entre now - MAX_OFFLINE_AGE et now
+
+    L'heure courante est utilisée si la date est absente ; ValueError si elle
+    n'est pas un timestamp.
+    """
+    if value is None:
+        return now
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError('Date de révision invalide')
+    return min(max(int(value), now - MAX_OFFLINE_AGE), now)
+
+@bp.route('/api/decks/<deck_name>/reviews', methods=['POST'])
+def submit_reviews(deck_name):
+    """Applique un lot de révisions en un seul cycle lecture/écriture
+
+    Corps attendu : {"reviews": [{"card_id", "quality", "reviewed_at"}, ...]}.
+    Les échéances de tout le lot sont calculées par le planificateur en une
+    seule évaluation.
+    """
+    data = request.get_json(silent=True)
+    entries = data.get('reviews') if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'Données manquantes'}), 400
+
+    if not store.deck_exists(deck_name):
+        return jsonify({'error': 'Deck non trouvé'}), 404
+
     current_time = int(time.time())
-    card['date_last_reviewed'] = current_time
-    card['next_review'] = current_time + (data['next_interval'] * 60)  # Convertir minutes en secondes
-    
-    # Sauvegarder le deck
-    deck_path = decks_dir / f"{deck_name}.json"
-    with open(deck_path, 'w', encoding='utf-8') as f:
-        json.dump(deck, f, ensure_ascii=False, indent=2)
-        
-    return jsonify({'success': True})
+    scheduler = review_scheduler()
+    results = []
+    valid = []
+    for entry in entries:
+        card_id = entry.get('card_id') if isinstance(entry, dict) else None
+        if card_id is None or 'quality' not in entry:
+            results.append({'card_id': card_id, 'success': False, 'error': 'Données manquantes'})
+            continue
+        try:
+            quality = scheduler.parse_quality(entry['quality'])
+        except ValueError as e:
+            results.append({'card_id': card_id, 'success': False, 'error': str(e)})
+            continue
+        try:
+            reviewed_at = parse_reviewed_at(entry.get('reviewed_at'), current_time)
+        except ValueError as e:
+            results.append({'card_id': card_id, 'success': False, 'error': str(e)})
+            continue
+        results.append(None)
+        valid.append({'card_id': card_id, 'quality': quality, 'reviewed_at': reviewed_at})
+
+    def apply(found):
+        scheduler.review_many([(card, entry['quality'], entry['reviewed_at']) for card, entry in found])
+
+    cards = iter(store.apply_reviews(deck_name, valid, apply, batch=True) if valid else [])
+    for i, entry in enumerate(entries):
+        if results[i] is not None:
+            continue
+        card = next(cards)
+        if card is None:
+            results[i] = {'card_id': entry['card_id'], 'success': False, 'error': 'Carte non trouvée'}
+        else:
+            results[i] = {'card_id': entry['card_id'], 'success': True, 'next_review': card['next_review']}
+
+    return jsonify({'success': all(result['success'] for result in results), 'results': results})
+
+@click.command('migrate')
+@with_appcontext
+def migrate_command():
+    """Applique les migrations des données en attente"""
+    deck_store = init_app_data(current_app._get_current_object(), migrations='off')
+    applied = run_migrations(deck_store, current_app.config['DATA_FOLDER'])
+    click.echo(f"{len(applied)} migration(s) appliquée(s)")
+
+@click.command('warm-up')
+@click.option('--workers', type=int, default=None, help='Nombre de workers du pool de chargement')
+@with_appcontext
+def warm_up_command(workers):
+    """Précharge les decks et affiche le temps de chargement de chacun"""
+    deck_store = init_app_data(current_app._get_current_object(), migrations='off')
+    results = deck_store.warm_up(workers)
+    for result in results:
+        status = 'OK' if result.error is None else result.error
+        click.echo(f"{result.key}: {result.seconds * 1000:.1f} ms {status}")
+    summary = report(results)
+    click.echo(f"{summary['loaded']} deck(s) chargé(s), {len(summary['failed'])} erreur(s)")
+
+@click.command('reschedule')
+@click.option('--deck', 'deck_ids', multiple=True, help='Deck à recalculer (tous par défaut)')
+@click.option('--dry-run', is_flag=True, help="Affiche la charge de révision sans rien écrire")
+@with_appcontext
+def reschedule_command(deck_ids, dry_run):
+    """Recalcule les échéances des cartes après un changement des intervalles"""
+    if current_app.config['SCHEDULER'] != 'levels':
+        raise click.UsageError("Le recalcul ne s'applique qu'avec SMART_REVISION_SCHEDULER=levels")
+    deck_store = init_app_data(current_app._get_current_object(), migrations='off')
+    levels = load_difficulty_settings()
+
+    def progress(done, total, deck_id, changed):
+        click.echo(f"[{done}/{total}] {deck_id}: {changed} carte(s) modifiée(s)")
+    summary = reschedule(deck_store, levels, list(deck_ids) or None, dry_run, progress=progress)
+    verb = 'à modifier' if dry_run else 'modifiée(s)'
+    click.echo(f"{summary['changed']}/{summary['cards']} carte(s) {verb}")
+    if summary['skipped']:
+        click.echo(f"{summary['skipped']} carte(s) révisée(s) pendant le recalcul, laissée(s) telle(s) quelle(s)")
+    click.echo("Cartes dues par jour (avant -> après) :")
+    for day, (before, after) in enumerate(zip(summary['before'], summary['after'])):
+        if before or after:
+            label = f"J+{day}" if day < len(summary['after']) - 1 else f"J+{day} et au-delà"
+            click.echo(f"  {label}: {before} -> {after}")
+
+@click.command('migrate-sqlite')
+@click.option('--source', default=None, help='Répertoire des decks JSON à convertir')
+@click.option('--db', default=None, help='Base SQLite de destination')
+@with_appcontext
+def migrate_sqlite_command(source, db):
+    """Convertit les decks JSON en base SQLite"""
+    config = current_app.config
+    db = db or config['SQLITE_PATH']
+    migrated = migrate_json_to_sqlite(source or config['DECKS_FOLDER'], db, config['RECALL_FOLDER'])
+    click.echo(f"{len(migrated)} deck(s) migré(s) vers {db}")
+
+app = create_app()
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Point d'entrée ASGI pour la production.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000 --workers 2
+
+L'application Flask est servie telle quelle (mêmes routes) par l'adaptateur
+WSGI d'a2wsgi. Chaque requête s'exécute dans un pool de threads borné
+(SMART_REVISION_ASGI_THREADS, 40 par défaut) : la lecture ou l'écriture
+d'un gros deck sur un disque lent occupe un thread sans bloquer la boucle
+d'événements ni les autres requêtes. Les accès concurrents aux decks sont
+déjà sérialisés par leurs verrous (voir deck_lock.py).
+
+Le corps d'une requête n'est pas mis en mémoire d'avance : Flask le lit au
+fil de l'eau, et MAX_CONTENT_LENGTH refuse un envoi trop gros (413) avant sa
+lecture. Une réponse passe par une file bornée
+(SMART_REVISION_ASGI_SEND_QUEUE messages) : face à un client lent, le thread
+qui produit la réponse attend au lieu de l'accumuler en mémoire. Les
+fichiers multimédias sont envoyés par blocs (FileWrapper de werkzeug).
+"""
+import asyncio
+import contextlib
+import json
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import app, init_app_data
+
+ASGI_THREADS = int(os.environ.get('SMART_REVISION_ASGI_THREADS', 40))
+ASGI_SEND_QUEUE = int(os.environ.get('SMART_REVISION_ASGI_SEND_QUEUE', 10))
+
+
+class AsgiApplication:
+    """Application ASGI : cycle de vie, /healthz, puis l'application Flask"""
+
+    def __init__(self, flask_app, threads=ASGI_THREADS, send_queue_size=ASGI_SEND_QUEUE):
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=threads, send_queue_size=send_queue_size)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(self):
+        """Démarrage : dossiers, stockage et migrations, hors de la boucle d'événements"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.wsgi.executor, init_app_data, self.flask_app)
+        yield
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == '/healthz':
+            await self._healthz(send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        await receive()  # lifespan.startup
+        started = False
+        try:
+            async with self.lifespan():
+                started = True
+                await send({'type': 'lifespan.startup.complete'})
+                await receive()  # lifespan.shutdown
+        except Exception as e:
+            phase = 'shutdown' if started else 'startup'
+            await send({'type': f'lifespan.{phase}.failed', 'message': str(e)})
+            return
+        await send({'type': 'lifespan.shutdown.complete'})
+
+    async def _healthz(self, send):
+        body = json.dumps({'status': 'ok'}).encode()
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode())]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_asgi_app(flask_app=None, threads=ASGI_THREADS, send_queue_size=ASGI_SEND_QUEUE):
+    """Crée l'application ASGI autour d'une application Flask"""
+    return AsgiApplication(flask_app or app, threads, send_queue_size)
+
+
+application = create_asgi_app()
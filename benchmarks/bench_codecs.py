@@ -0,0 +1,75 @@
+"""
+Compare les codecs de decks sur des decks synthétiques.
+
+Pour chaque taille de deck et chaque codec disponible : temps d'encodage,
+temps de décodage et taille du fichier produit.
+
+    python benchmarks/bench_codecs.py --cards 1000 10000 50000
+"""
+import argparse
+from pathlib import Path
+import sys
+import time
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from deck_codec import ENCODERS, decode, encode
+
+
+def synthetic_deck(card_count):
+    """Deck ressemblant à un deck réel : texte accentué, tags, statistiques"""
+    now = int(time.time())
+    return {
+        'deck_name': 'Deck synthétique',
+        'name': 'deck_synthetique',
+        'date_created': now,
+        'flashcards': [
+            {
+                'id': f"flashcard_{now}_{i}",
+                'question': f"Question n°{i} : quelle est la réponse à cette énigme ?",
+                'response': f"Réponse détaillée n°{i}, avec quelques caractères accentués : é à ç ù.",
+                'tags': ['révision', f"chapitre-{i % 12}"],
+                'multimedia_question': None,
+                'multimedia_response': None,
+                'date_created': now - i,
+                'date_last_reviewed': now - i * 60,
+                'next_review': now + (i % 500) * 3600,
+                'last_quality': i % 6,
+                'statistics': {'successes': i % 9, 'failures': i % 4}
+            }
+            for i in range(card_count)
+        ]
+    }
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cards', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Nombres de cartes des decks testés')
+    parser.add_argument('--repeat', type=int, default=5, help='Nombre de mesures (la meilleure est gardée)')
+    args = parser.parse_args()
+
+    print(f"{'cartes':>8} {'codec':>8} {'encodage (ms)':>14} {'décodage (ms)':>14} {'taille (Ko)':>12}")
+    for card_count in args.cards:
+        deck = synthetic_deck(card_count)
+        for codec in ENCODERS:
+            data = encode(deck, codec)
+            assert decode(data) == deck
+            encode_time = best_of(lambda: encode(deck, codec), args.repeat)
+            decode_time = best_of(lambda: decode(data), args.repeat)
+            print(f"{card_count:>8} {codec:>8} {encode_time * 1000:>14.1f} "
+                  f"{decode_time * 1000:>14.1f} {len(data) / 1024:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
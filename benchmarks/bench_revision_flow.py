@@ -0,0 +1,100 @@
+"""
+Compare RevisionFlow et CompactRevisionFlow sur des flux synthétiques.
+
+Pour chaque taille de flux : mémoire occupée par le flux (tracemalloc),
+temps de construction, de recherche des tâches disponibles, de révision d'un
+lot de tâches, de sauvegarde complète, de sauvegarde des seules révisions
+(journal de l'instantané) et de chargement.
+
+    python benchmarks/bench_revision_flow.py --tasks 10000 100000 1000000
+"""
+import argparse
+import gc
+import os
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from compact_flow import CompactRevisionFlow
+from revision_flow import RevisionFlow
+
+FLOWS = {'objets': RevisionFlow, 'compact': CompactRevisionFlow}
+
+
+def synthetic_graph(task_count, seed=0):
+    """Tâches nommées comme un programme de cours, 0 à 3 prérequis parmi les tâches récentes"""
+    rng = random.Random(seed)
+    graph = []
+    for i in range(task_count):
+        window = range(max(0, i - 50), i)
+        dependencies = rng.sample(window, min(len(window), rng.randint(0, 3)))
+        graph.append((f"chapitre-{i // 100}/notion-{i}", [f"chapitre-{d // 100}/notion-{d}" for d in dependencies]))
+    return graph
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def build(flow_class, graph):
+    flow = flow_class()
+    for name, dependencies in graph:
+        flow.add_task(name, dependencies)
+    return flow
+
+
+def measure(flow_class, graph, reviews):
+    gc.collect()
+    tracemalloc.start()
+    flow, build_time = timed(lambda: build(flow_class, graph))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    available, available_time = timed(flow.get_available_tasks)
+
+    def review():
+        for task in available[:reviews]:
+            task.mark_completed(4)
+    _, review_time = timed(review)
+    _, next_time = timed(flow.get_available_tasks)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'state.bin')
+        _, save_time = timed(lambda: flow.save_state(path))
+        for task in flow.get_available_tasks()[:reviews]:
+            task.mark_completed(4)
+        _, delta_time = timed(lambda: flow.save_state(path))
+        _, load_time = timed(lambda: flow_class().load_state(path))
+    return memory, build_time, available_time, review_time, next_time, save_time, delta_time, load_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, nargs='+', default=[10000, 100000],
+                        help='Nombres de tâches des flux testés')
+    parser.add_argument('--reviews', type=int, default=1000, help='Nombre de tâches révisées')
+    args = parser.parse_args()
+
+    print(f"{'tâches':>8} {'flux':>8} {'mémoire (Mo)':>13} {'construction (s)':>17} "
+          f"{'disponibles (ms)':>17} {'révisions (ms)':>15} {'suivantes (ms)':>15} {'sauvegarde (s)':>15} "
+          f"{'journal (ms)':>13} {'chargement (s)':>15}")
+    for task_count in args.tasks:
+        graph = synthetic_graph(task_count)
+        for label, flow_class in FLOWS.items():
+            memory, build_time, available, review, following, save, delta, load = \
+                measure(flow_class, graph, args.reviews)
+            print(f"{task_count:>8} {label:>8} {memory / 2**20:>13.1f} {build_time:>17.2f} "
+                  f"{available * 1000:>17.1f} {review * 1000:>15.1f} {following * 1000:>15.1f} {save:>15.2f} "
+                  f"{delta * 1000:>13.1f} {load:>15.2f}")
+
+
+if __name__ == '__main__':
+    main()
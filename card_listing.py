@@ -0,0 +1,103 @@
+"""
+Listes paginées de cartes.
+
+Les pages sont découpées par curseur : le curseur encode la clé de tri
+(valeur, ID) de la dernière carte renvoyée, et la page suivante commence à la
+première carte de clé strictement supérieure. Une carte ajoutée ou supprimée
+entre deux pages ne décale donc pas la pagination.
+"""
+import base64
+import heapq
+import json
+from datetime import datetime
+
+from due_index import card_due
+
+
+def created_key(card):
+    """Date de création en timestamp ; les anciens decks stockent une date ISO"""
+    value = card.get('date_created')
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return 0.0
+
+
+def failures_key(card):
+    # Les cartes les plus souvent ratées en premier
+    return -float((card.get('statistics') or {}).get('failures', 0) or 0)
+
+
+# Clé de tri de chaque ordre proposé, et champs de carte dont elle dépend
+SORT_KEYS = {
+    'next_review': (card_due, ('next_review',)),
+    'created': (created_key, ('date_created',)),
+    'failures': (failures_key, ('statistics',)),
+}
+
+# Filtres sur l'échéance : cartes dues à `now`, ou à venir
+DUE_FILTERS = ('now', 'later')
+
+
+def encode_cursor(key):
+    """Encode une clé (valeur, ID) en curseur opaque pour les URL"""
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Décode un curseur, lève ValueError s'il est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, card_id = json.loads(raw)
+        return (float(value), str(card_id))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Curseur invalide : {cursor}") from e
+
+
+def check_options(sort, due):
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Tri inconnu : {sort}")
+    if due is not None and due not in DUE_FILTERS:
+        raise ValueError(f"Filtre d'échéance inconnu : {due}")
+
+
+def key_fields(sort, fields):
+    """Champs à lire pour trier puis projeter (None : tous)"""
+    if fields is None:
+        return None
+    return tuple(fields) + SORT_KEYS[sort][1] + ('next_review',)
+
+
+def select_page(cards, sort, after=None, limit=50, due=None, now=None):
+    """Sélectionne une page parmi des cartes dans un ordre quelconque.
+
+    Seules `limit + 1` cartes sont gardées en mémoire (tas borné).
+    Retourne `(page, clé de la dernière carte ou None s'il n'y a pas de suite)`.
+    """
+    key_of = SORT_KEYS[sort][0]
+
+    def candidates():
+        for card in cards:
+            if due == 'now' and card_due(card) > now:
+                continue
+            if due == 'later' and card_due(card) <= now:
+                continue
+            key = (key_of(card), str(card.get('id')))
+            if after is None or key > after:
+                yield key, card
+
+    selected = heapq.nsmallest(limit + 1, candidates(), key=lambda item: item[0])
+    return finish_page(selected, limit)
+
+
+def finish_page(selected, limit):
+    """Coupe une sélection de `limit + 1` (clé, carte) en page et clé de suite"""
+    if len(selected) > limit:
+        selected = selected[:limit]
+        return [card for _, card in selected], selected[-1][0]
+    return [card for _, card in selected], None
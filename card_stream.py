@@ -0,0 +1,107 @@
+"""
+Lecture en flux des cartes d'un deck.
+
+Le fichier JSON d'un deck est lu par blocs et les cartes du tableau
+`flashcards` sont décodées une à une avec `JSONDecoder.raw_decode` : la
+mémoire utilisée ne dépend que de la taille d'une carte, pas de celle du deck.
+"""
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _BufferedReader:
+    """Tampon de lecture sur un fichier texte, agrandi à la demande"""
+
+    def __init__(self, f, block_size):
+        self.f = f
+        self.block_size = block_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Lit un bloc de plus, retourne False en fin de fichier"""
+        # Taille doublée au besoin : une valeur plus grande que le bloc
+        # n'est pas redécodée un nombre quadratique de fois
+        data = self.f.read(max(self.block_size, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Prochain caractère significatif, ou '' en fin de fichier"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def take(self, expected):
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"JSON invalide : {expected!r} attendu, {char!r} trouvé")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Décode la prochaine valeur JSON complète"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self.fill():
+                    raise
+                continue
+            # Un nombre coupé par la fin du tampon serait décodé tronqué
+            if end == len(self.buf) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_array_field(f, field, header=None, block_size=64 * 1024):
+    """Itère sur les éléments du tableau `field` de l'objet JSON lu dans `f`.
+
+    Les autres clés de premier niveau sont décodées et copiées dans `header`
+    au fil de la lecture.
+    """
+    reader = _BufferedReader(f, block_size)
+    header = {} if header is None else header
+    reader.take('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.take(':')
+        if key == field and reader.peek() == '[':
+            reader.take('[')
+            if reader.peek() == ']':
+                reader.take(']')
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.take(',]') == ']':
+                        break
+        else:
+            header[key] = reader.value()
+        if reader.take(',}') == '}':
+            return
+
+
+def project(card, fields):
+    """Restreint une carte aux champs demandés (l'ID est toujours inclus)"""
+    if fields is None:
+        return card
+    projected = {'id': card.get('id')}
+    for field in fields:
+        if field in card:
+            projected[field] = card[field]
+    return projected
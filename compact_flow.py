@@ -0,0 +1,367 @@
+"""
+Flux de révision compact pour les très grands graphes de tâches.
+
+Même interface que `revision_flow.RevisionFlow`, mais l'état des tâches est
+rangé en colonnes (structure de tableaux) au lieu d'un objet par tâche : les
+noms sont internés et associés à des entiers, le facteur de facilité, le
+nombre de bonnes réponses, la date de prochaine révision (timestamp, NaN si
+aucune) et les compteurs de prérequis sont des `array` typés, et les
+dépendances sont stockées au format CSR (décalages + cibles). Les tâches
+retournées sont des vues légères compatibles avec `RevisionTask`.
+"""
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from typing import List, Optional
+import heapq
+import json
+import math
+import sys
+
+from flow_snapshot import NAN, FlowColumns, SnapshotFile, is_snapshot, to_datetime, to_timestamp
+from scheduler import INITIAL_EASE, next_state
+
+
+class CompactTask:
+    """Vue d'une tâche d'un CompactRevisionFlow, compatible avec RevisionTask"""
+
+    __slots__ = ('_flow', '_id')
+
+    def __init__(self, flow, task_id):
+        self._flow = flow
+        self._id = task_id
+
+    def __eq__(self, other):
+        return isinstance(other, CompactTask) and other._flow is self._flow and other._id == self._id
+
+    def __hash__(self):
+        return hash((id(self._flow), self._id))
+
+    def __repr__(self):
+        return f"CompactTask({self.name!r})"
+
+    @property
+    def name(self):
+        return self._flow._names[self._id]
+
+    @property
+    def dependencies(self):
+        flow = self._flow
+        return [flow._names[dep] for dep in flow._dependencies(self._id)]
+
+    @property
+    def completed(self):
+        return bool(self._flow._completed[self._id])
+
+    @completed.setter
+    def completed(self, value):
+        self._flow._completed[self._id] = bool(value)
+        self._flow._dirty.add(self._id)
+
+    @property
+    def next_revision(self):
+        return to_datetime(self._flow._next_revision[self._id])
+
+    @next_revision.setter
+    def next_revision(self, value):
+        self._flow._next_revision[self._id] = to_timestamp(value)
+        self._flow._dirty.add(self._id)
+
+    @property
+    def difficulty_factor(self):
+        return self._flow._ease[self._id]
+
+    @difficulty_factor.setter
+    def difficulty_factor(self, value):
+        self._flow._ease[self._id] = value
+        self._flow._dirty.add(self._id)
+
+    @property
+    def consecutive_correct(self):
+        return self._flow._streak[self._id]
+
+    @consecutive_correct.setter
+    def consecutive_correct(self, value):
+        self._flow._streak[self._id] = value
+        self._flow._dirty.add(self._id)
+
+    def mark_completed(self, quality: int):
+        """
+        Marque une tâche comme complétée et planifie la prochaine révision
+        quality: Note de 0 à 5 sur la qualité de la réponse
+        """
+        self._flow._complete(self._id, quality)
+
+
+class _TaskMap(Mapping):
+    """Tâches d'un CompactRevisionFlow par nom, créées à la demande"""
+
+    def __init__(self, flow):
+        self._flow = flow
+
+    def __getitem__(self, name):
+        return CompactTask(self._flow, self._flow._ids[name])
+
+    def __iter__(self):
+        return iter(self._flow._names)
+
+    def __len__(self):
+        return len(self._flow._names)
+
+    def __contains__(self, name):
+        return name in self._flow._ids
+
+
+class CompactRevisionFlow:
+    """Flux de révision en structure de tableaux.
+
+    Les tâches sont identifiées par leur rang d'ajout. Comme dans
+    RevisionFlow, la disponibilité est tenue à jour par des compteurs de
+    prérequis non complétés et les sessions sont des tas de priorité.
+    """
+
+    def __init__(self):
+        self.tasks = _TaskMap(self)
+        # Instantané du dernier enregistrement ou chargement
+        self._snapshot = None
+        self._reset()
+
+    def _reset(self):
+        self._names: List[str] = []
+        self._ids = {}
+        self._ease = array('d')
+        self._streak = array('q')
+        self._next_revision = array('d')
+        self._completed = bytearray()
+        self._unmet = array('q')
+        self._depth = array('q')
+        # Dépendances (CSR) : celles de la tâche i sont _dep_targets[_dep_offsets[i]:_dep_offsets[i + 1]]
+        self._dep_offsets = array('q', [0])
+        self._dep_targets = array('q')
+        # Arêtes inverses (CSR), reconstruites à la demande après des ajouts
+        self._rev_offsets = None
+        self._rev_targets = None
+        self._available = set()
+        self._scheduled = []
+        self.current_session = []
+        self.session_end = None
+        self._in_session = set()
+        # Tâches modifiées depuis le dernier enregistrement
+        self._dirty = set()
+
+    def _dependencies(self, task_id):
+        return self._dep_targets[self._dep_offsets[task_id]:self._dep_offsets[task_id + 1]]
+
+    def _dependents(self, task_id):
+        if self._rev_offsets is None:
+            self._build_reverse()
+        return self._rev_targets[self._rev_offsets[task_id]:self._rev_offsets[task_id + 1]]
+
+    def _build_reverse(self):
+        """Construit le CSR des arêtes inverses : O(tâches + dépendances)"""
+        count = len(self._names)
+        offsets = array('q', bytes(8 * (count + 1)))
+        for dep in self._dep_targets:
+            offsets[dep + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+        targets = array('q', bytes(8 * len(self._dep_targets)))
+        fill = array('q', offsets[:-1])
+        for task_id in range(count):
+            for dep in self._dependencies(task_id):
+                targets[fill[dep]] = task_id
+                fill[dep] += 1
+        self._rev_offsets, self._rev_targets = offsets, targets
+
+    def add_task(self, name: str, dependencies: List[str] = None):
+        """Ajoute une nouvelle tâche au flux de révision"""
+        if name in self._ids:
+            raise ValueError(f"La tâche {name} existe déjà")
+        for dep in (dependencies or []):
+            if dep not in self._ids:
+                raise ValueError(f"La dépendance {dep} n'existe pas")
+        self._append(name, [self._ids[dep] for dep in (dependencies or [])], False, NAN, INITIAL_EASE, 0)
+        self._register(len(self._names) - 1)
+
+    def _append(self, name, dep_ids, completed, next_revision, ease, streak):
+        name = sys.intern(name)
+        self._ids[name] = len(self._names)
+        self._names.append(name)
+        self._completed.append(completed)
+        self._next_revision.append(next_revision)
+        self._ease.append(ease)
+        self._streak.append(streak)
+        self._dep_targets.extend(dep_ids)
+        self._dep_offsets.append(len(self._dep_targets))
+        self._depth.append(1 + max((self._depth[dep] for dep in dep_ids), default=-1))
+        self._unmet.append(0)
+        self._rev_offsets = self._rev_targets = None
+
+    def _register(self, task_id):
+        self._unmet[task_id] = sum(not self._completed[dep] for dep in self._dependencies(task_id))
+        if self._unmet[task_id] == 0:
+            self._unlock(task_id)
+
+    def _unlock(self, task_id):
+        now = datetime.now().timestamp()
+        due = self._next_revision[task_id]
+        if math.isnan(due) or due <= now:
+            self._available.add(task_id)
+            self._add_to_session(task_id, now)
+        else:
+            self._available.discard(task_id)
+            self._in_session.discard(task_id)
+            heapq.heappush(self._scheduled, (due, task_id))
+
+    def _complete(self, task_id, quality):
+        first = not self._completed[task_id]
+        self._completed[task_id] = True
+        self._dirty.add(task_id)
+        self._ease[task_id], self._streak[task_id], interval = next_state(
+            self._ease[task_id], self._streak[task_id], quality)
+        self._next_revision[task_id] = (datetime.now() + timedelta(seconds=interval)).timestamp()
+        if self._unmet[task_id] == 0:
+            self._unlock(task_id)
+        if first:
+            for dependent in self._dependents(task_id):
+                self._unmet[dependent] -= 1
+                if self._unmet[dependent] == 0:
+                    self._unlock(dependent)
+
+    def _release(self, now):
+        while self._scheduled and self._scheduled[0][0] <= now:
+            due, task_id = heapq.heappop(self._scheduled)
+            if self._next_revision[task_id] == due:
+                self._available.add(task_id)
+                self._add_to_session(task_id, now)
+
+    def _priority(self, task_id, now):
+        due = self._next_revision[task_id]
+        overdue = 0.0 if math.isnan(due) else now - due
+        return (-overdue, self._ease[task_id], self._depth[task_id], task_id)
+
+    def _add_to_session(self, task_id, now):
+        if self.session_end is None or now > self.session_end or task_id in self._in_session:
+            return
+        self._in_session.add(task_id)
+        heapq.heappush(self.current_session, self._priority(task_id, now))
+
+    def get_available_tasks(self) -> List[CompactTask]:
+        """Retourne les tâches disponibles pour révision"""
+        self._release(datetime.now().timestamp())
+        return [CompactTask(self, task_id) for task_id in sorted(self._available)]
+
+    def start_session(self, duration: timedelta = timedelta(minutes=30)):
+        """Démarre une session de révision"""
+        now = datetime.now().timestamp()
+        self.session_end = now + duration.total_seconds()
+        self.current_session = []
+        self._in_session = set()
+        self._release(now)
+        for task_id in self._available - self._in_session:
+            self._in_session.add(task_id)
+            self.current_session.append(self._priority(task_id, now))
+        heapq.heapify(self.current_session)
+
+    def get_next_task(self) -> Optional[CompactTask]:
+        """Retourne la prochaine tâche à réviser"""
+        now = datetime.now().timestamp()
+        if self.session_end is None or now > self.session_end:
+            return None
+        self._release(now)
+        while self.current_session:
+            task_id = heapq.heappop(self.current_session)[-1]
+            if task_id in self._in_session:
+                self._in_session.discard(task_id)
+                return CompactTask(self, task_id)
+        return None
+
+    def nbytes(self):
+        """Taille des colonnes numériques et du graphe, en octets"""
+        columns = (self._ease, self._streak, self._next_revision, self._unmet, self._depth,
+                   self._dep_offsets, self._dep_targets, self._rev_offsets, self._rev_targets)
+        return len(self._completed) + sum(len(c) * c.itemsize for c in columns if c is not None)
+
+    def save_state(self, filename: str, full: bool = False):
+        """Sauvegarde l'état du flux (voir flow_snapshot).
+
+        Seules les tâches ajoutées ou modifiées depuis le dernier
+        enregistrement dans `filename` sont ajoutées à son journal ; `full`
+        force la réécriture de l'instantané complet.
+        """
+        if self._snapshot is None or self._snapshot.path != str(filename):
+            self._snapshot = SnapshotFile(filename)
+        self._snapshot.save(len(self._names), self._columns, self._task_state, self._dirty, full)
+        self._dirty = set()
+
+    def _columns(self):
+        return FlowColumns(self._names, self._dep_offsets, self._dep_targets, self._completed,
+                           self._next_revision, self._ease, self._streak)
+
+    def _task_state(self, task_id):
+        return (self._names[task_id], list(self._dependencies(task_id)), self._completed[task_id],
+                self._next_revision[task_id], self._ease[task_id], self._streak[task_id])
+
+    def load_state(self, filename: str):
+        """Charge un état enregistré par save_state (ou RevisionFlow.save_state).
+
+        Les anciens états JSON sont aussi acceptés.
+        """
+        if not is_snapshot(filename):
+            self._load_json(filename)
+            return
+        snapshot_file = SnapshotFile(filename)
+        self._reset()
+        with snapshot_file.load() as snapshot:
+            self._names = [sys.intern(name) for name in snapshot.names]
+            self._ids = {name: task_id for task_id, name in enumerate(self._names)}
+            self._next_revision = snapshot.column('next_revision')
+            self._ease = snapshot.column('ease')
+            self._streak = snapshot.column('streak')
+            self._dep_offsets = snapshot.column('dep_offsets')
+            self._dep_targets = snapshot.column('dep_targets')
+            self._completed = bytearray(snapshot.completed)
+            records = snapshot.records
+        count = len(self._names)
+        self._unmet = array('q', bytes(8 * count))
+        self._depth = array('q', bytes(8 * count))
+        for task_id in range(count):
+            self._depth[task_id] = 1 + max((self._depth[dep] for dep in self._dependencies(task_id)), default=-1)
+        for record in records:
+            if record[0] == 'A':
+                self._append(record[2], record[3], False, NAN, INITIAL_EASE, 0)
+            else:
+                _, task_id, completed, next_revision, ease, streak = record
+                self._completed[task_id] = completed
+                self._next_revision[task_id] = next_revision
+                self._ease[task_id] = ease
+                self._streak[task_id] = streak
+        for task_id in range(len(self._names)):
+            self._register(task_id)
+        self._snapshot = snapshot_file
+
+    def _load_json(self, filename):
+        with open(filename, 'r') as f:
+            state = json.load(f)
+        self._reset()
+        # L'ordre des tâches est topologique : les prérequis sont ajoutés avant
+        for name, data in state.items():
+            next_revision = data['next_revision']
+            self._append(name, [self._ids[dep] for dep in data['dependencies']], data['completed'],
+                         datetime.fromisoformat(next_revision).timestamp() if next_revision else NAN,
+                         data['difficulty_factor'], data['consecutive_correct'])
+        for task_id in range(len(self._names)):
+            self._register(task_id)
+        self._snapshot = None
+
+    @classmethod
+    def from_flow(cls, flow):
+        """Convertit un RevisionFlow en flux compact"""
+        compact = cls()
+        for name, task in flow.tasks.items():
+            compact._append(name, [compact._ids[dep] for dep in task.dependencies], task.completed,
+                            to_timestamp(task.next_revision), task.difficulty_factor,
+                            task.consecutive_correct)
+        for task_id in range(len(compact._names)):
+            compact._register(task_id)
+        return compact
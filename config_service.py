@@ -0,0 +1,161 @@
+"""
+Configuration de l'application (config.json) gardée en mémoire.
+
+Le fichier est lu une fois puis servi depuis la mémoire : une lecture ne
+touche pas au disque. Les écritures sont sérialisées par un verrou partagé
+entre threads et workers, et relisent le fichier sous ce verrou pour ne pas
+écraser la modification d'un autre worker. Un thread de surveillance recharge
+la configuration quand le fichier change sur le disque (autre worker, édition
+à la main) et prévient les abonnés.
+"""
+import copy
+import json
+import os
+import threading
+
+from deck_lock import DeckLocks, atomic_write
+
+LOCK_NAME = '.config'
+
+
+class ConfigService:
+    """Configuration en mémoire, rechargée à chaud.
+
+    Le dictionnaire retourné par `get` est partagé et ne doit pas être
+    modifié : les écritures passent par `update`, qui en construit un nouveau.
+    """
+
+    def __init__(self, path, lock_dir):
+        self.path = str(path)
+        self.locks = DeckLocks(lock_dir)
+        self._guard = threading.Lock()
+        self._loaded = False
+        self._config = None
+        # (mtime_ns, size) du fichier lu, None s'il n'existe pas
+        self._signature = None
+        self.revision = 0
+        self._subscribers = []
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self):
+        """Lit le fichier : (configuration ou None, signature)"""
+        while True:
+            signature = self._stat()
+            if signature is None:
+                return None, None
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+            except FileNotFoundError:
+                continue
+            # Fichier remplacé pendant la lecture : on relit la nouvelle version
+            if self._stat() == signature:
+                return config, signature
+
+    def _set(self, config, signature):
+        """Installe une configuration ; retourne True si elle a changé"""
+        with self._guard:
+            self._loaded = True
+            if signature == self._signature and config == self._config:
+                return False
+            self._config, self._signature = config, signature
+            self.revision += 1
+            return True
+
+    def get(self):
+        """Configuration courante, ou None si le fichier n'existe pas"""
+        if not self._loaded:
+            self.reload()
+        return self._config
+
+    def version(self):
+        """(jeton, timestamp de modification) du fichier, ou None s'il n'existe pas"""
+        if not self._loaded:
+            self.reload()
+        signature = self._signature
+        if signature is None:
+            return None
+        mtime_ns, size = signature
+        return f"{mtime_ns:x}-{size:x}", mtime_ns / 1e9
+
+    def reload(self):
+        """Relit le fichier s'il a changé ; retourne True si la configuration a changé"""
+        if self._loaded and self._stat() == self._signature:
+            return False
+        # Sous le verrou : une lecture ne peut pas remplacer une écriture plus récente
+        with self.locks.lock(LOCK_NAME):
+            changed = self._set(*self._read())
+        if changed:
+            self._notify()
+        return changed
+
+    def update(self, mutate):
+        """Modifie la configuration et l'enregistre.
+
+        `mutate` reçoit une copie de la configuration lue sur le disque (un
+        dictionnaire vide si le fichier n'existe pas) et la modifie sur place.
+        Une exception levée par `mutate` annule l'écriture. Retourne la
+        nouvelle configuration.
+        """
+        with self.locks.lock(LOCK_NAME):
+            config, _ = self._read()
+            config = copy.deepcopy(config) if config is not None else {}
+            mutate(config)
+            atomic_write(self.path, json.dumps(config, indent=4, ensure_ascii=False))
+            changed = self._set(config, self._stat())
+        if changed:
+            self._notify()
+        return config
+
+    def setdefault(self, key, value):
+        """Valeur de `key`, enregistrée avec `value` si elle est absente"""
+        config = self.get()
+        if config is not None and key in config:
+            return config[key]
+        return self.update(lambda config: config.setdefault(key, value))[key]
+
+    def subscribe(self, callback):
+        """Appelle `callback(config)` à chaque changement de la configuration"""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def _notify(self):
+        config = self._config
+        for callback in list(self._subscribers):
+            try:
+                callback(config)
+            except Exception as e:
+                print(f"Error notifying config subscriber: {e}")
+
+    def watch(self, interval):
+        """Lance le thread qui recharge le fichier toutes les `interval` secondes"""
+        if self._watcher is not None:
+            return self._watcher
+        self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                         name='smart-revision-config', daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Error reloading config: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
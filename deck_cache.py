@@ -0,0 +1,164 @@
+"""
+Cache en mémoire des decks parsés.
+
+Les decks sont indexés par leur ID, validés par la signature (mtime, taille)
+de leurs fichiers et évincés dans l'ordre LRU dès que le budget mémoire est
+dépassé.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+
+class DeckCache:
+    """Cache LRU borné des decks, invalidé par mtime/taille du fichier.
+
+    Le coût d'une entrée est estimé par la taille du fichier sur disque :
+    `max_bytes` borne donc la somme des tailles des decks gardés en mémoire.
+    `extra_cost(deck_id)` ajoute au besoin la taille de fichiers absents de
+    la signature (fragments d'un deck découpé).
+    Les decks retournés sont partagés : un appelant qui les modifie doit
+    ensuite les sauvegarder (ce qui appelle `put`) ou appeler `invalidate`.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, on_drop=None, extra_cost=None):
+        self.max_bytes = max_bytes
+        # Appelé avec l'ID et le deck quand une entrée quitte le cache, ou
+        # quand un deck chargé n'y est pas gardé
+        self.on_drop = on_drop
+        self.extra_cost = extra_cost
+        self._entries = OrderedDict()  # deck_id -> (signature, coût, deck)
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _signature(path):
+        """Retourne la signature du deck, ou None si son fichier n'existe pas.
+
+        `path` peut être un chemin ou un tuple de chemins (fichier du deck puis
+        fichiers annexes comme le journal des révisions) : la signature est
+        alors le tuple des (mtime_ns, taille) de chacun.
+        """
+        paths = path if isinstance(path, tuple) else (path,)
+        parts = []
+        for i, p in enumerate(paths):
+            try:
+                st = os.stat(p)
+            except OSError:
+                if i == 0:
+                    return None
+                parts.append(None)
+                continue
+            parts.append((st.st_mtime_ns, st.st_size))
+        return tuple(parts)
+
+    @staticmethod
+    def _cost(signature):
+        return sum(part[1] for part in signature if part is not None)
+
+    def get(self, deck_id, path, loader):
+        """Retourne le deck `deck_id`, en le chargeant via `loader(path)` si besoin"""
+        signature = self._signature(path)
+        with self._lock:
+            if signature is None:
+                self._drop(deck_id)
+                return None
+
+            entry = self._entries.get(deck_id)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(deck_id)
+                self.hits += 1
+                return entry[2]
+
+            self.misses += 1
+
+        # Chargement hors du verrou : plusieurs decks peuvent être lus en parallèle
+        deck = loader(path)
+        with self._lock:
+            entry = self._entries.get(deck_id)
+            if entry is not None and entry[0] == signature:
+                # Chargé entre-temps par un autre thread : notre copie est abandonnée
+                if self.on_drop is not None:
+                    self.on_drop(deck_id, deck)
+                return entry[2]
+            if self._signature(path) == signature:
+                self._store(deck_id, signature, deck)
+            elif self.on_drop is not None:
+                # Fichier modifié pendant la lecture : la copie n'est pas gardée
+                self.on_drop(deck_id, deck)
+            return deck
+
+    def peek(self, deck_id, path):
+        """Retourne le deck s'il est en cache et à jour, sans jamais le charger"""
+        signature = self._signature(path)
+        with self._lock:
+            entry = self._entries.get(deck_id)
+            if signature is None or entry is None or entry[0] != signature:
+                return None
+            return entry[2]
+
+    def put(self, deck_id, path, deck):
+        """Met à jour l'entrée après une écriture du deck sur disque"""
+        signature = self._signature(path)
+        with self._lock:
+            if signature is None:
+                self._drop(deck_id)
+            else:
+                self._store(deck_id, signature, deck)
+
+    def invalidate(self, deck_id=None):
+        """Supprime une entrée, ou tout le cache si `deck_id` est None"""
+        with self._lock:
+            if deck_id is None:
+                for dropped_id in list(self._entries):
+                    self._drop(dropped_id)
+            else:
+                self._drop(deck_id)
+
+    def stats(self):
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def __contains__(self, deck_id):
+        with self._lock:
+            return deck_id in self._entries
+
+    def _store(self, deck_id, signature, deck):
+        entry = self._entries.get(deck_id)
+        if entry is not None and entry[2] is deck:
+            # Même objet après une écriture : seule la signature change
+            del self._entries[deck_id]
+            self._total_bytes -= entry[1]
+        else:
+            self._drop(deck_id)
+        cost = self._cost(signature)
+        if self.extra_cost is not None:
+            cost += self.extra_cost(deck_id)
+        if cost > self.max_bytes:
+            # Un deck plus gros que le budget entier n'est jamais gardé
+            if self.on_drop is not None:
+                self.on_drop(deck_id, deck)
+            return
+        self._entries[deck_id] = (signature, cost, deck)
+        self._total_bytes += cost
+        while self._total_bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, deck_id):
+        entry = self._entries.pop(deck_id, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+            if self.on_drop is not None:
+                self.on_drop(deck_id, entry[2])
@@ -0,0 +1,88 @@
+"""
+Encodage des fichiers de decks.
+
+Trois codecs sont disponibles : `pretty` (JSON indenté, lisible à la main),
+`compact` (JSON sans espaces) et `orjson` (JSON compact produit par la
+bibliothèque orjson, utilisée seulement si elle est installée). Tous écrivent
+du JSON : un fichier est relu quel que soit le codec qui l'a écrit, avec le
+décodeur le plus rapide disponible.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PRETTY = 'pretty'
+COMPACT = 'compact'
+ORJSON = 'orjson'
+
+_BOM = b'\xef\xbb\xbf'
+
+
+def _encode_pretty(obj):
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def _encode_compact(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _encode_orjson(obj):
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        # Clés non textuelles ou entiers hors 64 bits : refusés par orjson
+        return _encode_compact(obj)
+
+
+ENCODERS = {PRETTY: _encode_pretty, COMPACT: _encode_compact}
+if orjson is not None:
+    ENCODERS[ORJSON] = _encode_orjson
+
+
+def resolve(codec=None):
+    """Nom du codec effectif ; 'auto' (ou None) choisit le plus rapide disponible"""
+    if codec in (None, 'auto'):
+        return ORJSON if orjson is not None else COMPACT
+    if codec == ORJSON and orjson is None:
+        return COMPACT
+    if codec not in ENCODERS:
+        raise ValueError(f"Codec de deck inconnu : {codec}")
+    return codec
+
+
+def encode(obj, codec=None):
+    """Encode un objet en bytes avec le codec demandé"""
+    return ENCODERS[resolve(codec)](obj)
+
+
+def detect(data):
+    """Devine le codec qui a écrit `data` (JSON indenté ou compact)"""
+    data = data[len(_BOM):] if data.startswith(_BOM) else data
+    head = data[:2]
+    if head[:1] not in (b'{', b'['):
+        raise ValueError("Format de deck non reconnu")
+    return PRETTY if head[1:2] in (b'\n', b'\r') else COMPACT
+
+
+def decode(data):
+    """Décode des bytes écrits par n'importe quel codec"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if data.startswith(_BOM):
+        data = data[len(_BOM):]
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity, acceptés par le module json
+            pass
+    return json.loads(data)
+
+
+def load_file(path):
+    """Lit et décode un fichier"""
+    with open(path, 'rb') as f:
+        return decode(f.read())
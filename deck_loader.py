@@ -0,0 +1,55 @@
+"""
+Chargement parallèle des decks.
+
+Lire des milliers de decks un par un est lent quand les fichiers sont sur un
+volume réseau : chaque lecture attend le disque. `load_all` répartit les
+chargements sur un pool de threads (ou de processus, pour décoder sur
+plusieurs cœurs) et mesure chaque deck. Une erreur est rapportée dans le
+résultat du deck concerné sans interrompre les autres.
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+EXECUTORS = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+# Résultat du chargement d'un deck : `value` vaut None et `error` décrit
+# l'erreur si le chargement a échoué
+LoadResult = namedtuple('LoadResult', ['key', 'value', 'seconds', 'error'])
+
+
+def _timed(load, key):
+    start = time.perf_counter()
+    try:
+        value, error = load(key), None
+    except Exception as e:
+        value, error = None, f"{type(e).__name__}: {e}"
+    return LoadResult(key, value, time.perf_counter() - start, error)
+
+
+def load_all(keys, load, workers=8, executor='thread'):
+    """Applique `load(key)` à chaque clé en parallèle.
+
+    Retourne les `LoadResult` dans l'ordre des clés. Avec `executor='process'`,
+    `load` et ses résultats doivent pouvoir être sérialisés par pickle.
+    """
+    keys = list(keys)
+    if executor not in EXECUTORS:
+        raise ValueError(f"Exécuteur inconnu : {executor}")
+    if workers <= 1 or len(keys) <= 1:
+        return [_timed(load, key) for key in keys]
+    with EXECUTORS[executor](max_workers=min(workers, len(keys))) as pool:
+        return list(pool.map(partial(_timed, load), keys))
+
+
+def report(results, slowest=5):
+    """Résumé d'un chargement : nombre de decks, erreurs et decks les plus lents"""
+    failed = [result for result in results if result.error is not None]
+    by_time = sorted(results, key=lambda result: result.seconds, reverse=True)
+    return {
+        'loaded': len(results) - len(failed),
+        'failed': {result.key: result.error for result in failed},
+        'seconds': sum(result.seconds for result in results),
+        'slowest': [(result.key, round(result.seconds, 4)) for result in by_time[:slowest]]
+    }
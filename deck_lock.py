@@ -0,0 +1,86 @@
+"""
+Verrous par deck et écriture atomique des fichiers.
+
+Le verrou d'un deck combine un verrou entre threads et un verrou de fichier
+entre processus (plusieurs workers gunicorn sur le même répertoire de données).
+Les écritures passent par un fichier temporaire renommé : un arrêt brutal ne
+laisse jamais un deck tronqué.
+"""
+import contextlib
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class DeckLocks:
+    """Verrous exclusifs par deck, valables entre threads et entre processus."""
+
+    def __init__(self, lock_dir):
+        self.lock_dir = str(lock_dir)
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._guard = threading.Lock()
+        self._thread_locks = {}
+
+    def _thread_lock(self, deck_id):
+        with self._guard:
+            lock = self._thread_locks.get(deck_id)
+            if lock is None:
+                lock = self._thread_locks[deck_id] = threading.Lock()
+            return lock
+
+    @contextlib.contextmanager
+    def lock(self, deck_id):
+        """Acquiert le verrou exclusif d'un deck"""
+        with self._thread_lock(deck_id):
+            with open(os.path.join(self.lock_dir, f"{deck_id}.lock"), 'a+b') as f:
+                _lock_file(f)
+                try:
+                    yield
+                finally:
+                    _unlock_file(f)
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK abandonne après 10 secondes : on réessaie
+            continue
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, data):
+    """Écrit `data` (bytes ou str) dans `path` via un fichier temporaire renommé"""
+    path = str(path)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
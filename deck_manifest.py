@@ -0,0 +1,163 @@
+"""
+Manifeste des decks : un petit fichier JSON de résumés par deck.
+
+La page d'accueil et la vérification des doublons lisent ce manifeste au lieu
+de parser chaque deck en entier. Il est mis à jour à chaque création,
+suppression ou modification d'un deck.
+"""
+import os
+import threading
+import time
+
+from deck_codec import encode, load_file
+from deck_loader import load_all
+from deck_lock import atomic_write
+
+
+def summarize_deck(deck_id, deck, signature=None, now=None, due_index=None):
+    """Calcule le résumé d'un deck à partir de son contenu.
+
+    `signature` est une liste dont le premier élément est le mtime_ns du
+    fichier du deck. Si l'index des échéances du deck est fourni, les
+    compteurs sont lus dans l'index sans parcourir les cartes.
+    """
+    now = time.time() if now is None else now
+    flashcards = deck.get('flashcards', [])
+    if due_index is not None:
+        card_count = len(flashcards)
+        due_now = due_index.count_due(now)
+        next_due = due_index.next_due(now)
+    else:
+        # `flashcards` peut être un itérateur (deck lu en flux) : les cartes
+        # sont parcourues une seule fois, avant de lire les métadonnées
+        card_count = 0
+        due_now = 0
+        next_due = None
+        for card in flashcards:
+            card_count += 1
+            next_review = card.get('next_review', 0) or 0
+            if next_review <= now:
+                due_now += 1
+            elif next_due is None or next_review < next_due:
+                next_due = next_review
+
+    return {
+        'id': deck_id,
+        'deck_name': deck.get('deck_name', deck_id),
+        'name': deck.get('name', deck_id),
+        'date_created': deck.get('date_created'),
+        'card_count': card_count,
+        'due_now': due_now,
+        'next_due': next_due,
+        'last_modified': signature[0] / 1e9 if signature else now,
+        'signature': list(signature) if signature else None
+    }
+
+
+class DeckManifest:
+    """Index des résumés de decks, persisté dans un fichier JSON.
+
+    Chaque résumé garde la signature (mtime_ns, taille) du fichier du deck,
+    ce qui permet à `sync` de ne reparser que les decks modifiés hors de
+    l'application.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.RLock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is not None:
+            return self._entries
+        try:
+            self._entries = load_file(self.path).get('decks', {})
+        except (OSError, ValueError):
+            self._entries = {}
+        return self._entries
+
+    def _save(self):
+        atomic_write(self.path, encode({'decks': self._entries}))
+
+    def update(self, deck_id, deck, signature=None, due_index=None, now=None):
+        """Recalcule et enregistre le résumé d'un deck"""
+        with self._lock:
+            self._load()[deck_id] = summarize_deck(deck_id, deck, signature, now, due_index)
+            self._save()
+
+    def remove(self, deck_id):
+        """Retire un deck du manifeste"""
+        with self._lock:
+            if self._load().pop(deck_id, None) is not None:
+                self._save()
+
+    def get(self, deck_id):
+        with self._lock:
+            return self._load().get(deck_id)
+
+    def has_name(self, name):
+        """Indique si un deck porte déjà cet ID ou ce nom de fichier"""
+        with self._lock:
+            return any(deck_id == name or entry.get('name') == name
+                       for deck_id, entry in self._load().items())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def sync(self, decks_dir, loader, signature=None, now=None, workers=1):
+        """Aligne le manifeste sur le répertoire des decks.
+
+        Seuls les decks ajoutés ou modifiés hors de l'application, et ceux
+        dont une carte est devenue due depuis le dernier calcul, sont chargés
+        via `loader(deck_id)`, dont les `flashcards` peuvent être un
+        itérateur. `signature(deck_id, stat)` permet d'inclure des fichiers
+        annexes dans la détection des modifications. Ces decks sont résumés
+        en parallèle par `workers` threads.
+        """
+        now = time.time() if now is None else now
+
+        def summarize(item):
+            deck_id, current = item
+            # Le deck peut être lu en flux pendant le résumé
+            deck = loader(deck_id)
+            return summarize_deck(deck_id, deck, current, now) if deck is not None else None
+
+        with self._lock:
+            entries = self._load()
+            seen = set()
+            stale = []
+            with os.scandir(decks_dir) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith('.json') or not dir_entry.is_file():
+                        continue
+                    deck_id = dir_entry.name[:-len('.json')]
+                    seen.add(deck_id)
+                    st = dir_entry.stat()
+                    if signature is None:
+                        current = [st.st_mtime_ns, st.st_size]
+                    else:
+                        current = signature(deck_id, st)
+                    entry = entries.get(deck_id)
+                    if (entry is not None and entry.get('signature') == current
+                            and (entry['next_due'] is None or entry['next_due'] > now)):
+                        continue
+                    stale.append((deck_id, current))
+
+            changed = False
+            for result in load_all(stale, summarize, workers):
+                if result.error is not None:
+                    print(f"Error reading deck {result.key[0]}: {result.error}")
+                elif result.value is not None:
+                    entries[result.key[0]] = result.value
+                    changed = True
+
+            for deck_id in list(entries):
+                if deck_id not in seen:
+                    del entries[deck_id]
+                    changed = True
+
+            if changed:
+                self._save()
+            return sorted(entries.values(), key=lambda entry: entry['id'])
+
@@ -0,0 +1,246 @@
+"""
+Decks découpés en fragments.
+
+Un gros deck est stocké sous la forme d'un en-tête `<deck_id>.json`
+(métadonnées du deck et liste ordonnée des fragments) et de fichiers de
+cartes de taille fixe dans `<deck_id>.chunks/`. Ajouter ou supprimer une
+carte ne réécrit que son fragment et l'en-tête.
+
+Les fragments sont copiés à l'écriture : un fragment modifié est écrit sous
+un nouveau nom avant le remplacement atomique de l'en-tête, puis l'ancien
+fichier est supprimé. Un lecteur voit donc toujours un deck cohérent.
+"""
+import os
+import pathlib
+import shutil
+
+from deck_codec import PRETTY, decode, encode, load_file
+from deck_lock import atomic_write
+
+SHARD_FORMAT = 'sharded'
+
+
+def chunks_dir(deck_path):
+    """Répertoire des fragments d'un deck"""
+    return pathlib.Path(deck_path).with_suffix('.chunks')
+
+
+def is_sharded(data):
+    return isinstance(data, dict) and data.get('format') == SHARD_FORMAT
+
+
+class ShardLayout:
+    """Fragments d'un deck et fragment de chaque carte.
+
+    Les cartes du deck sont la concaténation des fragments dans l'ordre de
+    `chunks` ; `chunk_of` associe l'ID de chaque carte à la position de son
+    fragment.
+    """
+
+    def __init__(self, chunk_size, next_chunk=0, codec=None):
+        self.chunk_size = chunk_size
+        self.next_chunk = next_chunk
+        self.codec = codec  # codec des fragments écrits (voir deck_codec.py)
+        self.chunks = []  # noms des fichiers de fragments
+        self.counts = []  # nombre de cartes par fragment
+        self.sizes = []  # taille sur disque de chaque fragment
+        self.chunk_of = {}
+
+    @property
+    def bytes(self):
+        return sum(self.sizes)
+
+    def _new_name(self):
+        name = f"{self.next_chunk:06d}.json"
+        self.next_chunk += 1
+        return name
+
+    def _reindex(self, cards):
+        self.chunk_of = {}
+        position = 0
+        remaining = self.counts[0] if self.counts else 0
+        for card in cards:
+            while remaining == 0:
+                position += 1
+                remaining = self.counts[position]
+            self.chunk_of[str(card.get('id'))] = position
+            remaining -= 1
+
+
+def read_deck(deck_path, codec=None, attempts=3):
+    """Lit un deck monolithique ou découpé, quel que soit son codec.
+
+    Retourne `(deck, layout)`, `layout` valant None pour un deck monolithique.
+    Les fragments réécrits ensuite via `layout` utilisent `codec`.
+    """
+    for attempt in range(attempts):
+        data = load_file(deck_path)
+        if not is_sharded(data):
+            return data, None
+        try:
+            return _read_chunks(deck_path, data, codec)
+        except FileNotFoundError:
+            # Fragment remplacé par un autre processus entre la lecture de
+            # l'en-tête et la sienne : on relit l'en-tête
+            if attempt == attempts - 1:
+                raise
+
+
+def read_deck_file(deck_path, codec=None):
+    """Comme `read_deck`, précédé de la signature (mtime_ns, taille) du fichier.
+
+    Fonction de module, utilisable depuis un pool de processus.
+    """
+    st = os.stat(deck_path)
+    deck, layout = read_deck(deck_path, codec)
+    return (st.st_mtime_ns, st.st_size), deck, layout
+
+
+def _read_chunks(deck_path, header, codec=None):
+    directory = chunks_dir(deck_path)
+    layout = ShardLayout(header['chunk_size'], header.get('next_chunk', 0), codec)
+    cards = []
+    for position, name in enumerate(header['chunks']):
+        with open(directory / name, 'rb') as f:
+            raw = f.read()
+        chunk = decode(raw)
+        for card in chunk:
+            layout.chunk_of[str(card.get('id'))] = position
+        cards.extend(chunk)
+        layout.chunks.append(name)
+        layout.counts.append(len(chunk))
+        layout.sizes.append(len(raw))
+    deck = dict(header.get('deck', {}))
+    deck['flashcards'] = cards
+    return deck, layout
+
+
+def iter_chunk_cards(deck_path, header, attempts=3):
+    """Itère sur les cartes d'un deck découpé, un fragment à la fois"""
+    yielded = 0
+    for attempt in range(attempts):
+        skip = yielded
+        try:
+            for name in header['chunks']:
+                chunk = load_file(chunks_dir(deck_path) / name)
+                if skip >= len(chunk):
+                    skip -= len(chunk)
+                    continue
+                for card in chunk[skip:]:
+                    yielded += 1
+                    yield card
+                skip = 0
+            return
+        except FileNotFoundError:
+            # Fragment remplacé entre-temps : on reprend après la dernière
+            # carte lue, d'après le nouvel en-tête
+            if attempt == attempts - 1:
+                raise
+            header = load_file(deck_path)
+
+
+def _write_chunk(directory, layout, position, cards):
+    data = encode(cards, layout.codec)
+    name = layout._new_name()
+    atomic_write(directory / name, data)
+    layout.chunks[position] = name
+    layout.counts[position] = len(cards)
+    layout.sizes[position] = len(data)
+
+
+def _write_header(deck_path, deck, layout):
+    header = {
+        'format': SHARD_FORMAT,
+        'chunk_size': layout.chunk_size,
+        'next_chunk': layout.next_chunk,
+        'chunks': layout.chunks,
+        'deck': {k: v for k, v in deck.items() if k not in ('id', 'flashcards')}
+    }
+    # L'en-tête reste lisible : il est petit et décrit le découpage
+    atomic_write(deck_path, encode(header, PRETTY))
+
+
+def write_sharded(deck_path, deck, chunk_size, next_chunk=0, codec=None):
+    """Écrit (ou convertit) un deck entier au format découpé"""
+    directory = chunks_dir(deck_path)
+    directory.mkdir(exist_ok=True)
+    cards = deck.get('flashcards', [])
+    layout = ShardLayout(chunk_size, next_chunk, codec)
+    for start in range(0, len(cards), chunk_size):
+        layout.chunks.append(None)
+        layout.counts.append(0)
+        layout.sizes.append(0)
+        _write_chunk(directory, layout, len(layout.chunks) - 1, cards[start:start + chunk_size])
+    layout._reindex(cards)
+    _write_header(deck_path, deck, layout)
+
+    # Fragments de l'écriture précédente, ou orphelins d'une écriture interrompue
+    live = set(layout.chunks)
+    for entry in os.scandir(directory):
+        if entry.name not in live:
+            os.remove(entry.path)
+    return layout
+
+
+def update_chunks(deck_path, deck, layout, added=(), removed=(), touched=()):
+    """Réécrit uniquement les fragments concernés par une modification.
+
+    `deck['flashcards']` doit déjà refléter la modification : les cartes
+    `added` ajoutées en fin de deck et les IDs `removed` retirés. Les
+    fragments des cartes `touched` sont réécrits avec leur état courant.
+    """
+    directory = chunks_dir(deck_path)
+    dirty = set()
+    for card_id in removed:
+        position = layout.chunk_of.pop(str(card_id), None)
+        if position is not None:
+            layout.counts[position] -= 1
+            dirty.add(position)
+    for card in added:
+        if not layout.counts or layout.counts[-1] >= layout.chunk_size:
+            layout.chunks.append(None)
+            layout.counts.append(0)
+            layout.sizes.append(0)
+        position = len(layout.chunks) - 1
+        layout.counts[position] += 1
+        layout.chunk_of[str(card.get('id'))] = position
+        dirty.add(position)
+    for card_id in touched:
+        position = layout.chunk_of.get(str(card_id))
+        if position is not None:
+            dirty.add(position)
+    if not dirty:
+        return
+
+    contents = {position: [] for position in dirty}
+    for card in deck.get('flashcards', []):
+        chunk = contents.get(layout.chunk_of.get(str(card.get('id'))))
+        if chunk is not None:
+            chunk.append(card)
+
+    obsolete = [layout.chunks[position] for position in dirty if layout.chunks[position]]
+    emptied = False
+    for position, cards in contents.items():
+        if cards:
+            _write_chunk(directory, layout, position, cards)
+        else:
+            layout.chunks[position] = None
+            emptied = True
+    if emptied:
+        keep = [i for i, name in enumerate(layout.chunks) if name is not None]
+        layout.chunks = [layout.chunks[i] for i in keep]
+        layout.counts = [layout.counts[i] for i in keep]
+        layout.sizes = [layout.sizes[i] for i in keep]
+        layout._reindex(deck.get('flashcards', []))
+    _write_header(deck_path, deck, layout)
+
+    for name in obsolete:
+        try:
+            os.remove(directory / name)
+        except FileNotFoundError:
+            pass
+
+
+def remove_chunks(deck_path):
+    """Supprime les fragments d'un deck"""
+    shutil.rmtree(chunks_dir(deck_path), ignore_errors=True)
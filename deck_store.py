@@ -0,0 +1,793 @@
+"""
+Stockage des decks.
+
+`DeckStore` définit l'interface utilisée par toutes les routes ; `JsonDeckStore`
+est le backend historique (un fichier JSON par deck) et `SqliteDeckStore`
+(voir sqlite_store.py) un backend SQLite indexé.
+"""
+import os
+import pathlib
+import threading
+import time
+from functools import partial
+
+from card_listing import check_options, decode_cursor, encode_cursor, finish_page, key_fields, select_page
+from card_stream import iter_array_field, project
+from deck_cache import DeckCache
+from deck_codec import encode
+from deck_loader import load_all
+from deck_lock import DeckLocks, atomic_write
+from deck_manifest import DeckManifest
+from deck_shards import (chunks_dir, is_sharded, iter_chunk_cards, read_deck, read_deck_file,
+                         remove_chunks, update_chunks, write_sharded)
+from due_index import DueIndex
+from review_journal import ReviewJournal, apply_record
+from review_queue import merge_due
+
+
+class DeckStore:
+    """Interface commune des backends de stockage des decks.
+
+    Les decks et les cartes sont échangés sous forme de dictionnaires ayant
+    la structure JSON décrite dans SPECS.md.
+    """
+
+    # Pool utilisé pour charger plusieurs decks à la fois (voir deck_loader.py)
+    load_workers = 8
+
+    def deck_exists(self, deck_id):
+        raise NotImplementedError
+
+    def get_deck(self, deck_id):
+        """Retourne le deck complet, ou None s'il n'existe pas"""
+        raise NotImplementedError
+
+    def deck_version(self, deck_id):
+        """Version du deck : (jeton, timestamp de dernière modification), ou None.
+
+        Le jeton change à chaque écriture du deck ou de ses cartes ; il sert
+        d'ETag aux réponses HTTP qui en dépendent.
+        """
+        raise NotImplementedError
+
+    def due_version(self, deck_id, now):
+        """(jeton de version, nombre de cartes dues à `now`), ou None si le deck n'existe pas.
+
+        Sert de validateur aux pages qui séparent cartes dues et à venir.
+        """
+        version = self.deck_version(deck_id)
+        if version is None:
+            return None
+        return version[0], self.count_due(deck_id, now)
+
+    def get_card(self, deck_id, card_id):
+        """Retourne une carte, ou None si le deck ou la carte n'existe pas"""
+        raise NotImplementedError
+
+    def load_decks(self, deck_ids=None, workers=None):
+        """Charge des decks en parallèle (tous par défaut).
+
+        Retourne un `deck_loader.LoadResult` par deck, dans l'ordre : un deck
+        illisible est signalé dans son résultat sans interrompre les autres.
+        """
+        if deck_ids is None:
+            deck_ids = [summary['id'] for summary in self.list_summaries()]
+        return load_all(deck_ids, self._read_deck, workers or self.load_workers)
+
+    def _read_deck(self, deck_id):
+        # Comme get_deck, mais une erreur de lecture est levée
+        deck = self.get_deck(deck_id)
+        if deck is None:
+            raise LookupError(f"Deck non trouvé : {deck_id}")
+        return deck
+
+    def warm_up(self, workers=None):
+        """Précharge les decks au démarrage ; retourne les `LoadResult`"""
+        return []
+
+    def iter_cards(self, deck_id, fields=None):
+        """Itère sur les cartes d'un deck sans le charger entièrement.
+
+        `fields` restreint chaque carte aux champs demandés (plus l'ID). Un
+        deck inexistant ne produit aucune carte.
+        """
+        deck = self.get_deck(deck_id)
+        for card in deck.get('flashcards', []) if deck is not None else []:
+            yield project(card, fields)
+
+    def list_cards(self, deck_id, sort='next_review', cursor=None, limit=50, fields=None, due=None, now=None):
+        """Retourne une page de cartes et le curseur de la page suivante.
+
+        `sort` est une clé de card_listing.SORT_KEYS, `due` restreint aux
+        cartes dues ('now') ou à venir ('later') et `fields` projette les
+        cartes. Le curseur vaut None après la dernière page. Lève ValueError
+        pour un tri, un filtre ou un curseur invalide.
+        """
+        check_options(sort, due)
+        after = decode_cursor(cursor) if cursor else None
+        now = time.time() if now is None else now
+        cards, last = self._page(deck_id, sort, after, limit, due, now, key_fields(sort, fields))
+        cards = [project(card, fields) for card in cards]
+        return cards, encode_cursor(last) if last is not None else None
+
+    def _page(self, deck_id, sort, after, limit, due, now, read_fields):
+        # Cas général : parcours en flux et tas borné à limit + 1 cartes
+        return select_page(self.iter_cards(deck_id, read_fields), sort, after, limit, due, now)
+
+    def get_cards(self, deck_id, card_ids):
+        """Retourne les cartes demandées qui existent, indexées par ID"""
+        cards = {}
+        for card_id in card_ids:
+            card = self.get_card(deck_id, card_id)
+            if card is not None:
+                cards[str(card_id)] = card
+        return cards
+
+    def list_summaries(self):
+        """Retourne les résumés de tous les decks (voir deck_manifest.summarize_deck)"""
+        raise NotImplementedError
+
+    def has_deck_name(self, name):
+        raise NotImplementedError
+
+    def count_decks(self):
+        raise NotImplementedError
+
+    def save_deck(self, deck_id, deck):
+        """Crée ou remplace entièrement un deck"""
+        raise NotImplementedError
+
+    def create_deck(self, deck_id, deck):
+        self.save_deck(deck_id, deck)
+        return deck
+
+    def update_deck(self, deck_id, update):
+        """Modifie les champs d'un deck (pas ses cartes) sous le verrou du deck.
+
+        `update(deck)` est appelé sur l'état courant du deck et retourne True
+        s'il l'a modifié ; le deck est alors réécrit. Retourne le résultat de
+        `update`, ou None si le deck n'existe pas.
+        """
+        raise NotImplementedError
+
+    def delete_deck(self, deck_id):
+        """Supprime un deck, retourne False s'il n'existait pas"""
+        raise NotImplementedError
+
+    def add_card(self, deck_id, card):
+        """Ajoute une carte, retourne False si le deck n'existe pas"""
+        raise NotImplementedError
+
+    def delete_card(self, deck_id, card_id):
+        """Supprime une carte.
+
+        Retourne None si le deck n'existe pas, False si la carte n'existe pas.
+        """
+        raise NotImplementedError
+
+    def record_review(self, deck_id, card):
+        """Enregistre les champs de révision mis à jour d'une carte"""
+        return self.record_reviews(deck_id, [card])[0]
+
+    def record_reviews(self, deck_id, cards):
+        """Enregistre un lot de révisions en une seule écriture.
+
+        Retourne, pour chaque carte, si elle a été trouvée et mise à jour.
+        """
+        raise NotImplementedError
+
+    def apply_reviews(self, deck_id, reviews, apply_review, batch=False):
+        """Applique un lot de révisions sur l'état courant des cartes.
+
+        `apply_review(card, review)` est appelé pour chaque révision (un dictionnaire
+        contenant `card_id`) sur la carte relue sous le verrou du deck, ce qui
+        évite de perdre une révision concurrente. Avec `batch`, il est appelé
+        une seule fois avec la liste des couples (carte, révision) trouvés.
+        Retourne, pour chaque révision, la carte mise à jour ou None si elle
+        n'existe pas.
+        """
+        raise NotImplementedError
+
+    def set_due_dates(self, deck_id, due_dates, expected=None):
+        """Remplace l'échéance des cartes `{card_id: next_review}` en une seule écriture.
+
+        `expected` donne, par carte, la dernière révision et la dernière
+        qualité `(date_last_reviewed, last_quality)` à partir desquelles
+        l'échéance a été calculée : une carte révisée depuis n'est pas
+        modifiée. Contrairement à une révision, rien n'est ajouté à
+        l'historique. Retourne le nombre de cartes mises à jour.
+        """
+        raise NotImplementedError
+
+    def due_cards(self, deck_id, now, limit=None):
+        """Cartes à réviser à l'instant `now`, des plus en retard aux plus récentes"""
+        raise NotImplementedError
+
+    def upcoming_cards(self, deck_id, now, limit=None):
+        """Cartes à réviser plus tard, triées par date de révision croissante"""
+        raise NotImplementedError
+
+    def count_due(self, deck_id, before):
+        """Nombre de cartes à réviser au plus tard à `before`"""
+        raise NotImplementedError
+
+    def iter_due(self, deck_id, now, page_size=100):
+        """Itère sur les cartes dues d'un deck par (échéance, ID), page par page"""
+        after = None
+        while True:
+            cards, after = self._page(deck_id, 'next_review', after, page_size, 'now', now, None)
+            yield from cards
+            if after is None:
+                return
+
+    def due_queue(self, now, limit=None, tags=None):
+        """Cartes dues de tous les decks, par échéance croissante.
+
+        Retourne des couples (ID du deck, carte). Seuls les decks dont le
+        résumé compte des cartes dues sont lus, et page par page.
+        """
+        page_size = min(limit or 100, 100)
+        streams = {summary['id']: self.iter_due(summary['id'], now, page_size)
+                   for summary in self.list_summaries()
+                   if summary.get('due_now') or (summary.get('next_due') or float('inf')) <= now}
+        return merge_due(streams, limit, tags)
+
+
+def _version_token(signature):
+    return '-'.join(f"{value:x}" for value in signature)
+
+
+def reviewed_as(card, expected):
+    """Indique si la carte a encore la dernière révision `expected` (None : toujours vrai)"""
+    return expected is None or (card.get('date_last_reviewed'), card.get('last_quality')) == tuple(expected)
+
+
+def apply_found(found, apply_review, batch):
+    """Applique `apply_review` aux couples (carte, révision), en un appel si `batch`"""
+    if batch:
+        if found:
+            apply_review(found)
+        return
+    for card, review in found:
+        apply_review(card, review)
+
+
+class _PendingWrite:
+    """Modification d'un deck en attente du verrou"""
+
+    __slots__ = ('apply', 'result', 'error', 'done')
+
+    def __init__(self, apply):
+        self.apply = apply
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+class _Changes:
+    """Effets des modifications d'un cycle d'écriture : cartes ajoutées ou
+    supprimées, cartes révisées à ajouter au journal, et champs du deck
+    modifiés (deck à réécrire)"""
+
+    __slots__ = ('added', 'removed', 'reviewed', 'rewrite')
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.reviewed = {}
+        self.rewrite = False
+
+    def review(self, card):
+        self.reviewed[str(card.get('id'))] = card
+
+
+class JsonDeckStore(DeckStore):
+    """Backend historique : un fichier `<deck_id>.json` par deck.
+
+    Les decks parsés sont gardés dans un `DeckCache`, leurs résumés dans un
+    `DeckManifest` et les révisions sont ajoutées à un `ReviewJournal`.
+    Chaque deck en cache a un `DueIndex`, maintenu à chaque modification
+    d'une carte et abandonné quand le deck quitte le cache.
+
+    Les modifications se font sous le verrou du deck (voir deck_lock.py), sur
+    le deck relu depuis le disque : plusieurs workers peuvent écrire dans le
+    même répertoire de données sans perdre de mise à jour.
+
+    Un deck dont le JSON dépasse `shard_bytes` est converti au format découpé
+    (voir deck_shards.py) lors de sa prochaine écriture. Les decks sont écrits
+    avec le codec `codec` (voir deck_codec.py) et relus quel que soit le
+    codec qui les a écrits.
+
+    Les chargements groupés (manifeste, préchargement) utilisent un pool de
+    `load_workers` threads, ou de processus si `load_executor` vaut 'process'.
+    """
+
+    def __init__(self, decks_dir, recall_dir, manifest_path,
+                 cache_max_bytes=64 * 1024 * 1024, journal_compact_bytes=256 * 1024,
+                 lock_dir=None, shard_bytes=1024 * 1024, chunk_cards=500, codec=None,
+                 load_workers=8, load_executor='thread'):
+        self.decks_dir = pathlib.Path(decks_dir)
+        self.codec = codec
+        self.shard_bytes = shard_bytes
+        self.chunk_cards = chunk_cards
+        self.load_workers = load_workers
+        self.load_executor = load_executor
+        self._due_indexes = {}  # deck_id -> (id du deck indexé, DueIndex)
+        self._layouts = {}  # deck_id -> (id du deck, ShardLayout) des decks découpés
+        self.cache = DeckCache(max_bytes=cache_max_bytes, on_drop=self._forget,
+                               extra_cost=self._chunks_bytes)
+        self.manifest = DeckManifest(manifest_path)
+        self.journal = ReviewJournal(recall_dir, compact_threshold=journal_compact_bytes, codec=codec)
+        self.locks = DeckLocks(lock_dir or self.decks_dir.parent / 'locks')
+        self._pending = {}  # deck_id -> [_PendingWrite]
+        self._pending_guard = threading.Lock()
+
+    def _forget(self, deck_id, deck):
+        # Index et fragments rattachés à l'objet deck qui quitte le cache
+        for attached in (self._due_indexes, self._layouts):
+            entry = attached.get(deck_id)
+            if entry is not None and entry[0] == id(deck):
+                del attached[deck_id]
+
+    def _layout(self, deck_id, deck):
+        """Fragments du deck en cache, ou None pour un deck monolithique"""
+        entry = self._layouts.get(deck_id)
+        return entry[1] if entry is not None and entry[0] == id(deck) else None
+
+    def _chunks_bytes(self, deck_id):
+        entry = self._layouts.get(deck_id)
+        return entry[1].bytes if entry is not None else 0
+
+    def due_index(self, deck_id, deck=None):
+        """Retourne l'index des échéances du deck, construit au besoin"""
+        deck = self.get_deck(deck_id) if deck is None else deck
+        if deck is None:
+            return None
+        entry = self._due_indexes.get(deck_id)
+        if (entry is None or entry[0] != id(deck)
+                or len(entry[1]) != len(deck.get('flashcards', []))):
+            entry = (id(deck), DueIndex(deck.get('flashcards', [])))
+            self._due_indexes[deck_id] = entry
+        return entry[1]
+
+    def deck_path(self, deck_id):
+        return self.decks_dir / f"{deck_id}.json"
+
+    def _paths(self, deck_id):
+        """Fichier du deck et journal des révisions associé"""
+        return (self.deck_path(deck_id), self.journal.path(deck_id))
+
+    def signature(self, deck_id, deck_stat=None):
+        """Signature du deck et de son journal, utilisée par le manifeste"""
+        deck_path, journal_path = self._paths(deck_id)
+        signature = []
+        for path, st in ((deck_path, deck_stat), (journal_path, None)):
+            if st is None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    signature.extend([0, 0])
+                    continue
+            signature.extend([st.st_mtime_ns, st.st_size])
+        return signature
+
+    def _load(self, paths):
+        deck_path, _ = paths
+        deck_id = pathlib.Path(deck_path).stem
+        return self._attach(deck_id, *read_deck(deck_path, self.codec))
+
+    def _attach(self, deck_id, deck, layout):
+        """Rattache ses fragments à un deck lu et rejoue son journal"""
+        if layout is not None:
+            self._layouts[deck_id] = (id(deck), layout)
+        else:
+            self._layouts.pop(deck_id, None)
+        self.journal.replay(deck_id, deck)
+        return deck
+
+    def deck_exists(self, deck_id):
+        return self.deck_path(deck_id).exists()
+
+    def deck_version(self, deck_id):
+        # Les révisions ne touchent que le journal : il fait partie de la version
+        signature = self.signature(deck_id)
+        if not signature[0]:
+            return None
+        return _version_token(signature), max(signature[0], signature[2]) / 1e9
+
+    def due_version(self, deck_id, now):
+        # Le résumé du manifeste suffit tant qu'il correspond aux fichiers du
+        # deck et qu'aucune carte n'est devenue due depuis son calcul : le deck
+        # n'est alors pas chargé. Sinon le résumé est recalculé, une fois par
+        # échéance franchie.
+        signature = self.signature(deck_id)
+        if not signature[0]:
+            return None
+        summary = self.manifest.get(deck_id)
+        if (summary is None or summary.get('signature') != signature
+                or (summary['next_due'] is not None and summary['next_due'] <= now)):
+            deck = self.get_deck(deck_id)
+            if deck is None:
+                return None
+            self.manifest.update(deck_id, deck, signature, self.due_index(deck_id, deck), now)
+            summary = self.manifest.get(deck_id)
+        return _version_token(signature), summary['due_now']
+
+    def get_deck(self, deck_id):
+        # Accepter un ID avec ou sans l'extension .json
+        deck_id = deck_id[:-len('.json')] if deck_id.endswith('.json') else deck_id
+        try:
+            deck = self.cache.get(deck_id, self._paths(deck_id), self._load)
+        except Exception as e:
+            print(f"Error reading deck {deck_id}: {e}")
+            return None
+        if deck is None:
+            return None
+        deck['id'] = deck_id
+        return deck
+
+    def _read_deck(self, deck_id):
+        deck = self.cache.get(deck_id, self._paths(deck_id), self._load)
+        if deck is None:
+            raise LookupError(f"Deck non trouvé : {deck_id}")
+        deck['id'] = deck_id
+        return deck
+
+    def warm_up(self, workers=None):
+        """Précharge en cache les decks modifiés le plus récemment.
+
+        Seuls les decks qui tiennent dans le budget du cache sont lus. Avec un
+        pool de processus, les fichiers sont décodés dans les processus puis
+        placés dans le cache de celui-ci.
+        """
+        candidates = []
+        with os.scandir(self.decks_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.json') and entry.is_file():
+                    st = entry.stat()
+                    candidates.append((st.st_mtime_ns, st.st_size, entry.name[:-len('.json')]))
+        deck_ids, budget = [], self.cache.max_bytes
+        for _, size, deck_id in sorted(candidates, reverse=True):
+            if size > budget:
+                continue
+            budget -= size
+            deck_ids.append(deck_id)
+
+        workers = workers or self.load_workers
+        if self.load_executor != 'process':
+            return load_all(deck_ids, self._read_deck, workers)
+
+        read = partial(read_deck_file, codec=self.codec)
+        results = load_all([str(self.deck_path(deck_id)) for deck_id in deck_ids], read, workers, 'process')
+        loaded = []
+        for deck_id, result in zip(deck_ids, results):
+            deck = None
+            if result.error is None:
+                signature, deck, layout = result.value
+                try:
+                    st = os.stat(self.deck_path(deck_id))
+                    current = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    current = None
+                # Fichier modifié depuis sa lecture : il sera relu à la demande
+                if current == signature:
+                    self.cache.get(deck_id, self._paths(deck_id),
+                                   lambda paths: self._attach(deck_id, deck, layout))
+            loaded.append(result._replace(key=deck_id, value=deck))
+        return loaded
+
+    def get_card(self, deck_id, card_id):
+        deck = self.get_deck(deck_id)
+        if deck is None:
+            return None
+        for card in deck.get('flashcards', []):
+            if str(card.get('id')) == str(card_id):
+                return card
+        return None
+
+    def iter_cards(self, deck_id, fields=None):
+        """Itère sur les cartes du deck, lues en flux s'il n'est pas en cache.
+
+        Le journal des révisions est rejoué sur chaque carte lue.
+        """
+        return self._iter_cards(deck_id, fields, {})
+
+    def _iter_cards(self, deck_id, fields, header):
+        # `header` reçoit les métadonnées du deck au fil de la lecture
+        deck = self.cache.peek(deck_id, self._paths(deck_id))
+        if deck is not None:
+            header.update((k, v) for k, v in deck.items() if k != 'flashcards')
+            for card in deck.get('flashcards', []):
+                yield project(card, fields)
+            return
+
+        latest = self.journal.latest(deck_id)
+        deck_path = self.deck_path(deck_id)
+        try:
+            f = open(deck_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        raw = {}
+        with f:
+            for card in iter_array_field(f, 'flashcards', raw):
+                yield self._replayed(card, latest, fields)
+        if not is_sharded(raw):
+            header.update(raw)
+            return
+        header.update(raw.get('deck', {}))
+        for card in iter_chunk_cards(deck_path, raw):
+            yield self._replayed(card, latest, fields)
+
+    @staticmethod
+    def _replayed(card, latest, fields):
+        record = latest.get(card.get('id'))
+        if record is not None:
+            apply_record(card, record)
+        return project(card, fields)
+
+    def _summary_source(self, deck_id):
+        """Deck à résumer pour le manifeste : celui du cache, ou un deck lu en flux"""
+        deck = self.cache.peek(deck_id, self._paths(deck_id))
+        if deck is not None:
+            return deck
+        if not self.deck_exists(deck_id):
+            return None
+        streamed = {}
+        streamed['flashcards'] = self._iter_cards(deck_id, ('next_review',), streamed)
+        return streamed
+
+    def list_summaries(self):
+        return self.manifest.sync(self.decks_dir, self._summary_source, self.signature,
+                                  workers=self.load_workers)
+
+    def has_deck_name(self, name):
+        self.list_summaries()
+        return self.manifest.has_name(name)
+
+    def count_decks(self):
+        return len(self.manifest)
+
+    def save_deck(self, deck_id, deck):
+        """Écrit un deck sur disque et met à jour le cache et le manifeste"""
+        with self.locks.lock(deck_id):
+            self._write_deck(deck_id, deck)
+
+    def _write_deck(self, deck_id, deck):
+        """Remplace atomiquement le fichier du deck (verrou déjà acquis).
+
+        Le deck écrit contient déjà les révisions rejouées : le journal est
+        donc vidé après l'écriture.
+        """
+        deck_path = self.deck_path(deck_id)
+        try:
+            data = None
+            if not chunks_dir(deck_path).exists():
+                data = encode(deck, self.codec)
+            if data is None or len(data) > self.shard_bytes:
+                layout = write_sharded(deck_path, deck, self.chunk_cards, codec=self.codec)
+                self._layouts[deck_id] = (id(deck), layout)
+            else:
+                atomic_write(deck_path, data)
+                self._layouts.pop(deck_id, None)
+        except Exception:
+            self.cache.invalidate(deck_id)
+            raise
+        self.journal.clear(deck_id)
+        # Index construit avant `put` : un deck trop gros pour le cache n'en garde aucun
+        index = self.due_index(deck_id, deck)
+        self.cache.put(deck_id, self._paths(deck_id), deck)
+        self.manifest.update(deck_id, deck, self.signature(deck_id), index)
+
+    def delete_deck(self, deck_id):
+        file_path = self.deck_path(deck_id)
+        with self.locks.lock(deck_id):
+            self.cache.invalidate(deck_id)
+            self.manifest.remove(deck_id)
+            self.journal.clear(deck_id)
+            remove_chunks(file_path)
+            if file_path.exists():
+                file_path.unlink()
+                return True
+        return False
+
+    def _mutate(self, deck_id, apply):
+        """Applique `apply(deck, index, changes)` sous le verrou du deck.
+
+        Les modifications mises en attente derrière le verrou par d'autres
+        threads sont appliquées dans le même cycle lecture/écriture : une
+        rafale de révisions sur un deck ne coûte qu'une écriture.
+        """
+        pending = _PendingWrite(apply)
+        with self._pending_guard:
+            self._pending.setdefault(deck_id, []).append(pending)
+        with self.locks.lock(deck_id):
+            if not pending.done:
+                with self._pending_guard:
+                    batch = self._pending.pop(deck_id, [])
+                self._commit(deck_id, batch)
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _commit(self, deck_id, batch):
+        # Relu sous le verrou : le cache est revalidé sur la signature des
+        # fichiers et voit donc les écritures des autres processus
+        deck = self.get_deck(deck_id)
+        index = self.due_index(deck_id, deck) if deck is not None else None
+        changes = _Changes()
+        try:
+            for pending in batch:
+                try:
+                    pending.result = pending.apply(deck, index, changes)
+                except Exception as e:
+                    pending.error = e
+            if deck is not None:
+                self._persist(deck_id, deck, index, changes)
+        except Exception as e:
+            for pending in batch:
+                if pending.error is None:
+                    pending.error = e
+        finally:
+            for pending in batch:
+                pending.done = True
+
+    def _persist(self, deck_id, deck, index, changes):
+        if changes.rewrite:
+            self._write_deck(deck_id, deck)
+            return
+        layout = self._layout(deck_id, deck)
+        if layout is None and (changes.added or changes.removed):
+            self._write_deck(deck_id, deck)
+            return
+        if not (changes.added or changes.removed or changes.reviewed):
+            return
+        try:
+            if changes.added or changes.removed:
+                # Deck découpé : seuls les fragments concernés sont réécrits
+                update_chunks(self.deck_path(deck_id), deck, layout,
+                              added=changes.added, removed=changes.removed)
+            if changes.reviewed:
+                self.journal.append_many(deck_id, list(changes.reviewed.values()))
+            # Journal replié dans le deck au-delà du seuil
+            if self.journal.needs_compaction(deck_id):
+                if layout is None:
+                    self._write_deck(deck_id, deck)
+                    return
+                update_chunks(self.deck_path(deck_id), deck, layout,
+                              touched=self.journal.latest(deck_id))
+                self.journal.clear(deck_id)
+        except Exception:
+            self.cache.invalidate(deck_id)
+            raise
+        self.cache.put(deck_id, self._paths(deck_id), deck)
+        self.manifest.update(deck_id, deck, self.signature(deck_id), index)
+
+    def update_deck(self, deck_id, update):
+        def apply(deck, index, changes):
+            if deck is None:
+                return None
+            updated = update(deck)
+            changes.rewrite = changes.rewrite or bool(updated)
+            return updated
+        return self._mutate(deck_id, apply)
+
+    def add_card(self, deck_id, card):
+        def apply(deck, index, changes):
+            if deck is None:
+                return False
+            deck.setdefault('flashcards', []).append(card)
+            index.add(card)
+            changes.added.append(card)
+            return True
+        return self._mutate(deck_id, apply)
+
+    def delete_card(self, deck_id, card_id):
+        def apply(deck, index, changes):
+            if deck is None:
+                return None
+            if not index.remove(card_id):
+                return False
+            deck['flashcards'] = [card for card in deck.get('flashcards', [])
+                                  if str(card.get('id')) != str(card_id)]
+            changes.removed.append(card_id)
+            return True
+        return self._mutate(deck_id, apply)
+
+    def get_cards(self, deck_id, card_ids):
+        deck = self.get_deck(deck_id)
+        if deck is None:
+            return {}
+        wanted = {str(card_id) for card_id in card_ids}
+        return {str(card.get('id')): card for card in deck.get('flashcards', [])
+                if str(card.get('id')) in wanted}
+
+    def record_reviews(self, deck_id, cards):
+        """Ajoute les révisions au journal du deck en une seule écriture"""
+        def apply(deck, index, changes):
+            if deck is None:
+                return [False] * len(cards)
+            results = []
+            for card in cards:
+                target = index.get(card.get('id'))
+                results.append(target is not None)
+                if target is None:
+                    continue
+                if target is not card:
+                    target.update(card)
+                index.update(target)
+                changes.review(target)
+            return results
+        return self._mutate(deck_id, apply)
+
+    def apply_reviews(self, deck_id, reviews, apply_review, batch=False):
+        def apply(deck, index, changes):
+            if deck is None:
+                return [None] * len(reviews)
+            results = [index.get(review.get('card_id')) for review in reviews]
+            found = [(target, review) for target, review in zip(results, reviews) if target is not None]
+            apply_found(found, apply_review, batch)
+            for target, _ in found:
+                index.update(target)
+                changes.review(target)
+            return results
+        return self._mutate(deck_id, apply)
+
+    def set_due_dates(self, deck_id, due_dates, expected=None):
+        def apply(deck, index, changes):
+            if deck is None:
+                return 0
+            updated = 0
+            for card_id, next_review in due_dates.items():
+                target = index.get(card_id)
+                if target is None or not reviewed_as(target, (expected or {}).get(card_id)):
+                    continue
+                target['next_review'] = next_review
+                index.update(target)
+                changes.review(target)
+                updated += 1
+            return updated
+        return self._mutate(deck_id, apply)
+
+    def _page(self, deck_id, sort, after, limit, due, now, read_fields):
+        if sort != 'next_review':
+            return super()._page(deck_id, sort, after, limit, due, now, read_fields)
+        index = self.due_index(deck_id)
+        if index is None:
+            return [], None
+        return finish_page(index.page(after, limit + 1, now, due), limit)
+
+    def due_cards(self, deck_id, now, limit=None):
+        index = self.due_index(deck_id)
+        return index.due(now, limit) if index is not None else []
+
+    def upcoming_cards(self, deck_id, now, limit=None):
+        index = self.due_index(deck_id)
+        return index.upcoming(now, limit) if index is not None else []
+
+    def count_due(self, deck_id, before):
+        index = self.due_index(deck_id)
+        return index.count_due(before) if index is not None else 0
+
+
+def open_store(config):
+    """Crée le backend de stockage choisi par `config['DECK_STORE']`"""
+    kind = config.get('DECK_STORE', 'json')
+    if kind == 'json':
+        data_dir = pathlib.Path(config['DATA_FOLDER'])
+        return JsonDeckStore(
+            config['DECKS_FOLDER'],
+            config.get('RECALL_FOLDER', data_dir / 'recall'),
+            data_dir / 'manifest.json',
+            cache_max_bytes=config.get('DECK_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+            journal_compact_bytes=config.get('REVIEW_JOURNAL_COMPACT_BYTES', 256 * 1024),
+            lock_dir=data_dir / 'locks',
+            shard_bytes=config.get('DECK_SHARD_BYTES', 1024 * 1024),
+            chunk_cards=config.get('DECK_CHUNK_CARDS', 500),
+            codec=config.get('DECK_CODEC'),
+            load_workers=config.get('DECK_LOAD_WORKERS', 8),
+            load_executor=config.get('DECK_LOAD_EXECUTOR', 'thread')
+        )
+    if kind == 'sqlite':
+        from sqlite_store import SqliteDeckStore
+        return SqliteDeckStore(config['SQLITE_PATH'])
+    raise ValueError(f"Backend de stockage inconnu : {kind}")
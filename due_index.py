@@ -0,0 +1,110 @@
+"""
+Index des échéances de révision d'un deck.
+
+Les cartes sont gardées triées par (next_review, card_id) : « à réviser
+maintenant », « N prochaines » et « nombre dû avant T » deviennent des
+recherches dichotomiques au lieu d'un parcours complet suivi d'un tri.
+"""
+from bisect import bisect_left, bisect_right
+
+
+def card_due(card):
+    """Échéance d'une carte ; une carte jamais révisée est due immédiatement"""
+    return card.get('next_review', 0) or 0
+
+
+class DueIndex:
+    """Tableau trié des (next_review, card_id) d'un deck.
+
+    L'index garde une référence vers chaque carte : il doit être reconstruit
+    si le deck est rechargé, et mis à jour par `add`, `remove` et `update`
+    à chaque modification d'une carte.
+    """
+
+    def __init__(self, cards=()):
+        self._cards = {}
+        for card in cards:
+            self._cards[str(card.get('id'))] = card
+        self._keys = sorted((card_due(card), card_id) for card_id, card in self._cards.items())
+        self._dues = [due for due, _ in self._keys]
+        self._due_of = {card_id: due for due, card_id in self._keys}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, card_id):
+        return str(card_id) in self._cards
+
+    def get(self, card_id):
+        """Retourne la carte indexée sous cet ID, ou None"""
+        return self._cards.get(str(card_id))
+
+    def add(self, card):
+        """Indexe une nouvelle carte"""
+        card_id = str(card.get('id'))
+        if card_id in self._cards:
+            self.remove(card_id)
+        due = card_due(card)
+        i = bisect_left(self._keys, (due, card_id))
+        self._keys.insert(i, (due, card_id))
+        self._dues.insert(i, due)
+        self._due_of[card_id] = due
+        self._cards[card_id] = card
+
+    def remove(self, card_id):
+        """Retire une carte de l'index, retourne False si elle n'y était pas"""
+        card_id = str(card_id)
+        due = self._due_of.pop(card_id, None)
+        if due is None:
+            return False
+        i = bisect_left(self._keys, (due, card_id))
+        del self._keys[i]
+        del self._dues[i]
+        del self._cards[card_id]
+        return True
+
+    def update(self, card):
+        """Repositionne une carte dont l'échéance a changé"""
+        card_id = str(card.get('id'))
+        if self._due_of.get(card_id) == card_due(card) and self._cards.get(card_id) is card:
+            return
+        self.remove(card_id)
+        self.add(card)
+
+    def count_due(self, before):
+        """Nombre de cartes dont l'échéance est <= `before`"""
+        return bisect_right(self._dues, before)
+
+    def due(self, now, limit=None):
+        """Cartes dues à `now`, des plus en retard aux plus récentes"""
+        end = self.count_due(now)
+        if limit is not None:
+            end = min(end, limit)
+        return [self._cards[card_id] for _, card_id in self._keys[:end]]
+
+    def upcoming(self, now, limit=None):
+        """Cartes dues après `now`, par échéance croissante"""
+        start = self.count_due(now)
+        end = len(self._keys) if limit is None else min(len(self._keys), start + limit)
+        return [self._cards[card_id] for _, card_id in self._keys[start:end]]
+
+    def page(self, after=None, limit=None, now=None, due=None):
+        """Cartes de clé (échéance, ID) strictement supérieure à `after`.
+
+        `due` restreint aux cartes dues à `now` ('now') ou à venir ('later').
+        Retourne au plus `limit` couples (clé, carte).
+        """
+        start = 0 if after is None else bisect_right(self._keys, after)
+        stop = len(self._keys)
+        if due == 'now':
+            stop = self.count_due(now)
+        elif due == 'later':
+            start = max(start, self.count_due(now))
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return [(key, self._cards[key[1]]) for key in self._keys[start:stop]]
+
+    def next_due(self, now):
+        """Première échéance strictement postérieure à `now`, ou None"""
+        i = self.count_due(now)
+        return self._dues[i] if i < len(self._dues) else None
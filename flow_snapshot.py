@@ -0,0 +1,307 @@
+"""
+Instantanés binaires des flux de révision.
+
+Un état est enregistré en deux fichiers :
+
+- `<chemin>` : instantané de base. Un en-tête, puis les colonnes numériques
+  des tâches stockées côte à côte en binaire little-endian : prochaine
+  révision (timestamp, NaN si aucune), facteur de facilité, bonnes réponses
+  consécutives, dépendances au format CSR et tâches complétées. Les noms
+  suivent, en UTF-8 séparés par des octets nuls. Le fichier est ouvert par
+  mmap : les colonnes sont lues directement depuis la projection en mémoire.
+- `<chemin>.delta` : journal append-only des tâches ajoutées ou modifiées
+  depuis la base, en enregistrements binaires.
+
+Une sauvegarde n'ajoute au journal que les tâches modifiées. Quand le journal
+dépasse une fraction de la taille de la base, la base est réécrite et le
+journal repart à zéro (compaction). Chaque base porte un numéro de génération
+recopié dans l'en-tête de son journal : un journal d'une autre génération
+(compaction interrompue) est ignoré.
+"""
+from array import array
+from datetime import datetime
+import contextlib
+import math
+import mmap
+import os
+import secrets
+import struct
+import sys
+import tempfile
+
+MAGIC = b'SRFB'
+DELTA_MAGIC = b'SRFD'
+VERSION = 1
+
+# magic, version, réservé, génération, tâches, dépendances, octets des noms
+HEADER = struct.Struct('<4sHHQQQQ')
+DELTA_HEADER = struct.Struct('<4sHHQ')
+# Modification : type, complétée, tâche, prochaine révision, facilité, bonnes réponses
+UPDATE = struct.Struct('<cB6xqddq')
+# Ajout : type, longueur du nom, nombre de dépendances, tâche ; puis nom et dépendances
+ADD = struct.Struct('<c3xIIq')
+
+# Le journal est compacté au-delà de cette fraction de la taille de la base
+COMPACT_RATIO = 0.5
+
+_SWAP = sys.byteorder != 'little'
+
+NAN = float('nan')
+
+
+def to_timestamp(value):
+    """Timestamp d'une date de révision, NaN si aucune"""
+    return value.timestamp() if value is not None else NAN
+
+
+def to_datetime(timestamp):
+    """Date de révision d'un timestamp, None pour NaN"""
+    return None if math.isnan(timestamp) else datetime.fromtimestamp(timestamp)
+
+
+def is_snapshot(path):
+    """Indique si `path` est un instantané binaire (sinon : ancien format JSON)"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _padding(size):
+    return b'\0' * (-size % 8)
+
+
+def _little_endian(column):
+    if _SWAP:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+def _write_atomic(path, chunks):
+    """Écrit les blocs `chunks` dans `path` via un fichier temporaire renommé"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class FlowColumns:
+    """État complet d'un flux en colonnes, tel qu'écrit dans une base"""
+
+    __slots__ = ('names', 'dep_offsets', 'dep_targets', 'completed', 'next_revision', 'ease', 'streak')
+
+    def __init__(self, names, dep_offsets, dep_targets, completed, next_revision, ease, streak):
+        self.names = names
+        self.dep_offsets = dep_offsets      # array('q'), len(names) + 1 valeurs
+        self.dep_targets = dep_targets      # array('q')
+        self.completed = completed          # bytes ou bytearray, 0 ou 1 par tâche
+        self.next_revision = next_revision  # array('d'), NaN si aucune
+        self.ease = ease                    # array('d')
+        self.streak = streak                # array('q')
+
+
+class Snapshot:
+    """Base projetée en mémoire et enregistrements du journal qui la suivent.
+
+    `column(nom)` retourne une colonne numérique copiée dans un `array` en
+    une seule copie mémoire depuis la projection.
+    """
+
+    _TYPES = {'next_revision': 'd', 'ease': 'd', 'streak': 'q', 'dep_offsets': 'q', 'dep_targets': 'q'}
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, self.generation, self.count, edges, names_bytes = \
+                HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Instantané de flux invalide: {path}")
+            count = self.count
+            offset = HEADER.size
+            self._offsets = {}
+            for name, length in (('next_revision', count), ('ease', count), ('streak', count),
+                                 ('dep_offsets', count + 1), ('dep_targets', edges)):
+                self._offsets[name] = (offset, length)
+                offset += 8 * length
+            self.completed = self._map[offset:offset + count]
+            offset += count + len(_padding(count))
+            blob = self._map[offset:offset + names_bytes].decode('utf-8')
+            self.names = blob.split('\0') if count else []
+            self.size = len(self._map)
+        except BaseException:
+            self._map.close()
+            raise
+        self.records = []
+
+    def column(self, name):
+        offset, length = self._offsets[name]
+        column = array(self._TYPES[name])
+        with memoryview(self._map) as view, view[offset:offset + 8 * length] as block:
+            column.frombytes(block)
+        if _SWAP:
+            column.byteswap()
+        return column
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_base(path, columns):
+    """Écrit une base complète et retourne (génération, taille en octets)"""
+    if any('\0' in name for name in columns.names):
+        raise ValueError("Un nom de tâche ne peut pas contenir d'octet nul")
+    count = len(columns.names)
+    names = '\0'.join(columns.names).encode('utf-8')
+    generation = secrets.randbits(64)
+    chunks = [HEADER.pack(MAGIC, VERSION, 0, generation, count, len(columns.dep_targets), len(names))]
+    for column in (columns.next_revision, columns.ease, columns.streak,
+                   columns.dep_offsets, columns.dep_targets):
+        chunks.append(_little_endian(column).tobytes())
+    chunks += [bytes(columns.completed), _padding(count), names]
+    _write_atomic(path, chunks)
+    return generation, sum(len(chunk) for chunk in chunks)
+
+
+def delta_path(path):
+    return f"{path}.delta"
+
+
+def reset_deltas(path, generation):
+    """Crée un journal vide rattaché à la base de génération `generation`"""
+    _write_atomic(delta_path(path), [DELTA_HEADER.pack(DELTA_MAGIC, VERSION, 0, generation)])
+
+
+def append_deltas(path, added, updated):
+    """Ajoute au journal les tâches ajoutées puis modifiées.
+
+    `added` : [(tâche, nom, dépendances)] ; `updated` : [(tâche, complétée,
+    prochaine révision, facilité, bonnes réponses)]. Retourne la taille du journal.
+    """
+    chunks = []
+    for task_id, name, dependencies in added:
+        encoded = name.encode('utf-8')
+        chunks.append(ADD.pack(b'A', len(encoded), len(dependencies), task_id))
+        chunks.append(encoded)
+        chunks.append(struct.pack(f'<{len(dependencies)}q', *dependencies))
+    for task_id, completed, next_revision, ease, streak in updated:
+        chunks.append(UPDATE.pack(b'U', completed, task_id, next_revision, ease, streak))
+    with open(delta_path(path), 'ab') as f:
+        f.write(b''.join(chunks))
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+def read_deltas(path, generation):
+    """Enregistrements du journal de la base `generation`, dans l'ordre.
+
+    Un journal absent ou d'une autre génération est ignoré ; un dernier
+    enregistrement tronqué (écriture interrompue) aussi.
+    Retourne (enregistrements, taille du journal).
+    """
+    try:
+        with open(delta_path(path), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    if len(data) < DELTA_HEADER.size:
+        return [], 0
+    magic, version, _, delta_generation = DELTA_HEADER.unpack_from(data, 0)
+    if magic != DELTA_MAGIC or version != VERSION or delta_generation != generation:
+        return [], 0
+    records = []
+    offset = DELTA_HEADER.size
+    while offset < len(data):
+        kind = data[offset:offset + 1]
+        if kind == b'U':
+            if offset + UPDATE.size > len(data):
+                break
+            _, completed, task_id, next_revision, ease, streak = UPDATE.unpack_from(data, offset)
+            records.append(('U', task_id, completed, next_revision, ease, streak))
+            offset += UPDATE.size
+        elif kind == b'A':
+            if offset + ADD.size > len(data):
+                break
+            _, name_length, dep_count, task_id = ADD.unpack_from(data, offset)
+            end = offset + ADD.size + name_length + 8 * dep_count
+            if end > len(data):
+                break
+            start = offset + ADD.size
+            name = data[start:start + name_length].decode('utf-8')
+            dependencies = list(struct.unpack_from(f'<{dep_count}q', data, start + name_length))
+            records.append(('A', task_id, name, dependencies))
+            offset = end
+        else:
+            break
+    return records, offset
+
+
+class SnapshotFile:
+    """Enregistrements successifs d'un flux dans un même instantané.
+
+    Retient la génération de la base, le nombre de tâches déjà enregistrées et
+    les tailles des fichiers, pour choisir entre un ajout au journal et une
+    réécriture de la base.
+    """
+
+    def __init__(self, path, compact_ratio=COMPACT_RATIO):
+        self.path = str(path)
+        self.compact_ratio = compact_ratio
+        self.generation = None
+        self.count = 0
+        self.base_size = 0
+        self.delta_size = 0
+
+    def load(self):
+        """Ouvre la base et lit son journal : retourne un Snapshot à fermer après usage"""
+        snapshot = Snapshot(self.path)
+        snapshot.records, self.delta_size = read_deltas(self.path, snapshot.generation)
+        self.generation = snapshot.generation
+        self.base_size = snapshot.size
+        self.count = snapshot.count + sum(1 for record in snapshot.records if record[0] == 'A')
+        return snapshot
+
+    def save(self, count, columns, task, dirty, full=False):
+        """Enregistre un flux de `count` tâches.
+
+        `columns()` retourne l'état complet (FlowColumns) pour une base ;
+        `task(id)` retourne (nom, dépendances, complétée, prochaine révision,
+        facilité, bonnes réponses) d'une tâche ; `dirty` est l'ensemble des
+        tâches modifiées depuis le dernier enregistrement. Retourne True si
+        la base a été réécrite.
+        """
+        estimate = self.delta_size + UPDATE.size * (len(dirty) + count - self.count)
+        if full or self.generation is None or count < self.count \
+                or estimate > self.compact_ratio * self.base_size:
+            self.generation, self.base_size = write_base(self.path, columns())
+            reset_deltas(self.path, self.generation)
+            self.delta_size = DELTA_HEADER.size
+            self.count = count
+            return True
+        added = []
+        updated = []
+        for task_id in range(self.count, count):
+            name, dependencies, *state = task(task_id)
+            added.append((task_id, name, dependencies))
+            updated.append((task_id, *state))
+        for task_id in sorted(dirty):
+            if task_id < self.count:
+                updated.append((task_id, *task(task_id)[2:]))
+        if updated:
+            self.delta_size = append_deltas(self.path, added, updated)
+        self.count = count
+        return False
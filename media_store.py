@@ -0,0 +1,73 @@
+"""
+Stockage des fichiers multimédia par contenu.
+
+Chaque fichier est nommé d'après le SHA-256 de son contenu : une même image
+jointe à plusieurs cartes n'est stockée qu'une fois. L'empreinte est calculée
+pendant la copie de l'upload vers un fichier temporaire, par blocs, sans
+jamais garder le fichier entier en mémoire.
+"""
+import hashlib
+import os
+import tempfile
+
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MediaTooLarge(ValueError):
+    """Fichier plus gros que la taille maximale autorisée"""
+
+
+class MediaStore:
+    """Fichiers multimédia `<dossier>/<sha256>.<extension>` sous `root`."""
+
+    def __init__(self, root, max_bytes=None):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+
+    def save(self, stream, subfolder, filename):
+        """Enregistre le contenu de `stream` (lu par blocs) sous son empreinte.
+
+        Retourne le chemin relatif `multimedia/<dossier>/<sha256>.<ext>`
+        enregistré dans les cartes. Si ce contenu est déjà stocké, le fichier
+        existant est réutilisé. Lève MediaTooLarge au-delà de `max_bytes`.
+        """
+        directory = os.path.join(self.root, subfolder)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if self.max_bytes is not None and size > self.max_bytes:
+                        raise MediaTooLarge(f"Fichier trop volumineux (maximum {self.max_bytes} octets)")
+                    digest.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+            name = digest.hexdigest() + _extension(filename)
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                # Contenu déjà stocké : le doublon est abandonné
+                os.unlink(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return '/'.join(('multimedia', subfolder, name))
+
+
+def _extension(filename):
+    filename = secure_filename(filename or '')
+    return '.' + filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
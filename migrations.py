@@ -0,0 +1,71 @@
+"""
+Migrations du répertoire de données.
+
+La version des données est enregistrée dans `schema_version.json` à la racine
+du répertoire de données. Chaque migration n'est exécutée qu'une fois, sous
+un verrou de fichier partagé par tous les workers : le démarrage d'un
+processus ne fait que lire ce petit fichier.
+"""
+import pathlib
+
+from deck_codec import PRETTY, encode, load_file
+from deck_lock import DeckLocks, atomic_write
+
+SCHEMA_FILE = 'schema_version.json'
+
+
+def add_deck_names(store):
+    """Ajoute la clé 'name' (l'ID du deck) aux decks qui ne l'ont pas.
+
+    Chaque deck est modifié sous son verrou (`update_deck`) : une révision
+    enregistrée en même temps par un autre worker n'est pas perdue.
+    """
+    for summary in store.list_summaries():
+        deck_id = summary['id']
+        try:
+            if store.update_deck(deck_id, _default_name(deck_id)):
+                print(f"Updated deck: {deck_id}")
+        except Exception as e:
+            print(f"Error updating deck {deck_id}: {e}")
+
+
+def _default_name(deck_id):
+    def update(deck):
+        if 'name' in deck:
+            return False
+        deck['name'] = deck_id
+        return True
+    return update
+
+
+# (version, migration), dans l'ordre d'application
+MIGRATIONS = [
+    (1, add_deck_names),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(data_dir):
+    """Version des données ; 0 pour un répertoire jamais migré"""
+    try:
+        return load_file(pathlib.Path(data_dir) / SCHEMA_FILE).get('version', 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def pending_migrations(data_dir):
+    current = schema_version(data_dir)
+    return [(version, migration) for version, migration in MIGRATIONS if version > current]
+
+
+def run_migrations(store, data_dir):
+    """Applique les migrations en attente, retourne le nom de celles appliquées"""
+    data_dir = pathlib.Path(data_dir)
+    applied = []
+    with DeckLocks(data_dir / 'locks').lock('.migrations'):
+        # Relu sous le verrou : un autre worker a pu migrer entre-temps
+        for version, migration in pending_migrations(data_dir):
+            migration(store)
+            atomic_write(data_dir / SCHEMA_FILE, encode({'version': version}, PRETTY))
+            applied.append(migration.__name__)
+    return applied
@@ -0,0 +1,149 @@
+"""
+Recalcul groupé des échéances après un changement des intervalles de difficulté.
+
+Les champs utiles des cartes (date de dernière révision, dernière qualité,
+échéance) sont chargés en colonnes, les nouvelles échéances calculées sur la
+colonne entière, et seules les cartes dont l'échéance change sont réécrites.
+Le calcul est vectorisé avec NumPy s'il est installé, en Python pur sinon.
+"""
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from scheduler import LEVELS
+
+FIELDS = ('date_last_reviewed', 'last_quality', 'next_review')
+
+DAY = 24 * 3600
+
+
+class Columns:
+    """Colonnes (ID, dernière révision, qualité, échéance) des cartes d'un deck.
+
+    Une carte jamais révisée (date absente ou non numérique) a une dernière
+    révision de -1 et une qualité de 0 : son échéance n'est pas recalculée.
+    """
+
+    __slots__ = ('ids', 'reviewed', 'quality', 'next_review')
+
+    def __init__(self, cards):
+        self.ids = []
+        reviewed, quality, next_review = [], [], []
+        for card in cards:
+            self.ids.append(str(card.get('id')))
+            last = card.get('date_last_reviewed')
+            grade = card.get('last_quality')
+            if _is_number(last) and _is_number(grade):
+                reviewed.append(float(last))
+                quality.append(int(grade))
+            else:
+                reviewed.append(-1.0)
+                quality.append(0)
+            due = card.get('next_review')
+            next_review.append(float(due) if _is_number(due) else 0.0)
+        if np is not None:
+            self.reviewed = np.array(reviewed, dtype=np.float64)
+            self.quality = np.array(quality, dtype=np.int64)
+            self.next_review = np.array(next_review, dtype=np.float64)
+        else:
+            self.reviewed, self.quality, self.next_review = reviewed, quality, next_review
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _intervals(levels):
+    """Intervalle en secondes de chaque qualité (index 0 : non révisée)"""
+    return [0.0] + [float(levels[level]) * 60 for level in LEVELS]
+
+
+def recompute(columns, levels):
+    """Nouvelles échéances : dernière révision + intervalle du niveau de la dernière qualité.
+
+    Retourne la colonne des échéances (inchangées pour les cartes non révisées).
+    """
+    intervals = _intervals(levels)
+    if np is not None:
+        quality = columns.quality
+        valid = (quality >= 1) & (quality <= len(LEVELS)) & (columns.reviewed >= 0)
+        offsets = np.asarray(intervals)[np.where(valid, quality, 0)]
+        return np.where(valid, columns.reviewed + offsets, columns.next_review)
+    due = []
+    for last, grade, current in zip(columns.reviewed, columns.quality, columns.next_review):
+        valid = 1 <= grade <= len(LEVELS) and last >= 0
+        due.append(last + intervals[grade] if valid else current)
+    return due
+
+
+def changed_dues(columns, due):
+    """{ID de carte: nouvelle échéance} des cartes dont l'échéance change"""
+    if np is not None:
+        positions = np.flatnonzero(due != columns.next_review).tolist()
+        values = due[positions].tolist()
+    else:
+        positions = [i for i, (new, old) in enumerate(zip(due, columns.next_review)) if new != old]
+        values = [due[i] for i in positions]
+    return {columns.ids[i]: _timestamp(value) for i, value in zip(positions, values)}
+
+
+def reviews_of(columns, card_ids):
+    """{ID de carte: (dernière révision, qualité)} d'où vient l'échéance recalculée"""
+    wanted = set(card_ids)
+    return {card_id: (_timestamp(reviewed), int(quality))
+            for card_id, reviewed, quality in zip(columns.ids, columns.reviewed, columns.quality)
+            if card_id in wanted}
+
+
+def _timestamp(value):
+    return int(value) if float(value).is_integer() else value
+
+
+def histogram(due, now, days=30):
+    """Nombre de cartes dues par jour : [en retard ou aujourd'hui, demain, ..., au-delà]"""
+    if np is not None:
+        offsets = np.floor((np.asarray(due, dtype=np.float64) - now) / DAY)
+        return np.bincount(np.clip(offsets, 0, days).astype(np.int64), minlength=days + 1).tolist()
+    counts = [0] * (days + 1)
+    for value in due:
+        counts[min(max(math.floor((value - now) / DAY), 0), days)] += 1
+    return counts
+
+
+def reschedule(store, levels, deck_ids=None, dry_run=False, now=None, progress=None):
+    """Recalcule les échéances des cartes des decks demandés (tous par défaut).
+
+    Avec `dry_run`, rien n'est écrit. Les cartes sont lues hors du verrou des
+    decks : une carte révisée entre la lecture et l'écriture garde l'échéance
+    de sa révision et est comptée dans `skipped`.
+    `progress(fait, total, deck_id, modifiées)` est appelé après chaque deck.
+    Retourne le nombre de cartes lues et modifiées, et la charge de révision
+    par jour avant et après.
+    """
+    now = time.time() if now is None else now
+    if deck_ids is None:
+        deck_ids = [summary['id'] for summary in store.list_summaries()]
+    summary = {'decks': len(deck_ids), 'cards': 0, 'changed': 0, 'skipped': 0, 'dry_run': dry_run,
+               'before': histogram([], now), 'after': histogram([], now)}
+    for done, deck_id in enumerate(deck_ids, 1):
+        columns = Columns(store.iter_cards(deck_id, fields=FIELDS))
+        due = recompute(columns, levels)
+        changes = changed_dues(columns, due)
+        changed = len(changes)
+        if changes and not dry_run:
+            changed = store.set_due_dates(deck_id, changes, reviews_of(columns, changes))
+        summary['cards'] += len(columns)
+        summary['changed'] += changed
+        summary['skipped'] += len(changes) - changed
+        for key, values in (('before', columns.next_review), ('after', due)):
+            summary[key] = [total + count for total, count in zip(summary[key], histogram(values, now))]
+        if progress is not None:
+            progress(done, len(deck_ids), deck_id, changed)
+    return summary
@@ -0,0 +1,111 @@
+"""
+Journal des révisions (« Recall Storage » de SPECS.md).
+
+Chaque révision est ajoutée en fin de fichier `<deck_id>.jsonl` au lieu de
+réécrire le deck entier. Les lectures rejouent le journal sur le deck, et le
+journal est replié dans le fichier du deck (compaction) au-delà d'une taille
+seuil.
+"""
+import os
+
+from deck_codec import COMPACT, PRETTY, decode, encode
+
+# Champs d'une carte portés par un enregistrement du journal
+RECALL_FIELDS = ('date_last_reviewed', 'next_review', 'statistics', 'last_quality')
+
+
+class ReviewJournal:
+    """Journal append-only des révisions, un fichier JSON Lines par deck.
+
+    Les enregistrements portent l'état absolu des champs de révision de la
+    carte : rejouer deux fois le même journal donne le même résultat, ce qui
+    rend la compaction sûre même si elle est interrompue.
+    """
+
+    def __init__(self, recall_dir, compact_threshold=256 * 1024, codec=None):
+        self.recall_dir = str(recall_dir)
+        self.compact_threshold = compact_threshold
+        # Une ligne par enregistrement : le codec indenté n'est pas utilisable
+        self.codec = COMPACT if codec == PRETTY else codec
+
+    def path(self, deck_id):
+        return os.path.join(self.recall_dir, f"{deck_id}.jsonl")
+
+    def append(self, deck_id, card):
+        """Ajoute l'état de révision d'une carte au journal du deck"""
+        self.append_many(deck_id, [card])
+
+    def append_many(self, deck_id, cards):
+        """Ajoute l'état de révision de plusieurs cartes en une seule écriture"""
+        lines = []
+        for card in cards:
+            record = {'flashcard_id': card.get('id'), 'deck_name': deck_id}
+            for field in RECALL_FIELDS:
+                if field in card:
+                    record[field] = card[field]
+            lines.append(encode(record, self.codec) + b'\n')
+        with open(self.path(deck_id), 'a+b') as f:
+            # Dernière ligne tronquée par un arrêt brutal : elle est terminée
+            # pour ne pas corrompre le premier enregistrement ajouté
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    lines.insert(0, b'\n')
+            f.write(b''.join(lines))
+
+    def records(self, deck_id):
+        """Itère sur les enregistrements du journal d'un deck"""
+        try:
+            f = open(self.path(deck_id), 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield decode(line)
+                except ValueError:
+                    # Ligne tronquée par un arrêt brutal : on l'ignore
+                    continue
+
+    def latest(self, deck_id):
+        """Retourne le dernier enregistrement de chaque carte du journal"""
+        return {record.get('flashcard_id'): record for record in self.records(deck_id)}
+
+    def replay(self, deck_id, deck):
+        """Applique le journal sur les cartes du deck, retourne le nombre appliqué"""
+        latest = self.latest(deck_id)
+        if not latest:
+            return 0
+        applied = 0
+        for card in deck.get('flashcards', []):
+            record = latest.get(card.get('id'))
+            if record is not None:
+                apply_record(card, record)
+                applied += 1
+        return applied
+
+    def size(self, deck_id):
+        try:
+            return os.path.getsize(self.path(deck_id))
+        except OSError:
+            return 0
+
+    def needs_compaction(self, deck_id):
+        return self.size(deck_id) > self.compact_threshold
+
+    def clear(self, deck_id):
+        """Vide le journal une fois replié dans le fichier du deck"""
+        try:
+            os.remove(self.path(deck_id))
+        except FileNotFoundError:
+            pass
+
+
+def apply_record(card, record):
+    """Recopie les champs de révision d'un enregistrement sur une carte"""
+    for field in RECALL_FIELDS:
+        if field in record:
+            card[field] = record[field]
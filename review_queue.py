@@ -0,0 +1,47 @@
+"""
+File de révision commune à tous les decks.
+
+Chaque deck fournit ses cartes dues dans l'ordre (échéance, ID) ; les flux
+sont fusionnés avec `heapq.merge`, qui ne garde en mémoire que la tête de
+chaque flux. La fusion s'arrête dès que `limit` cartes ont été retenues : les
+decks ne sont lus que page par page, au fur et à mesure de la fusion.
+"""
+import heapq
+from itertools import islice
+
+from due_index import card_due
+
+
+def card_tags(card):
+    """Noms de tous les tags d'une carte, sous-tags compris"""
+    names = set()
+    stack = list(card.get('tags') or [])
+    while stack:
+        tag = stack.pop()
+        if isinstance(tag, str):
+            names.add(tag)
+        elif isinstance(tag, dict):
+            if tag.get('name'):
+                names.add(tag['name'])
+            stack.extend(tag.get('subtags') or [])
+    return names
+
+
+def _keyed(deck_id, cards):
+    for card in cards:
+        yield (card_due(card), deck_id, str(card.get('id'))), card
+
+
+def merge_due(streams, limit=None, tags=None):
+    """Fusionne des flux de cartes dues triés par (échéance, ID).
+
+    `streams` associe un ID de deck à un itérable de cartes. Seules les
+    cartes portant au moins un des `tags` sont gardées. Retourne des couples
+    (ID du deck, carte), par échéance croissante.
+    """
+    tags = set(tags) if tags else None
+    merged = heapq.merge(*(_keyed(deck_id, cards) for deck_id, cards in streams.items()),
+                         key=lambda item: item[0])
+    selected = ((key[1], card) for key, card in merged
+                if tags is None or not tags.isdisjoint(card_tags(card)))
+    return list(islice(selected, limit))
@@ -1,45 +1,77 @@
+from array import array
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+import heapq
 import json
 
+from flow_snapshot import FlowColumns, SnapshotFile, is_snapshot, to_datetime, to_timestamp
+from scheduler import INITIAL_EASE, next_state
+
 class RevisionTask:
     def __init__(self, name: str, dependencies: List[str] = None):
         self.name = name
         self.dependencies = dependencies or []
         self.completed = False
         self.next_revision = None
-        self.difficulty_factor = 2.5  # Facteur initial de difficulté
+        self.difficulty_factor = INITIAL_EASE  # Facteur initial de difficulté
         self.consecutive_correct = 0
+        # Flux propriétaire, prévenu de chaque révision
+        self._flow = None
 
     def mark_completed(self, quality: int):
         """
         Marque une tâche comme complétée et planifie la prochaine révision
         quality: Note de 0 à 5 sur la qualité de la réponse
         """
+        first = not self.completed
         self.completed = True
         
-        # Algorithme SM-2 modifié
-        if quality >= 3:
-            if self.consecutive_correct == 0:
-                interval = timedelta(days=1)
-            elif self.consecutive_correct == 1:
-                interval = timedelta(days=3)
-            else:
-                interval = timedelta(days=int(self.consecutive_correct * self.difficulty_factor))
-            
-            self.consecutive_correct += 1
-            self.difficulty_factor += 0.1
-        else:
-            self.consecutive_correct = 0
-            self.difficulty_factor = max(1.3, self.difficulty_factor - 0.2)
-            interval = timedelta(minutes=30)
+        # Algorithme SM-2 modifié, partagé avec la planification des cartes
+        self.difficulty_factor, self.consecutive_correct, interval = next_state(
+            self.difficulty_factor, self.consecutive_correct, quality)
 
-        self.next_revision = datetime.now() + interval
+        self.next_revision = datetime.now() + timedelta(seconds=interval)
+        if self._flow is not None:
+            self._flow._on_completed(self, first)
 
 class RevisionFlow:
+    """Flux de tâches de révision liées par des prérequis (graphe acyclique).
+
+    La disponibilité des tâches est tenue à jour au fil des ajouts et des
+    révisions : chaque tâche garde le nombre de ses prérequis non complétés,
+    et compléter une tâche ne touche que les tâches qui en dépendent. Les
+    tâches débloquées sont soit disponibles, soit dans un tas ordonné par
+    date de prochaine révision. Les tâches doivent être révisées via
+    `mark_completed`, qui prévient le flux.
+
+    Une session est un tas de tâches disponibles, ordonné par retard (le plus
+    en retard d'abord), facteur de facilité (les plus difficiles d'abord) puis
+    profondeur dans le graphe (les prérequis d'abord). Les tâches qui
+    deviennent disponibles pendant la session y sont insérées.
+    """
+
     def __init__(self):
         self.tasks: Dict[str, RevisionTask] = {}
+        # Tas de la session en cours : (priorité, nom)
         self.current_session = []
+        self.session_end = None
+        self._in_session = set()
+        # Arêtes inverses : tâche -> tâches qui en dépendent
+        self._dependents: Dict[str, List[str]] = {}
+        # Nombre de prérequis non complétés de chaque tâche
+        self._unmet: Dict[str, int] = {}
+        # Rang d'ajout, qui ordonne les tâches disponibles
+        self._rank: Dict[str, int] = {}
+        # Profondeur : longueur de la plus longue chaîne de prérequis
+        self._depth: Dict[str, int] = {}
+        # Tâches débloquées et à réviser dès maintenant
+        self._available = set()
+        # Tâches débloquées à réviser plus tard : (prochaine révision, rang, nom)
+        self._scheduled = []
+        # Rangs des tâches modifiées depuis le dernier enregistrement, et
+        # instantané de cet enregistrement
+        self._dirty = set()
+        self._snapshot = None
         
     def add_task(self, name: str, dependencies: List[str] = None):
         """Ajoute une nouvelle tâche au flux de révision"""
@@ -50,56 +82,174 @@ class RevisionFlow:
             if dep not in self.tasks:
                 raise ValueError(f"La dépendance {dep} n'existe pas")
                 
-        self.tasks[name] = RevisionTask(name, dependencies)
+        self._register(RevisionTask(name, dependencies))
+
+    def _register(self, task: RevisionTask):
+        name = task.name
+        self.tasks[name] = task
+        task._flow = self
+        self._rank[name] = len(self._rank)
+        self._dependents[name] = []
+        for dep in task.dependencies:
+            self._dependents[dep].append(name)
+        self._depth[name] = 1 + max((self._depth[dep] for dep in task.dependencies), default=-1)
+        self._unmet[name] = sum(not self.tasks[dep].completed for dep in task.dependencies)
+        if self._unmet[name] == 0:
+            self._unlock(task)
+
+    def _unlock(self, task: RevisionTask):
+        """Range une tâche débloquée parmi les disponibles ou les planifiées"""
+        now = datetime.now()
+        if task.next_revision is None or task.next_revision <= now:
+            self._available.add(task.name)
+            self._add_to_session(task.name, now)
+        else:
+            # Son éventuelle entrée dans la session devient périmée
+            self._available.discard(task.name)
+            self._in_session.discard(task.name)
+            heapq.heappush(self._scheduled, (task.next_revision, self._rank[task.name], task.name))
+
+    def _on_completed(self, task: RevisionTask, first: bool):
+        """Mise à jour après une révision : O(nombre de tâches dépendantes)"""
+        self._dirty.add(self._rank[task.name])
+        if self._unmet[task.name] == 0:
+            self._unlock(task)
+        if first:
+            for name in self._dependents[task.name]:
+                self._unmet[name] -= 1
+                if self._unmet[name] == 0:
+                    self._unlock(self.tasks[name])
+
+    def _release(self, now: datetime):
+        """Rend disponibles les tâches planifiées dont la date est passée"""
+        while self._scheduled and self._scheduled[0][0] <= now:
+            due, _, name = heapq.heappop(self._scheduled)
+            # Entrée périmée si la tâche a été révisée depuis
+            if self.tasks[name].next_revision == due:
+                self._available.add(name)
+                self._add_to_session(name, now)
+
+    def _priority(self, task: RevisionTask, now: datetime):
+        overdue = (now - task.next_revision).total_seconds() if task.next_revision else 0.0
+        return (-overdue, task.difficulty_factor, self._depth[task.name], self._rank[task.name])
+
+    def _add_to_session(self, name: str, now: datetime):
+        """Insère une tâche disponible dans la session en cours, s'il y en a une"""
+        if self.session_end is None or now > self.session_end or name in self._in_session:
+            return
+        self._in_session.add(name)
+        heapq.heappush(self.current_session, (self._priority(self.tasks[name], now), name))
         
     def get_available_tasks(self) -> List[RevisionTask]:
         """Retourne les tâches disponibles pour révision"""
-        now = datetime.now()
-        available = []
-        
-        for task in self.tasks.values():
-            if task.next_revision and task.next_revision > now:
-                continue
-                
-            if all(self.tasks[dep].completed for dep in task.dependencies):
-                available.append(task)
-                
-        return available
+        self._release(datetime.now())
+        return [self.tasks[name] for name in sorted(self._available, key=self._rank.__getitem__)]
         
     def start_session(self, duration: timedelta = timedelta(minutes=30)):
         """Démarre une session de révision"""
-        self.current_session = self.get_available_tasks()
-        self.session_end = datetime.now() + duration
+        now = datetime.now()
+        self.session_end = now + duration
+        self.current_session = []
+        self._in_session = set()
+        self._release(now)
+        for name in self._available - self._in_session:
+            self._in_session.add(name)
+            self.current_session.append((self._priority(self.tasks[name], now), name))
+        heapq.heapify(self.current_session)
         
     def get_next_task(self) -> Optional[RevisionTask]:
         """Retourne la prochaine tâche à réviser"""
-        if not self.current_session or datetime.now() > self.session_end:
+        now = datetime.now()
+        if self.session_end is None or now > self.session_end:
             return None
-            
-        return self.current_session.pop(0)
-        
-    def save_state(self, filename: str):
-        """Sauvegarde l'état du flux de révision"""
-        state = {
-            name: {
-                'completed': task.completed,
-                'next_revision': task.next_revision.isoformat() if task.next_revision else None,
-                'difficulty_factor': task.difficulty_factor,
-                'consecutive_correct': task.consecutive_correct,
-                'dependencies': task.dependencies
-            }
-            for name, task in self.tasks.items()
-        }
+        self._release(now)
+        while self.current_session:
+            _, name = heapq.heappop(self.current_session)
+            # Entrée périmée : tâche révisée entre-temps, ou déjà retournée
+            if name in self._in_session:
+                self._in_session.discard(name)
+                return self.tasks[name]
+        return None
         
-        with open(filename, 'w') as f:
-            json.dump(state, f)
+    def save_state(self, filename: str, full: bool = False):
+        """Sauvegarde l'état du flux de révision (voir flow_snapshot).
+
+        Seules les tâches ajoutées ou révisées depuis le dernier
+        enregistrement dans `filename` sont ajoutées à son journal ; `full`
+        force la réécriture de l'instantané complet, par exemple après une
+        modification directe des attributs d'une tâche.
+        """
+        if self._snapshot is None or self._snapshot.path != str(filename):
+            self._snapshot = SnapshotFile(filename)
+        tasks = list(self.tasks.values())
+
+        def task_state(rank):
+            task = tasks[rank]
+            return (task.name, [self._rank[dep] for dep in task.dependencies], task.completed,
+                    to_timestamp(task.next_revision), task.difficulty_factor, task.consecutive_correct)
+
+        self._snapshot.save(len(tasks), lambda: self._columns(tasks), task_state, self._dirty, full)
+        self._dirty = set()
+
+    def _columns(self, tasks):
+        offsets = array('q', [0])
+        targets = array('q')
+        for task in tasks:
+            targets.extend(self._rank[dep] for dep in task.dependencies)
+            offsets.append(len(targets))
+        return FlowColumns(
+            [task.name for task in tasks], offsets, targets,
+            bytes(task.completed for task in tasks),
+            array('d', (to_timestamp(task.next_revision) for task in tasks)),
+            array('d', (task.difficulty_factor for task in tasks)),
+            array('q', (task.consecutive_correct for task in tasks)))
             
     def load_state(self, filename: str):
-        """Charge l'état du flux de révision"""
+        """Charge l'état du flux de révision (instantané binaire ou ancien format JSON)"""
+        self.tasks.clear()
+        if is_snapshot(filename):
+            self._load_snapshot(filename)
+        else:
+            self._load_json(filename)
+            self._snapshot = None
+        self._rebuild()
+        self._dirty = set()
+
+    def _load_snapshot(self, filename):
+        snapshot_file = SnapshotFile(filename)
+        with snapshot_file.load() as snapshot:
+            names = snapshot.names
+            offsets = snapshot.column('dep_offsets')
+            targets = snapshot.column('dep_targets')
+            columns = zip(names, snapshot.completed, snapshot.column('next_revision'),
+                          snapshot.column('ease'), snapshot.column('streak'))
+            for rank, (name, completed, next_revision, ease, streak) in enumerate(columns):
+                task = RevisionTask(name, [names[dep] for dep in targets[offsets[rank]:offsets[rank + 1]]])
+                task.completed = bool(completed)
+                task.next_revision = to_datetime(next_revision)
+                task.difficulty_factor = ease
+                task.consecutive_correct = streak
+                self.tasks[name] = task
+            records = snapshot.records
+        tasks = list(self.tasks.values())
+        for record in records:
+            if record[0] == 'A':
+                task = RevisionTask(record[2], [tasks[dep].name for dep in record[3]])
+                self.tasks[task.name] = task
+                tasks.append(task)
+            else:
+                _, rank, completed, next_revision, ease, streak = record
+                task = tasks[rank]
+                task.completed = bool(completed)
+                task.next_revision = to_datetime(next_revision)
+                task.difficulty_factor = ease
+                task.consecutive_correct = streak
+        self._snapshot = snapshot_file
+
+    def _load_json(self, filename):
         with open(filename, 'r') as f:
             state = json.load(f)
             
-        self.tasks.clear()
         for name, data in state.items():
             task = RevisionTask(name, data['dependencies'])
             task.completed = data['completed']
@@ -108,6 +258,27 @@ class RevisionFlow:
             task.consecutive_correct = data['consecutive_correct']
             self.tasks[name] = task
 
+    def _rebuild(self):
+        """Recalcule le graphe et les compteurs de toutes les tâches : O(tâches + dépendances)"""
+        self._dependents = {name: [] for name in self.tasks}
+        self._rank = {name: rank for rank, name in enumerate(self.tasks)}
+        self._depth = {}
+        self._available = set()
+        self._scheduled = []
+        self.current_session = []
+        self._in_session = set()
+        # L'ordre des tâches est topologique : les prérequis sont ajoutés avant
+        for name, task in self.tasks.items():
+            task._flow = self
+            for dep in task.dependencies:
+                self._dependents[dep].append(name)
+            self._depth[name] = 1 + max((self._depth[dep] for dep in task.dependencies), default=-1)
+        self._unmet = {}
+        for name, task in self.tasks.items():
+            self._unmet[name] = sum(not self.tasks[dep].completed for dep in task.dependencies)
+            if self._unmet[name] == 0:
+                self._unlock(task)
+
 # Exemple d'utilisation
 if __name__ == '__main__':
     flow = RevisionFlow()
@@ -128,4 +299,4 @@ if __name__ == '__main__':
         task.mark_completed(quality)
         
     # Sauvegarde de l'état
-    flow.save_state("revision_state.json")
+    flow.save_state("revision_state.bin")
@@ -0,0 +1,144 @@
+"""
+Planification des révisions côté serveur.
+
+L'algorithme SM-2 modifié de `revision_flow.RevisionTask` est implémenté ici
+une seule fois : le flux de révision et les routes de révision de l'application
+l'utilisent tous deux. L'état de chaque carte (facteur de facilité, nombre de
+bonnes réponses consécutives) est rangé dans ses statistiques, qui font partie
+des champs de révision déjà persistés par les stockages.
+"""
+from array import array
+
+# Niveau de difficulté de chaque qualité (1 à 5), comme les boutons de révision
+LEVELS = ('very_hard', 'hard', 'medium', 'easy', 'very_easy')
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+DAY = 24 * 3600
+# Intervalle après une mauvaise réponse
+RETRY_INTERVAL = 30 * 60
+
+# Politiques d'intervalle : SM-2, ou intervalles fixes des paramètres de difficulté
+POLICIES = ('sm2', 'levels')
+
+
+class CardState:
+    """État de planification d'une carte"""
+
+    __slots__ = ('ease', 'streak')
+
+    def __init__(self, ease=INITIAL_EASE, streak=0):
+        self.ease = ease
+        self.streak = streak
+
+    @classmethod
+    def of(cls, card):
+        statistics = card.get('statistics') or {}
+        return cls(statistics.get('ease_factor', INITIAL_EASE), statistics.get('consecutive_correct', 0))
+
+
+def next_state(ease, streak, quality):
+    """Applique une réponse de qualité `quality` (0 à 5) à l'état (ease, streak).
+
+    Retourne (ease, streak, intervalle en secondes) : 1 jour après la première
+    bonne réponse, 3 jours après la deuxième, puis `streak * ease` jours
+    (arrondi au jour inférieur) ; 30 minutes et un facteur diminué après une
+    mauvaise réponse (qualité inférieure à 3).
+    """
+    if quality >= 3:
+        if streak == 0:
+            interval = DAY
+        elif streak == 1:
+            interval = 3 * DAY
+        else:
+            interval = int(streak * ease) * DAY
+        return ease + 0.1, streak + 1, interval
+    return max(MIN_EASE, ease - 0.2), 0, RETRY_INTERVAL
+
+
+def evaluate(eases, streaks, qualities):
+    """Évaluation groupée de `next_state` sur des colonnes.
+
+    `eases` (array 'd') et `streaks` (array 'l') sont mis à jour en place.
+    Retourne les intervalles en secondes (array 'q').
+    """
+    intervals = array('q', bytes(8 * len(qualities)))
+    for i, quality in enumerate(qualities):
+        eases[i], streaks[i], intervals[i] = next_state(eases[i], streaks[i], quality)
+    return intervals
+
+
+def parse_quality(value, minimum=0):
+    """Qualité d'une réponse (entier de `minimum` à 5), ValueError sinon"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value) \
+            or not minimum <= value <= 5:
+        raise ValueError(f'Qualité invalide (entier de {minimum} à 5 attendu)')
+    return int(value)
+
+
+class Scheduler:
+    """Calcule l'échéance des cartes révisées.
+
+    Avec la politique 'sm2', l'intervalle vient de l'algorithme SM-2 ; avec
+    'levels', c'est l'intervalle en minutes du niveau de difficulté de la
+    qualité (`levels`, les paramètres de difficulté), la qualité 1
+    correspondant à 'very_hard' et 5 à 'very_easy' : la qualité 0, sans
+    niveau, y est refusée. L'état SM-2 est tenu à jour dans les deux cas.
+    """
+
+    def __init__(self, policy='sm2', levels=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique de planification inconnue: {policy}")
+        if policy == 'levels' and levels is None:
+            raise ValueError("La politique 'levels' demande les paramètres de difficulté")
+        self.policy = policy
+        self.levels = levels
+        self.min_quality = 1 if policy == 'levels' else 0
+
+    def parse_quality(self, value):
+        """Qualité d'une réponse acceptée par la politique, ValueError sinon"""
+        return parse_quality(value, self.min_quality)
+
+    def review(self, card, quality, reviewed_at):
+        """Met à jour une carte après une réponse de qualité `quality`"""
+        self.review_many([(card, quality, reviewed_at)])
+        return card
+
+    def review_many(self, reviews):
+        """Met à jour un lot de cartes : [(carte, qualité, date de révision), ...].
+
+        Une carte présente plusieurs fois dans le lot voit ses réponses
+        appliquées dans l'ordre.
+        """
+        waves = []
+        seen = {}
+        for review in reviews:
+            if review[1] < self.min_quality:
+                raise ValueError(f'Qualité invalide (entier de {self.min_quality} à 5 attendu)')
+            wave = seen.get(id(review[0]), 0)
+            seen[id(review[0])] = wave + 1
+            if wave == len(waves):
+                waves.append([])
+            waves[wave].append(review)
+        for wave in waves:
+            self._apply(wave)
+
+    def _apply(self, reviews):
+        states = [CardState.of(card) for card, _, _ in reviews]
+        eases = array('d', (state.ease for state in states))
+        streaks = array('l', (state.streak for state in states))
+        qualities = [quality for _, quality, _ in reviews]
+        intervals = evaluate(eases, streaks, qualities)
+        for i, (card, quality, reviewed_at) in enumerate(reviews):
+            if self.policy == 'levels':
+                interval = self.levels[LEVELS[quality - 1]] * 60
+            else:
+                interval = intervals[i]
+            statistics = card.setdefault('statistics', {})
+            key = 'successes' if quality >= 3 else 'failures'
+            statistics[key] = statistics.get(key, 0) + 1
+            statistics['ease_factor'] = round(eases[i], 2)
+            statistics['consecutive_correct'] = streaks[i]
+            card['date_last_reviewed'] = reviewed_at
+            card['next_review'] = reviewed_at + interval
+            card['last_quality'] = quality
@@ -12,12 +12,14 @@ setup(
         "pytest-flask==1.3.0",
         "fastapi==0.104.1",
         "uvicorn==0.24.0",
+        "a2wsgi==1.10.10",
         "python-multipart==0.0.6",
         "jinja2==3.1.2",
         "aiofiles==23.2.1",
         "python-jose[cryptography]==3.3.0",
         "passlib[bcrypt]==1.7.4",
-        "markdown==3.5.1"
+        "markdown==3.5.1",
+        "numpy==1.24.4"
     ],
     python_requires=">=3.8",
     package_data={
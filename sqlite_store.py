@@ -0,0 +1,352 @@
+"""
+Backend SQLite du stockage des decks.
+
+Les cartes sont des lignes indexées par (deck, next_review) : les requêtes de
+cartes dues et la mise à jour d'une carte après révision sont des opérations
+sur quelques lignes au lieu d'une réécriture du deck.
+"""
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+
+from card_listing import finish_page
+from card_stream import project
+from deck_shards import read_deck
+from deck_store import DeckStore, apply_found
+from review_journal import ReviewJournal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id TEXT PRIMARY KEY,
+    deck_name TEXT,
+    name TEXT,
+    date_created,
+    last_modified REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_decks_name ON decks(name);
+
+CREATE TABLE IF NOT EXISTS cards (
+    deck_id TEXT NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    card_id TEXT NOT NULL,
+    next_review REAL NOT NULL DEFAULT 0,
+    date_last_reviewed,
+    last_quality INTEGER,
+    statistics TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (deck_id, card_id)
+);
+CREATE INDEX IF NOT EXISTS idx_cards_due ON cards(deck_id, next_review);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    deck_id TEXT NOT NULL REFERENCES decks(id) ON DELETE CASCADE,
+    card_id TEXT NOT NULL,
+    reviewed_at,
+    quality INTEGER,
+    next_review REAL
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_due ON reviews(deck_id, next_review);
+CREATE INDEX IF NOT EXISTS idx_reviews_card ON reviews(deck_id, card_id);
+"""
+
+# Champs de révision stockés dans des colonnes dédiées
+REVIEW_COLUMNS = ('next_review', 'date_last_reviewed', 'last_quality', 'statistics')
+
+
+def _card_to_row(deck_id, card):
+    data = {k: v for k, v in card.items() if k not in REVIEW_COLUMNS}
+    statistics = card.get('statistics')
+    return (
+        deck_id,
+        str(card.get('id')),
+        card.get('next_review') or 0,
+        card.get('date_last_reviewed'),
+        card.get('last_quality'),
+        json.dumps(statistics, ensure_ascii=False) if statistics is not None else None,
+        json.dumps(data, ensure_ascii=False)
+    )
+
+
+def _row_to_card(row):
+    card = json.loads(row['data'])
+    if row['next_review']:
+        card['next_review'] = row['next_review']
+    if row['date_last_reviewed'] is not None:
+        card['date_last_reviewed'] = row['date_last_reviewed']
+    if row['last_quality'] is not None:
+        card['last_quality'] = row['last_quality']
+    if row['statistics'] is not None:
+        card['statistics'] = json.loads(row['statistics'])
+    return card
+
+
+class SqliteDeckStore(DeckStore):
+    """Stockage des decks dans une base SQLite (une connexion par thread)."""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def deck_exists(self, deck_id):
+        row = self._connect().execute('SELECT 1 FROM decks WHERE id = ?', (deck_id,)).fetchone()
+        return row is not None
+
+    def deck_version(self, deck_id):
+        row = self._connect().execute('SELECT last_modified FROM decks WHERE id = ?', (deck_id,)).fetchone()
+        if row is None:
+            return None
+        last_modified = row['last_modified'] or 0.0
+        return float(last_modified).hex(), last_modified
+
+    def get_deck(self, deck_id):
+        conn = self._connect()
+        row = conn.execute('SELECT data FROM decks WHERE id = ?', (deck_id,)).fetchone()
+        if row is None:
+            return None
+        deck = json.loads(row['data'])
+        deck['id'] = deck_id
+        deck['flashcards'] = [
+            _row_to_card(card_row) for card_row in conn.execute(
+                'SELECT * FROM cards WHERE deck_id = ? ORDER BY rowid', (deck_id,))
+        ]
+        return deck
+
+    def get_card(self, deck_id, card_id):
+        row = self._connect().execute(
+            'SELECT * FROM cards WHERE deck_id = ? AND card_id = ?',
+            (deck_id, str(card_id))).fetchone()
+        return _row_to_card(row) if row is not None else None
+
+    def iter_cards(self, deck_id, fields=None):
+        # Le curseur est parcouru ligne à ligne, sans tout charger
+        rows = self._connect().execute(
+            'SELECT * FROM cards WHERE deck_id = ? ORDER BY rowid', (deck_id,))
+        for row in rows:
+            yield project(_row_to_card(row), fields)
+
+    def list_summaries(self):
+        now = time.time()
+        rows = self._connect().execute(
+            """SELECT d.id, d.deck_name, d.name, d.date_created, d.last_modified,
+                      COUNT(c.card_id) AS card_count,
+                      COALESCE(SUM(c.next_review <= ?), 0) AS due_now,
+                      MIN(CASE WHEN c.next_review > ? THEN c.next_review END) AS next_due
+               FROM decks d LEFT JOIN cards c ON c.deck_id = d.id
+               GROUP BY d.id ORDER BY d.id""", (now, now))
+        return [dict(row) for row in rows]
+
+    def has_deck_name(self, name):
+        row = self._connect().execute(
+            'SELECT 1 FROM decks WHERE id = ? OR name = ?', (name, name)).fetchone()
+        return row is not None
+
+    def count_decks(self):
+        return self._connect().execute('SELECT COUNT(*) FROM decks').fetchone()[0]
+
+    def save_deck(self, deck_id, deck):
+        data = {k: v for k, v in deck.items() if k not in ('id', 'flashcards')}
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cards WHERE deck_id = ?', (deck_id,))
+            conn.execute(
+                """INSERT INTO decks (id, deck_name, name, date_created, last_modified, data)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET deck_name = excluded.deck_name,
+                       name = excluded.name, date_created = excluded.date_created,
+                       last_modified = excluded.last_modified, data = excluded.data""",
+                (deck_id, deck.get('deck_name', deck_id), deck.get('name', deck_id),
+                 deck.get('date_created'), time.time(), json.dumps(data, ensure_ascii=False)))
+            conn.executemany('INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             [_card_to_row(deck_id, card) for card in deck.get('flashcards', [])])
+
+    def update_deck(self, deck_id, update):
+        conn = self._connect()
+        # Lecture et écriture dans la même transaction, sous le verrou d'écriture
+        conn.execute('BEGIN IMMEDIATE')
+        with conn:
+            row = conn.execute('SELECT data FROM decks WHERE id = ?', (deck_id,)).fetchone()
+            if row is None:
+                return None
+            deck = json.loads(row['data'])
+            updated = update(deck)
+            if updated:
+                conn.execute(
+                    """UPDATE decks SET deck_name = ?, name = ?, date_created = ?,
+                           last_modified = ?, data = ? WHERE id = ?""",
+                    (deck.get('deck_name', deck_id), deck.get('name', deck_id), deck.get('date_created'),
+                     time.time(), json.dumps(deck, ensure_ascii=False), deck_id))
+        return updated
+
+    def delete_deck(self, deck_id):
+        with self._connect() as conn:
+            cursor = conn.execute('DELETE FROM decks WHERE id = ?', (deck_id,))
+        return cursor.rowcount > 0
+
+    def _touch(self, conn, deck_id):
+        conn.execute('UPDATE decks SET last_modified = ? WHERE id = ?', (time.time(), deck_id))
+
+    def add_card(self, deck_id, card):
+        if not self.deck_exists(deck_id):
+            return False
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?, ?)', _card_to_row(deck_id, card))
+            self._touch(conn, deck_id)
+        return True
+
+    def delete_card(self, deck_id, card_id):
+        if not self.deck_exists(deck_id):
+            return None
+        with self._connect() as conn:
+            cursor = conn.execute('DELETE FROM cards WHERE deck_id = ? AND card_id = ?',
+                                  (deck_id, str(card_id)))
+            if cursor.rowcount == 0:
+                return False
+            self._touch(conn, deck_id)
+        return True
+
+    def get_cards(self, deck_id, card_ids):
+        card_ids = [str(card_id) for card_id in card_ids]
+        cards = {}
+        conn = self._connect()
+        # Requêtes par tranches pour rester sous la limite de paramètres SQLite
+        for start in range(0, len(card_ids), 500):
+            chunk = card_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in conn.execute(
+                    f'SELECT * FROM cards WHERE deck_id = ? AND card_id IN ({placeholders})',
+                    [deck_id] + chunk):
+                cards[row['card_id']] = _row_to_card(row)
+        return cards
+
+    def _write_review(self, conn, deck_id, card):
+        row = _card_to_row(deck_id, card)
+        cursor = conn.execute(
+            """UPDATE cards SET next_review = ?, date_last_reviewed = ?,
+                   last_quality = ?, statistics = ?
+               WHERE deck_id = ? AND card_id = ?""",
+            (row[2], row[3], row[4], row[5], deck_id, row[1]))
+        if cursor.rowcount == 0:
+            return False
+        conn.execute(
+            """INSERT INTO reviews (deck_id, card_id, reviewed_at, quality, next_review)
+               VALUES (?, ?, ?, ?, ?)""",
+            (deck_id, row[1], row[3], row[4], row[2]))
+        return True
+
+    def record_reviews(self, deck_id, cards):
+        with self._connect() as conn:
+            results = [self._write_review(conn, deck_id, card) for card in cards]
+            if any(results):
+                self._touch(conn, deck_id)
+        return results
+
+    def apply_reviews(self, deck_id, reviews, apply_review, batch=False):
+        conn = self._connect()
+        # BEGIN IMMEDIATE prend le verrou d'écriture avant la lecture des
+        # cartes : deux workers ne peuvent pas appliquer une révision sur le
+        # même état initial
+        conn.execute('BEGIN IMMEDIATE')
+        with conn:
+            cards = self.get_cards(deck_id, [review.get('card_id') for review in reviews])
+            results = [cards.get(str(review.get('card_id'))) for review in reviews]
+            found = [(card, review) for card, review in zip(results, reviews) if card is not None]
+            apply_found(found, apply_review, batch)
+            for card, _ in found:
+                self._write_review(conn, deck_id, card)
+            if found:
+                self._touch(conn, deck_id)
+        return results
+
+    def set_due_dates(self, deck_id, due_dates, expected=None):
+        expected = expected or {}
+        free = [(next_review, deck_id, str(card_id)) for card_id, next_review in due_dates.items()
+                if card_id not in expected]
+        # Une carte révisée depuis le calcul ne correspond plus à la condition
+        guarded = [(next_review, deck_id, str(card_id), *expected[card_id])
+                   for card_id, next_review in due_dates.items() if card_id in expected]
+        with self._connect() as conn:
+            updated = conn.executemany(
+                'UPDATE cards SET next_review = ? WHERE deck_id = ? AND card_id = ?', free).rowcount
+            updated += conn.executemany(
+                """UPDATE cards SET next_review = ? WHERE deck_id = ? AND card_id = ?
+                   AND date_last_reviewed = ? AND last_quality = ?""", guarded).rowcount
+            if updated:
+                self._touch(conn, deck_id)
+        return updated
+
+    def _page(self, deck_id, sort, after, limit, due, now, read_fields):
+        if sort != 'next_review':
+            return super()._page(deck_id, sort, after, limit, due, now, read_fields)
+        # Pagination par clé sur l'index (deck_id, next_review)
+        conditions = ['deck_id = ?']
+        params = [deck_id]
+        if after is not None:
+            conditions.append('(next_review > ? OR (next_review = ? AND card_id > ?))')
+            params += [after[0], after[0], after[1]]
+        if due == 'now':
+            conditions.append('next_review <= ?')
+            params.append(now)
+        elif due == 'later':
+            conditions.append('next_review > ?')
+            params.append(now)
+        rows = self._connect().execute(
+            f"SELECT * FROM cards WHERE {' AND '.join(conditions)} "
+            "ORDER BY next_review, card_id LIMIT ?", params + [limit + 1])
+        return finish_page([((row['next_review'], row['card_id']), _row_to_card(row)) for row in rows], limit)
+
+    def due_cards(self, deck_id, now, limit=None):
+        rows = self._connect().execute(
+            """SELECT * FROM cards WHERE deck_id = ? AND next_review <= ?
+               ORDER BY next_review LIMIT ?""",
+            (deck_id, now, -1 if limit is None else limit))
+        return [_row_to_card(row) for row in rows]
+
+    def upcoming_cards(self, deck_id, now, limit=None):
+        rows = self._connect().execute(
+            """SELECT * FROM cards WHERE deck_id = ? AND next_review > ?
+               ORDER BY next_review LIMIT ?""",
+            (deck_id, now, -1 if limit is None else limit))
+        return [_row_to_card(row) for row in rows]
+
+    def count_due(self, deck_id, before):
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM cards WHERE deck_id = ? AND next_review <= ?',
+            (deck_id, before)).fetchone()[0]
+
+def migrate_json_to_sqlite(decks_dir, db_path, recall_dir=None):
+    """Convertit un répertoire de decks JSON en base SQLite.
+
+    Le journal des révisions de chaque deck est rejoué avant la conversion.
+    Retourne la liste des IDs de decks migrés.
+    """
+    decks_dir = pathlib.Path(decks_dir)
+    recall_dir = pathlib.Path(recall_dir) if recall_dir else decks_dir.parent / 'recall'
+    journal = ReviewJournal(recall_dir)
+    store = SqliteDeckStore(db_path)
+
+    migrated = []
+    for deck_file in sorted(decks_dir.glob('*.json')):
+        try:
+            deck, _ = read_deck(deck_file)
+        except Exception as e:
+            print(f"Error reading deck {deck_file}: {e}")
+            continue
+        deck_id = deck_file.stem
+        journal.replay(deck_id, deck)
+        store.save_deck(deck_id, deck)
+        migrated.append(deck_id)
+    return migrated
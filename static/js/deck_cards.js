@@ -0,0 +1,161 @@
+// Chargement des cartes d'un deck page par page via /api/decks/<id>/cards.
+// La page du deck ne contient que la première page de chaque liste : la
+// suite est demandée quand le bas de la liste devient visible.
+
+class CardPager {
+    constructor(container, params, renderCard, root = null) {
+        this.container = container;
+        this.deckId = container.dataset.deckId;
+        this.params = params;
+        this.renderCard = renderCard;
+        // Curseur de la page suivante ; null quand tout est chargé
+        this.cursor = container.dataset.cursor === undefined ? '' : (container.dataset.cursor || null);
+        this.loading = false;
+
+        this.sentinel = document.createElement(container.tagName === 'TBODY' ? 'tr' : 'div');
+        this.sentinel.className = 'card-pages-sentinel';
+        container.appendChild(this.sentinel);
+        this.observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                this.loadMore();
+            }
+        }, { root: root, rootMargin: '200px' });
+        this.observer.observe(this.sentinel);
+        if (this.cursor === null) {
+            this.finish();
+        }
+    }
+
+    async loadMore() {
+        if (this.loading || this.cursor === null) {
+            return;
+        }
+        this.loading = true;
+        try {
+            const query = new URLSearchParams(this.params);
+            if (this.cursor) {
+                query.set('cursor', this.cursor);
+            }
+            const response = await fetch(`/api/decks/${encodeURIComponent(this.deckId)}/cards?${query}`);
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const page = await response.json();
+            for (const card of page.cards) {
+                this.container.insertBefore(this.renderCard(card), this.sentinel);
+            }
+            this.cursor = page.next_cursor;
+            if (this.cursor === null) {
+                this.finish();
+            }
+        } catch (error) {
+            console.error('Erreur lors du chargement des cartes:', error);
+        } finally {
+            this.loading = false;
+        }
+    }
+
+    finish() {
+        this.observer.disconnect();
+        this.sentinel.remove();
+    }
+}
+
+function formatNextReview(timestamp) {
+    const date = new Date(timestamp * 1000);
+    const pad = value => String(value).padStart(2, '0');
+    return `${pad(date.getDate())}/${pad(date.getMonth() + 1)}/${date.getFullYear()} ` +
+           `${pad(date.getHours())}:${pad(date.getMinutes())}`;
+}
+
+function renderTags(tags) {
+    const container = document.createElement('div');
+    container.className = 'tags-container';
+    for (const tag of tags || []) {
+        const item = document.createElement('div');
+        item.className = 'tag-item';
+        const button = document.createElement('button');
+        button.className = 'btn btn-sm btn-outline-secondary toggle-tag';
+        button.textContent = typeof tag === 'string' ? tag : tag.name;
+        item.appendChild(button);
+        if (tag.subtags && tag.subtags.length) {
+            const subtags = renderTags(tag.subtags);
+            subtags.className = 'subtags-container';
+            item.appendChild(subtags);
+        }
+        container.appendChild(item);
+    }
+    return container;
+}
+
+function renderDueCard(card) {
+    const element = document.createElement('div');
+    element.className = 'card mb-3';
+    const body = document.createElement('div');
+    body.className = 'card-body';
+
+    const title = document.createElement('h5');
+    title.className = 'card-title';
+    title.textContent = card.question || '';
+    body.appendChild(title);
+
+    const answer = document.createElement('p');
+    answer.className = 'card-text';
+    answer.textContent = card.answer || '';
+    body.appendChild(answer);
+
+    if (card.next_review && card.next_review * 1000 > Date.now()) {
+        const nextReview = document.createElement('p');
+        nextReview.className = 'text-muted';
+        nextReview.textContent = `Prochaine révision : ${formatNextReview(card.next_review)}`;
+        body.appendChild(nextReview);
+    }
+
+    body.appendChild(renderTags(card.tags));
+    element.appendChild(body);
+    return element;
+}
+
+function renderCardRow(card) {
+    const row = document.createElement('tr');
+
+    const typeCell = document.createElement('td');
+    const badge = document.createElement('span');
+    badge.className = 'badge bg-secondary';
+    badge.textContent = card.type || '';
+    typeCell.appendChild(badge);
+    row.appendChild(typeCell);
+
+    const questionCell = document.createElement('td');
+    questionCell.textContent = card.question || '';
+    row.appendChild(questionCell);
+
+    const actionsCell = document.createElement('td');
+    const deleteButton = document.createElement('button');
+    deleteButton.type = 'button';
+    deleteButton.className = 'btn btn-sm btn-danger';
+    deleteButton.innerHTML = '<i class="fas fa-trash"></i>';
+    deleteButton.addEventListener('click', () => deleteCard(card.id));
+    actionsCell.appendChild(deleteButton);
+    row.appendChild(actionsCell);
+    return row;
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const fields = 'question,answer,tags,next_review';
+    document.querySelectorAll('.card-pages').forEach(container => {
+        new CardPager(container, { due: container.dataset.due, fields: fields, limit: 50 }, renderDueCard);
+    });
+
+    // Liste complète par date de création, chargée à la première ouverture
+    const modal = document.getElementById('cardsModal');
+    const allCards = document.getElementById('allCards');
+    if (modal && allCards) {
+        modal.addEventListener('shown.bs.modal', () => {
+            if (!allCards.pager) {
+                allCards.pager = new CardPager(allCards, { sort: 'created', fields: 'type,question', limit: 50 },
+                                               renderCardRow, modal.querySelector('.modal-body'));
+            }
+        });
+    }
+});
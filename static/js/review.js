@@ -1,24 +1,23 @@
 // Variables globales
 let cards = [];
 let currentCardIndex = 0;
-let difficultyLevels = null;
+
+// Révisions en attente d'envoi groupé
+let pendingReviews = [];
+const REVIEW_BATCH_SIZE = 20;
+let flushInFlight = Promise.resolve(true);
+// Lots refusés par le serveur (4xx) : écartés, jamais renvoyés
+const rejectedReviews = [];
+// Délai avant un nouvel essai après une erreur réseau ou serveur (5xx)
+const RETRY_DELAY_MIN = 1000;
+const RETRY_DELAY_MAX = 60000;
+let retryDelay = RETRY_DELAY_MIN;
+let retryTimer = null;
 
 // Initialisation
-async function initializeReview(initialCards) {
+function initializeReview(initialCards) {
     console.log("Initialisation avec les cartes:", initialCards);
     cards = initialCards;
-    
-    // Charger les niveaux de difficulté
-    try {
-        const response = await fetch('/api/settings/difficulty');
-        if (response.ok) {
-            difficultyLevels = await response.json();
-            console.log("Niveaux de difficulté chargés:", difficultyLevels);
-        }
-    } catch (error) {
-        console.error('Erreur lors du chargement des paramètres de difficulté:', error);
-    }
-    
     showNextCard();
 }
 
@@ -27,11 +26,42 @@ function formatText(text) {
     return text.replace(/\n/g, '<br>');
 }
 
+// Fichiers joints à la carte, servis par /multimedia/... (mis en cache par le navigateur)
+function renderMedia(multimedia) {
+    const container = document.getElementById('mediaContainer');
+    container.replaceChildren();
+    if (!multimedia) {
+        return;
+    }
+    if (multimedia.image) {
+        const image = document.createElement('img');
+        image.className = 'img-fluid mb-3';
+        image.src = `/${multimedia.image}`;
+        container.appendChild(image);
+    }
+    for (const kind of ['audio', 'video']) {
+        if (multimedia[kind]) {
+            const player = document.createElement(kind);
+            player.controls = true;
+            player.preload = 'metadata';
+            player.className = 'd-block mb-3';
+            player.src = `/${multimedia[kind]}`;
+            container.appendChild(player);
+        }
+    }
+}
+
 function showNextCard() {
     if (currentCardIndex >= cards.length) {
-        // Fin de la session
-        console.log("Fin de la session, redirection vers:", `/decks/${deckName}`);
-        window.location.href = `/decks/${deckName}`;
+        // Fin de la session : envoyer les révisions restantes avant de quitter
+        flushReviews().then(ok => {
+            if (!ok) {
+                alert('Erreur lors de la mise à jour des cartes');
+                return;
+            }
+            console.log("Fin de la session, redirection vers:", returnUrl);
+            window.location.href = returnUrl;
+        });
         return;
     }
     
@@ -39,6 +69,7 @@ function showNextCard() {
     console.log("Affichage de la carte:", card);
     document.getElementById('questionText').innerHTML = formatText(card.question);
     document.getElementById('answerText').innerHTML = formatText(card.response);
+    renderMedia(card.multimedia);
     
     // Reset display
     document.getElementById('answerContainer').style.display = 'none';
@@ -57,53 +88,113 @@ async function submitFeedback(quality) {
     console.log("Soumission du feedback pour la carte:", card);
     console.log("Deck name:", deckName);
     
-    // Calculer le prochain intervalle de révision basé sur la difficulté
-    let nextInterval;
-    switch(quality) {
-        case 1: // Très difficile
-            nextInterval = difficultyLevels.very_hard;
-            break;
-        case 2: // Difficile
-            nextInterval = difficultyLevels.hard;
-            break;
-        case 3: // Moyen
-            nextInterval = difficultyLevels.medium;
-            break;
-        case 4: // Facile
-            nextInterval = difficultyLevels.easy;
-            break;
-        case 5: // Très facile
-            nextInterval = difficultyLevels.very_easy;
-            break;
-        default:
-            nextInterval = difficultyLevels.medium;
+    // Mettre la révision en attente, envoyée par lots : l'échéance est
+    // calculée par le serveur à partir de la qualité
+    pendingReviews.push({
+        deck: card.deck_id || deckName,
+        card_id: card.id,
+        quality: quality,
+        reviewed_at: Math.floor(Date.now() / 1000)
+    });
+    currentCardIndex++;
+
+    if (pendingReviews.length >= REVIEW_BATCH_SIZE) {
+        flushReviews();
     }
-    
+    showNextCard();
+}
+
+// Envoie les révisions en attente, un lot après l'autre
+function flushReviews() {
+    flushInFlight = flushInFlight.then(sendPendingReviews);
+    return flushInFlight;
+}
+
+// Regroupe des révisions par deck : {deck: [révisions]}
+function groupByDeck(reviews) {
+    const groups = {};
+    for (const review of reviews) {
+        (groups[review.deck] = groups[review.deck] || []).push(review);
+    }
+    return groups;
+}
+
+// Envoie les révisions en attente, une requête par deck
+async function sendPendingReviews() {
+    if (pendingReviews.length === 0) {
+        return true;
+    }
+    const groups = groupByDeck(pendingReviews);
+    pendingReviews = [];
+
+    let ok = true;
+    for (const [deck, batch] of Object.entries(groups)) {
+        if (!await sendDeckReviews(deck, batch)) {
+            ok = false;
+        }
+    }
+    if (ok) {
+        retryDelay = RETRY_DELAY_MIN;
+    } else {
+        scheduleRetry();
+    }
+    return ok;
+}
+
+// Programme un nouvel envoi, avec un délai doublé à chaque échec
+function scheduleRetry() {
+    if (retryTimer !== null) {
+        return;
+    }
+    retryTimer = setTimeout(() => {
+        retryTimer = null;
+        flushReviews();
+    }, retryDelay);
+    retryDelay = Math.min(retryDelay * 2, RETRY_DELAY_MAX);
+}
+
+// Retourne false si le lot doit être renvoyé (erreur réseau ou serveur)
+async function sendDeckReviews(deck, batch) {
+    let response;
     try {
-        const url = `/api/decks/${deckName}/cards/${card.id}/review`;
-        console.log("URL de la requête:", url);
-        
-        const response = await fetch(url, {
+        response = await fetch(`/api/decks/${encodeURIComponent(deck)}/reviews`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ 
-                quality: quality,
-                next_interval: nextInterval
-            })
+            body: JSON.stringify({ reviews: batch })
         });
-        
-        if (response.ok) {
-            currentCardIndex++;
-            showNextCard();
-        } else {
-            const errorData = await response.json();
-            console.error("Erreur de la réponse:", errorData);
-            alert('Erreur lors de la mise à jour de la carte');
-        }
     } catch (error) {
-        console.error('Erreur:', error);
-        alert('Erreur lors de la mise à jour de la carte');
+        console.error('Erreur réseau:', error);
+        pendingReviews = batch.concat(pendingReviews);
+        return false;
+    }
+
+    if (response.status >= 500) {
+        console.error("Erreur du serveur:", response.status);
+        pendingReviews = batch.concat(pendingReviews);
+        return false;
     }
+
+    const data = await response.json().catch(() => null);
+    if (!response.ok) {
+        // Requête invalide : la renvoyer échouerait de la même façon
+        console.error("Lot de révisions refusé:", response.status, data, batch);
+        rejectedReviews.push({ deck, status: response.status, reviews: batch });
+        return true;
+    }
+
+    (data && data.results || [])
+        .filter(result => !result.success)
+        .forEach(result => console.error("Révision refusée:", result));
+    return true;
 }
+
+// Envoyer les révisions en attente si la page est quittée en cours de session
+window.addEventListener('pagehide', () => {
+    for (const [deck, batch] of Object.entries(groupByDeck(pendingReviews))) {
+        const body = new Blob([JSON.stringify({ reviews: batch })], { type: 'application/json' });
+        navigator.sendBeacon(`/api/decks/${encodeURIComponent(deck)}/reviews`, body);
+    }
+    pendingReviews = [];
+});
@@ -0,0 +1,159 @@
+"""
+Tests du point d'entrée ASGI, appelé directement selon le protocole ASGI.
+"""
+import asyncio
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+pytest.importorskip('a2wsgi')
+
+from app import create_app
+from asgi import create_asgi_app
+
+MAX_UPLOAD = 64 * 1024
+CHUNK = 16 * 1024
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+async def call(application, method, path, body=b'', headers=(), chunks=None):
+    """Envoie une requête HTTP ; `chunks` fournit le corps bloc par bloc"""
+    if chunks is None:
+        chunks = [body]
+    chunks = iter(chunks)
+    messages = []
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '', 'server': ('testserver', 80),
+        'client': ('127.0.0.1', 1234),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+    }
+
+    async def receive():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        return {'type': 'http.request', 'body': chunk, 'more_body': True}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    start = messages[0]
+    headers = {name.decode(): value.decode() for name, value in start['headers']}
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return Response(start['status'], headers, body)
+
+
+def post_json(application, path, data):
+    body = json.dumps(data).encode()
+    return call(application, 'POST', path, body,
+                headers=[('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+
+
+@pytest.fixture
+def flask_app(tmp_path):
+    data = tmp_path / 'data'
+    return create_app({
+        'DATA_FOLDER': str(data),
+        'DECKS_FOLDER': str(data / 'decks'),
+        'RECALL_FOLDER': str(data / 'recall'),
+        'MULTIMEDIA_FOLDER': str(data / 'multimedia'),
+        'CONFIG_FOLDER': str(tmp_path / 'config'),
+        'DECK_STORE': 'json',
+        'MIGRATIONS': 'off',
+        'CONFIG_RELOAD_INTERVAL': 0,
+        'MAX_CONTENT_LENGTH': MAX_UPLOAD
+    })
+
+
+def serve(application, scenario):
+    """Exécute `scenario(application)` entre le démarrage et l'arrêt du cycle de vie"""
+    async def run():
+        inbox = asyncio.Queue()
+        outbox = asyncio.Queue()
+        lifespan = asyncio.create_task(
+            application({'type': 'lifespan', 'asgi': {'version': '3.0'}}, inbox.get, outbox.put))
+        await inbox.put({'type': 'lifespan.startup'})
+        assert (await outbox.get())['type'] == 'lifespan.startup.complete'
+        try:
+            return await scenario(application)
+        finally:
+            await inbox.put({'type': 'lifespan.shutdown'})
+            assert (await outbox.get())['type'] == 'lifespan.shutdown.complete'
+            await lifespan
+
+    return asyncio.run(run())
+
+
+class TestAsgi:
+    """Les routes Flask sont servies par l'application ASGI."""
+
+    def test_lifespan_initializes_data(self, flask_app):
+        async def scenario(application):
+            return Path(flask_app.config['DECKS_FOLDER']).is_dir()
+
+        assert serve(create_asgi_app(flask_app, threads=4), scenario)
+
+    def test_same_routes(self, flask_app):
+        async def scenario(application):
+            assert (await call(application, 'GET', '/healthz')).json() == {'status': 'ok'}
+            assert (await post_json(application, '/api/decks', {'name': 'Asgi'})).status == 200
+            response = await post_json(application, '/api/decks/asgi/cards',
+                                       {'question': 'q', 'response': 'r'})
+            assert response.status == 201
+            cards = (await call(application, 'GET', '/api/decks/asgi/cards')).json()['cards']
+            assert [card['question'] for card in cards] == ['q']
+            assert (await call(application, 'GET', '/')).status == 200
+
+        serve(create_asgi_app(flask_app, threads=4), scenario)
+
+    def test_large_body_refused_unread(self, flask_app):
+        pulled = []
+
+        def chunks():
+            for _ in range(4 * MAX_UPLOAD // CHUNK):
+                pulled.append(CHUNK)
+                yield b'x' * CHUNK
+
+        async def scenario(application):
+            return await call(application, 'POST', '/api/decks', chunks=chunks(),
+                              headers=[('Content-Type', 'application/json'),
+                                       ('Content-Length', str(4 * MAX_UPLOAD))])
+
+        response = serve(create_asgi_app(flask_app, threads=4), scenario)
+        assert response.status == 413
+        assert sum(pulled) < MAX_UPLOAD
+
+    def test_media_range(self, flask_app):
+        folder = Path(flask_app.config['MULTIMEDIA_FOLDER']) / 'images'
+        content = bytes(range(256)) * 1024
+
+        async def scenario(application):
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / 'photo.png').write_bytes(content)
+            full = await call(application, 'GET', '/multimedia/images/photo.png')
+            part = await call(application, 'GET', '/multimedia/images/photo.png',
+                              headers=[('Range', 'bytes=1000-1999')])
+            return full, part
+
+        full, part = serve(create_asgi_app(flask_app, threads=4, send_queue_size=2), scenario)
+        assert (full.status, full.body) == (200, content)
+        assert part.status == 206
+        assert part.body == content[1000:2000]
+        assert part.headers['content-range'] == f'bytes 1000-1999/{len(content)}'
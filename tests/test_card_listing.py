@@ -0,0 +1,120 @@
+"""
+Tests de la liste paginée des cartes (/api/decks/<deck>/cards).
+"""
+from pathlib import Path
+import re
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from card_listing import decode_cursor, encode_cursor
+from deck_store import JsonDeckStore
+from sqlite_store import SqliteDeckStore
+
+NOW = 10000
+
+
+def make_deck():
+    return {'deck_name': 'Pages', 'flashcards': [
+        {'id': f'c{i}', 'question': f'q{i}', 'date_created': 100 - i,
+         'next_review': (i % 4) * 5000, 'statistics': {'successes': 0, 'failures': i % 3}}
+        for i in range(9)
+    ]}
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        store = SqliteDeckStore(tmp_path / 'decks.sqlite3')
+    else:
+        (tmp_path / 'decks').mkdir()
+        (tmp_path / 'recall').mkdir()
+        store = JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                              lock_dir=tmp_path / 'locks')
+    store.save_deck('pages', make_deck())
+    return store
+
+
+def read_all(store, **options):
+    ids, cursor = [], None
+    while True:
+        cards, cursor = store.list_cards('pages', cursor=cursor, limit=2, now=NOW, **options)
+        ids += [card['id'] for card in cards]
+        if cursor is None:
+            return ids
+
+
+class TestListCards:
+    """Pagination par curseur sur les deux backends."""
+
+    def test_next_review_order_and_filters(self, store):
+        """Ordre (échéance, ID), filtres dues / à venir"""
+        assert read_all(store) == ['c0', 'c4', 'c8', 'c1', 'c5', 'c2', 'c6', 'c3', 'c7']
+        assert read_all(store, due='now') == ['c0', 'c4', 'c8', 'c1', 'c5', 'c2', 'c6']
+        assert read_all(store, due='later') == ['c3', 'c7']
+
+    def test_other_sorts(self, store):
+        """Tri par date de création et par nombre d'échecs décroissant"""
+        assert read_all(store, sort='created') == [f'c{i}' for i in range(8, -1, -1)]
+        assert read_all(store, sort='failures') == ['c2', 'c5', 'c8', 'c1', 'c4', 'c7', 'c0', 'c3', 'c6']
+
+    def test_pagination_survives_deletion(self, store):
+        """Supprimer une carte déjà lue ne décale pas la page suivante"""
+        first, cursor = store.list_cards('pages', limit=3, now=NOW)
+        store.delete_card('pages', first[0]['id'])
+        second, _ = store.list_cards('pages', cursor=cursor, limit=3, now=NOW)
+        assert [card['id'] for card in second] == ['c1', 'c5', 'c2']
+
+    def test_projection(self, store):
+        """Les champs demandés et l'ID sont seuls renvoyés"""
+        cards, _ = store.list_cards('pages', sort='failures', limit=1, fields=['question'])
+        assert cards == [{'id': 'c2', 'question': 'q2'}]
+
+    def test_invalid_options(self, store):
+        with pytest.raises(ValueError):
+            store.list_cards('pages', sort='random')
+        with pytest.raises(ValueError):
+            store.list_cards('pages', cursor='pas un curseur')
+
+
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor((12.5, 'c1'))) == (12.5, 'c1')
+
+
+class TestListCardsRoute:
+    """Tests de la route GET /api/decks/<deck>/cards."""
+
+    def test_route(self, client, clean_data_dir):
+        client.post('/api/decks', json={'name': 'Route Pages'})
+        for i in range(3):
+            client.post('/api/decks/route_pages/cards', json={'question': f'q{i}', 'response': 'r'})
+
+        response = client.get('/api/decks/route_pages/cards?limit=2&fields=question')
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page['cards']) == 2
+        assert set(page['cards'][0]) == {'id', 'question'}
+
+        response = client.get(f"/api/decks/route_pages/cards?cursor={page['next_cursor']}")
+        assert len(response.get_json()['cards']) == 1
+        assert response.get_json()['next_cursor'] is None
+
+        assert client.get('/api/decks/route_pages/cards?sort=random').status_code == 400
+        assert client.get('/api/decks/route_pages/cards?limit=abc').status_code == 400
+        assert client.get('/api/decks/absent/cards').status_code == 404
+
+    def test_deck_page_renders_first_page(self, client, clean_data_dir, monkeypatch):
+        import app as app_module
+        monkeypatch.setattr(app_module, 'CARDS_PAGE_SIZE', 2)
+        client.post('/api/decks', json={'name': 'Route Pages'})
+        for i in range(3):
+            client.post('/api/decks/route_pages/cards', json={'question': f'question-{i}', 'response': 'r'})
+
+        html = client.get('/decks/route_pages').get_data(as_text=True)
+        assert html.count('<h5 class="card-title">question-') == 2
+        assert 'À réviser maintenant (3)' in html
+        cursor = re.search(r'data-due="now" data-cursor="([^"]*)"', html).group(1)
+        assert len(client.get(f'/api/decks/route_pages/cards?due=now&cursor={cursor}').get_json()['cards']) == 1
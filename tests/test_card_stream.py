@@ -0,0 +1,99 @@
+"""
+Tests de la lecture en flux des cartes.
+"""
+import io
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from card_stream import iter_array_field, project
+from deck_store import JsonDeckStore
+from sqlite_store import SqliteDeckStore
+
+
+def make_deck(count):
+    return {'deck_name': 'Flux', 'name': 'flux', 'date_created': 1700000000,
+            'flashcards': [{'id': f'c{i}', 'question': 'é' * (i % 7), 'next_review': 1000 + i * 0.5,
+                            'statistics': {'successes': i, 'failures': 0}} for i in range(count)]}
+
+
+@pytest.fixture
+def json_store(tmp_path):
+    (tmp_path / 'decks').mkdir()
+    (tmp_path / 'recall').mkdir()
+    return JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                         lock_dir=tmp_path / 'locks', shard_bytes=4000, chunk_cards=7)
+
+
+class TestIterArrayField:
+    """Tests du parseur incrémental."""
+
+    @pytest.mark.parametrize('indent', [None, 2])
+    @pytest.mark.parametrize('block_size', [1, 3, 64])
+    def test_matches_json_load(self, indent, block_size):
+        """Les cartes lues par petits blocs sont identiques à json.load"""
+        deck = make_deck(20)
+        deck['tags'] = ['a', {'b': [1, 2]}]
+        header = {}
+        text = json.dumps(deck, indent=indent, ensure_ascii=False)
+        cards = list(iter_array_field(io.StringIO(text), 'flashcards', header, block_size=block_size))
+        assert cards == deck['flashcards']
+        assert header == {k: v for k, v in deck.items() if k != 'flashcards'}
+
+    def test_empty_and_missing_array(self):
+        """Tableau vide ou absent"""
+        assert list(iter_array_field(io.StringIO('{"flashcards": []}'), 'flashcards')) == []
+        assert list(iter_array_field(io.StringIO('{}'), 'flashcards')) == []
+
+    def test_invalid_json(self):
+        """Un fichier tronqué lève une erreur"""
+        with pytest.raises(ValueError):
+            list(iter_array_field(io.StringIO('{"flashcards": [{"id": 1}'), 'flashcards'))
+
+    def test_project(self):
+        """La projection garde l'ID et les champs demandés"""
+        card = {'id': 'c1', 'question': 'q', 'next_review': 5}
+        assert project(card, ('next_review', 'absent')) == {'id': 'c1', 'next_review': 5}
+        assert project(card, None) is card
+
+
+class TestStoreIterCards:
+    """Tests de `iter_cards` sur les backends."""
+
+    @pytest.mark.parametrize('count', [5, 40])
+    def test_json_store_streams_with_journal(self, json_store, count):
+        """Decks monolithique et découpé, journal rejoué, sans remplir le cache"""
+        json_store.save_deck('flux', make_deck(count))
+        json_store.record_review('flux', {'id': 'c3', 'next_review': 42})
+        json_store.cache.invalidate()
+
+        cards = list(json_store.iter_cards('flux', fields=('next_review',)))
+        assert len(cards) == count
+        assert cards[3] == {'id': 'c3', 'next_review': 42}
+        assert set(cards[0]) == {'id', 'next_review'}
+        assert 'flux' not in json_store.cache
+        assert list(json_store.iter_cards('absent')) == []
+
+    def test_summaries_are_streamed(self, json_store):
+        """Les résumés du manifeste sont calculés sans charger le deck en cache"""
+        json_store.save_deck('flux', make_deck(40))
+        json_store.cache.invalidate()
+        json_store.manifest.remove('flux')
+
+        summary = json_store.list_summaries()[0]
+        assert summary['card_count'] == 40
+        assert summary['deck_name'] == 'Flux'
+        assert 'flux' not in json_store.cache
+
+    def test_sqlite_store(self, tmp_path):
+        """Le backend SQLite parcourt les cartes ligne à ligne"""
+        store = SqliteDeckStore(tmp_path / 'decks.sqlite3')
+        store.save_deck('flux', make_deck(10))
+        cards = list(store.iter_cards('flux', fields=('statistics',)))
+        assert [c['id'] for c in cards] == [f'c{i}' for i in range(10)]
+        assert cards[2] == {'id': 'c2', 'statistics': {'successes': 2, 'failures': 0}}
@@ -0,0 +1,84 @@
+"""
+Tests du flux de révision compact (compact_flow).
+"""
+from datetime import timedelta
+from pathlib import Path
+import sys
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from compact_flow import CompactRevisionFlow, CompactTask
+from revision_flow import RevisionFlow
+
+GRAPH = [
+    ('algèbre', []),
+    ('premier degré', ['algèbre']),
+    ('second degré', ['premier degré']),
+    ('systèmes', ['premier degré', 'algèbre']),
+    ('géométrie', []),
+]
+
+
+def build(flow_class):
+    flow = flow_class()
+    for name, dependencies in GRAPH:
+        flow.add_task(name, dependencies)
+    return flow
+
+
+def names(tasks):
+    return [task.name for task in tasks]
+
+
+class TestCompactFlow:
+    """Même comportement que RevisionFlow, état rangé en colonnes."""
+
+    def test_same_availability_and_sessions(self):
+        flows = [build(RevisionFlow), build(CompactRevisionFlow)]
+        for flow in flows:
+            flow.tasks['algèbre'].mark_completed(5)
+        assert names(flows[0].get_available_tasks()) == names(flows[1].get_available_tasks())
+
+        sessions = []
+        for flow in flows:
+            flow.start_session(timedelta(minutes=30))
+            reviewed = []
+            while task := flow.get_next_task():
+                reviewed.append(task.name)
+                task.mark_completed(2 if task.name == 'systèmes' else 4)
+            sessions.append(reviewed)
+        assert sessions[0] == sessions[1] == ['géométrie', 'premier degré', 'second degré', 'systèmes']
+
+    def test_task_view(self):
+        flow = build(CompactRevisionFlow)
+        task = flow.tasks['systèmes']
+        assert isinstance(task, CompactTask)
+        assert task.dependencies == ['premier degré', 'algèbre']
+        assert (task.completed, task.next_revision, task.difficulty_factor) == (False, None, 2.5)
+        assert task == flow.tasks['systèmes']
+        assert list(flow.tasks) == [name for name, _ in GRAPH]
+
+        task.mark_completed(1)
+        assert task.completed and task.consecutive_correct == 0
+        assert task.next_revision is not None
+
+    def test_state_interchangeable(self, tmp_path):
+        path = tmp_path / 'state.bin'
+        flow = build(RevisionFlow)
+        flow.tasks['algèbre'].mark_completed(4)
+        flow.save_state(str(path))
+
+        compact = CompactRevisionFlow()
+        compact.load_state(str(path))
+        converted = CompactRevisionFlow.from_flow(flow)
+        for other in (compact, converted):
+            assert names(other.get_available_tasks()) == ['premier degré', 'géométrie']
+            algebra = other.tasks['algèbre']
+            assert algebra.next_revision == flow.tasks['algèbre'].next_revision
+            assert algebra.consecutive_correct == 1
+
+        compact.save_state(str(path))
+        reloaded = RevisionFlow()
+        reloaded.load_state(str(path))
+        assert names(reloaded.get_available_tasks()) == ['premier degré', 'géométrie']
@@ -0,0 +1,125 @@
+"""
+Tests des requêtes conditionnelles (ETag, If-None-Match, If-Modified-Since).
+"""
+from pathlib import Path
+import sys
+import time
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import create_app
+from deck_store import JsonDeckStore
+from sqlite_store import SqliteDeckStore
+
+SETTINGS = {'very_hard': 2, 'hard': 4, 'medium': 6, 'easy': 8, 'very_easy': 100}
+
+
+@pytest.fixture
+def client(tmp_path):
+    data = tmp_path / 'data'
+    app = create_app({
+        'DATA_FOLDER': str(data),
+        'DECKS_FOLDER': str(data / 'decks'),
+        'RECALL_FOLDER': str(data / 'recall'),
+        'MULTIMEDIA_FOLDER': str(data / 'multimedia'),
+        'CONFIG_FOLDER': str(tmp_path / 'config'),
+        'DECK_STORE': 'json',
+        'MIGRATIONS': 'off'
+    })
+    return app.test_client()
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        return SqliteDeckStore(tmp_path / 'decks.sqlite3')
+    (tmp_path / 'decks').mkdir()
+    (tmp_path / 'recall').mkdir()
+    return JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                         lock_dir=tmp_path / 'locks')
+
+
+class TestDeckVersion:
+    """Version des decks sur les deux backends."""
+
+    def test_version_changes_on_write(self, store):
+        assert store.deck_version('absent') is None
+        store.save_deck('v', {'deck_name': 'V', 'flashcards': [{'id': 'c1', 'next_review': 0}]})
+        first = store.deck_version('v')
+        assert first == store.deck_version('v')
+
+        store.add_card('v', {'id': 'c2', 'next_review': 0})
+        second = store.deck_version('v')
+        assert second[0] != first[0]
+
+        store.record_reviews('v', [{'id': 'c1', 'next_review': 50, 'date_last_reviewed': 1,
+                                    'last_quality': 4, 'statistics': {}}])
+        assert store.deck_version('v')[0] != second[0]
+
+    def test_due_version(self, store):
+        now = int(time.time())
+        assert store.due_version('absent', now) is None
+        store.save_deck('v', {'deck_name': 'V', 'flashcards': [{'id': 'c1', 'next_review': 0},
+                                                              {'id': 'c2', 'next_review': now + 3600}]})
+        token, due = store.due_version('v', now)
+        assert token == store.deck_version('v')[0] and due == 1
+        # La carte c2 devient due : le compteur suit sans écriture du deck
+        assert store.due_version('v', now + 7200) == (token, 2)
+
+
+class TestConditionalRoutes:
+    """Réponses 304 des routes de configuration et de deck."""
+
+    def test_difficulty_settings(self, client):
+        response = client.get('/api/settings/difficulty')
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert response.headers['Last-Modified']
+        assert 'no-cache' in response.headers['Cache-Control']
+
+        cached = client.get('/api/settings/difficulty', headers={'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.data == b''
+        since = client.get('/api/settings/difficulty',
+                           headers={'If-Modified-Since': response.headers['Last-Modified']})
+        assert since.status_code == 304
+
+        assert client.post('/api/settings/difficulty', json=SETTINGS).status_code == 200
+        updated = client.get('/api/settings/difficulty', headers={'If-None-Match': etag})
+        assert updated.status_code == 200
+        assert updated.get_json() == SETTINGS
+        assert updated.headers['ETag'] != etag
+
+    def test_config(self, client):
+        client.get('/api/settings/difficulty')
+        etag = client.get('/api/config').headers['ETag']
+        assert client.get('/api/config', headers={'If-None-Match': etag}).status_code == 304
+
+    def test_deck_page_and_listing(self, client):
+        client.post('/api/decks', json={'name': 'Etag'})
+        client.post('/api/decks/etag/cards', json={'question': 'q0', 'response': 'r'})
+
+        for url in ('/decks/etag', '/api/decks/etag/cards'):
+            etag = client.get(url).headers['ETag']
+            assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+            client.post('/api/decks/etag/cards', json={'question': 'q', 'response': 'r'})
+            response = client.get(url, headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etag
+
+    def test_fresh_deck_page_does_not_load_deck(self, client):
+        client.post('/api/decks', json={'name': 'Lazy'})
+        client.post('/api/decks/lazy/cards', json={'question': 'q', 'response': 'r'})
+        etags = {url: client.get(url).headers['ETag'] for url in ('/decks/lazy', '/api/decks/lazy/cards')}
+
+        with client.application.app_context():
+            from app import store
+            store.cache.invalidate()
+            misses = store.cache.stats()['misses']
+            for url, etag in etags.items():
+                assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+            assert store.cache.stats()['misses'] == misses
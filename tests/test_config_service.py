@@ -0,0 +1,86 @@
+"""
+Tests de la configuration en mémoire (config_service).
+"""
+import builtins
+import json
+from pathlib import Path
+import sys
+import threading
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config_service import ConfigService
+
+
+@pytest.fixture
+def service(tmp_path):
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({'difficulty_levels': {'easy': 9}}), encoding='utf-8')
+    service = ConfigService(path, tmp_path / 'locks')
+    yield service
+    service.stop()
+
+
+def increment(config):
+    config['counter'] = config.get('counter', 0) + 1
+
+
+class TestConfigService:
+    """Lecture en mémoire, écritures sérialisées et rechargement à chaud."""
+
+    def test_reads_do_no_io(self, service, monkeypatch):
+        assert service.get() == {'difficulty_levels': {'easy': 9}}
+
+        def no_open(*args, **kwargs):
+            raise AssertionError("lecture disque inattendue")
+        monkeypatch.setattr(builtins, 'open', no_open)
+        assert service.get()['difficulty_levels'] == {'easy': 9}
+        assert service.version() is not None
+
+    def test_concurrent_updates_are_serialized(self, tmp_path, service):
+        # Deux services sur le même fichier : deux workers
+        other = ConfigService(service.path, tmp_path / 'locks')
+        threads = [threading.Thread(target=lambda s=s: [s.update(increment) for _ in range(20)])
+                   for s in (service, other, service, other)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert json.loads(Path(service.path).read_text(encoding='utf-8'))['counter'] == 80
+        assert service.get()['difficulty_levels'] == {'easy': 9}
+
+    def test_failed_update_writes_nothing(self, service):
+        version = service.version()
+
+        def invalid(config):
+            config['difficulty_levels'] = None
+            raise ValueError('invalide')
+        with pytest.raises(ValueError):
+            service.update(invalid)
+        assert service.version() == version
+        assert service.get()['difficulty_levels'] == {'easy': 9}
+
+    def test_reload_notifies_subscribers(self, service):
+        service.get()
+        received = []
+        service.subscribe(received.append)
+        changed = threading.Event()
+        service.subscribe(lambda config: changed.set())
+        service.watch(0.01)
+
+        # Modification par un autre processus (plus longue : signature différente)
+        Path(service.path).write_text(json.dumps({'difficulty_levels': {'easy': 99}}), encoding='utf-8')
+        assert changed.wait(5)
+        assert service.get() == {'difficulty_levels': {'easy': 99}}
+        assert received[-1] == {'difficulty_levels': {'easy': 99}}
+
+    def test_missing_file(self, tmp_path):
+        service = ConfigService(tmp_path / 'absent.json', tmp_path / 'locks')
+        assert service.get() is None
+        assert service.version() is None
+        assert service.setdefault('difficulty_levels', {'easy': 9}) == {'easy': 9}
+        assert json.loads((tmp_path / 'absent.json').read_text(encoding='utf-8')) == {
+            'difficulty_levels': {'easy': 9}}
@@ -0,0 +1,130 @@
+"""
+Tests pour le cache des decks.
+"""
+import json
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from deck_cache import DeckCache
+from deck_store import JsonDeckStore
+
+
+def _write(path, deck):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(deck, f)
+
+
+def _load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def deck_file(tmp_path):
+    path = tmp_path / 'maths.json'
+    _write(path, {'deck_name': 'Maths', 'flashcards': []})
+    return path
+
+
+class TestDeckCache:
+    """Tests du cache LRU des decks."""
+
+    def test_hit_after_first_load(self, deck_file):
+        """Le second accès ne relit pas le fichier"""
+        cache = DeckCache()
+        first = cache.get('maths', deck_file, _load)
+        second = cache.get('maths', deck_file, _load)
+
+        assert first is second
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_invalidated_when_file_changes(self, deck_file):
+        """Une modification externe du fichier est détectée"""
+        cache = DeckCache()
+        cache.get('maths', deck_file, _load)
+
+        _write(deck_file, {'deck_name': 'Maths', 'flashcards': [{'id': 'c1'}]})
+        stat = os.stat(deck_file)
+        os.utime(deck_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        deck = cache.get('maths', deck_file, _load)
+        assert len(deck['flashcards']) == 1
+        assert cache.stats()['misses'] == 2
+
+    def test_missing_file_returns_none(self, tmp_path):
+        """Un deck supprimé n'est plus servi par le cache"""
+        cache = DeckCache()
+        assert cache.get('absent', tmp_path / 'absent.json', _load) is None
+        assert 'absent' not in cache
+
+    def test_put_updates_entry_in_place(self, deck_file):
+        """Une écriture met à jour l'entrée sans rechargement"""
+        cache = DeckCache()
+        deck = cache.get('maths', deck_file, _load)
+        deck['flashcards'].append({'id': 'c1'})
+        _write(deck_file, deck)
+        cache.put('maths', deck_file, deck)
+
+        assert cache.get('maths', deck_file, _load) is deck
+        assert cache.stats()['misses'] == 1
+
+    def test_lru_eviction_on_budget(self, tmp_path):
+        """Le deck le moins récemment utilisé est évincé"""
+        paths = []
+        for name in ('a', 'b', 'c'):
+            path = tmp_path / f'{name}.json'
+            _write(path, {'deck_name': name, 'flashcards': []})
+            paths.append(path)
+        size = os.stat(paths[0]).st_size
+        cache = DeckCache(max_bytes=size * 2)
+
+        cache.get('a', paths[0], _load)
+        cache.get('b', paths[1], _load)
+        cache.get('a', paths[0], _load)
+        cache.get('c', paths[2], _load)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+        assert cache.stats()['evictions'] == 1
+
+    def test_oversized_deck_goes_through_on_drop(self, deck_file):
+        """Un deck plus gros que le budget n'est pas gardé et passe par on_drop"""
+        dropped = []
+        size = os.stat(deck_file).st_size
+        cache = DeckCache(max_bytes=size, on_drop=lambda deck_id, deck: dropped.append((deck_id, deck)))
+        deck = cache.get('maths', deck_file, _load)
+        assert 'maths' in cache and dropped == []
+
+        # Même objet réécrit plus gros que le budget : retiré du cache
+        deck['flashcards'].append({'id': 'c1', 'question': 'q' * size})
+        _write(deck_file, deck)
+        cache.put('maths', deck_file, deck)
+        assert 'maths' not in cache
+        assert dropped == [('maths', deck)]
+        assert cache.stats()['bytes'] == 0
+
+        # Chargé alors qu'il dépasse le budget : jamais gardé
+        loaded = cache.get('maths', deck_file, _load)
+        assert 'maths' not in cache
+        assert dropped[-1] == ('maths', loaded) and dropped[-1][1] is loaded
+
+    def test_store_keeps_nothing_for_uncached_deck(self, tmp_path):
+        """Un deck hors budget ne laisse ni index ni fragments dans le stockage"""
+        for name in ('decks', 'recall'):
+            (tmp_path / name).mkdir()
+        store = JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                              cache_max_bytes=64, shard_bytes=256, chunk_cards=2)
+        store.create_deck('gros', {'deck_name': 'Gros', 'flashcards': [
+            {'id': f'c{i}', 'question': 'q' * 50, 'response': 'r'} for i in range(6)]})
+        store.add_card('gros', {'id': 'c6', 'question': 'q', 'response': 'r'})
+        assert len(store.get_deck('gros')['flashcards']) == 7
+        assert 'gros' not in store.cache
+        assert store._due_indexes == {} and store._layouts == {}
@@ -0,0 +1,65 @@
+"""
+Tests des codecs de fichiers de decks.
+"""
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+import deck_codec
+from deck_codec import COMPACT, ENCODERS, PRETTY, decode, detect, encode, resolve
+from deck_store import JsonDeckStore
+
+DECK = {'deck_name': 'Été', 'flashcards': [{'id': 'c1', 'question': 'Ça va ?', 'next_review': 1.5}]}
+
+
+class TestDeckCodec:
+    """Tests de l'encodage et de la détection du format."""
+
+    @pytest.mark.parametrize('codec', list(ENCODERS))
+    def test_roundtrip(self, codec):
+        """Chaque codec relit ce qu'il écrit, sans échapper les accents"""
+        data = encode(DECK, codec)
+        assert decode(data) == DECK
+        assert 'Été'.encode('utf-8') in data
+
+    def test_detect(self):
+        """Le format indenté est distingué du format compact"""
+        assert detect(encode(DECK, PRETTY)) == PRETTY
+        assert detect(encode(DECK, COMPACT)) == COMPACT
+        assert len(encode(DECK, COMPACT)) < len(encode(DECK, PRETTY))
+        with pytest.raises(ValueError):
+            detect(b'not json')
+
+    def test_resolve(self, monkeypatch):
+        """'auto' choisit orjson seulement s'il est installé"""
+        monkeypatch.setattr(deck_codec, 'orjson', None)
+        assert resolve('auto') == COMPACT
+        assert resolve('orjson') == COMPACT
+        with pytest.raises(ValueError):
+            resolve('yaml')
+
+    def test_decode_legacy_and_bom(self):
+        """Les anciens fichiers indentés (avec ou sans BOM) sont relus"""
+        assert decode(b'\xef\xbb\xbf{\n    "a": [1, 2]\n}') == {'a': [1, 2]}
+        assert decode('{"a": NaN}')['a'] != 0
+
+
+def test_store_reads_any_codec(tmp_path):
+    """Un deck écrit en format indenté est relu par un store compact"""
+    (tmp_path / 'decks').mkdir()
+    (tmp_path / 'recall').mkdir()
+    pretty = JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                           lock_dir=tmp_path / 'locks', codec=PRETTY)
+    pretty.save_deck('d', dict(DECK))
+    assert detect((tmp_path / 'decks' / 'd.json').read_bytes()) == PRETTY
+
+    compact = JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                            lock_dir=tmp_path / 'locks', codec=COMPACT)
+    assert compact.get_card('d', 'c1')['question'] == 'Ça va ?'
+    compact.add_card('d', {'id': 'c2'})
+    assert detect((tmp_path / 'decks' / 'd.json').read_bytes()) == COMPACT
+    assert len(pretty.get_deck('d')['flashcards']) == 2
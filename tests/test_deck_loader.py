@@ -0,0 +1,112 @@
+"""
+Tests du chargement parallèle des decks.
+"""
+import json
+from pathlib import Path
+import sys
+import threading
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from deck_cache import DeckCache
+from deck_loader import load_all, report
+from deck_store import JsonDeckStore
+
+
+def square(value):
+    if value < 0:
+        raise ValueError('négatif')
+    return value * value
+
+
+def make_store(tmp_path, **options):
+    for name in ('decks', 'recall'):
+        (tmp_path / name).mkdir(exist_ok=True)
+    return JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                         lock_dir=tmp_path / 'locks', **options)
+
+
+def write_decks(tmp_path, count):
+    (tmp_path / 'decks').mkdir(exist_ok=True)
+    for i in range(count):
+        deck = {'deck_name': f'Deck {i}', 'flashcards': [{'id': f'c{i}', 'next_review': 0}]}
+        (tmp_path / 'decks' / f'deck_{i}.json').write_text(json.dumps(deck), encoding='utf-8')
+
+
+class TestLoadAll:
+    """Pool de chargement et rapport."""
+
+    @pytest.mark.parametrize('executor', ['thread', 'process'])
+    def test_errors_do_not_abort(self, executor):
+        results = load_all([3, -1, 2], square, workers=2, executor=executor)
+        assert [result.key for result in results] == [3, -1, 2]
+        assert [result.value for result in results] == [9, None, 4]
+        assert results[1].error == 'ValueError: négatif'
+        assert all(result.seconds >= 0 for result in results)
+
+        summary = report(results)
+        assert summary['loaded'] == 2
+        assert summary['failed'] == {-1: 'ValueError: négatif'}
+        assert len(summary['slowest']) == 3
+
+    def test_loads_run_concurrently(self):
+        """Les chargements se chevauchent : aucun ne termine avant que tous aient commencé"""
+        barrier = threading.Barrier(4, timeout=5)
+        results = load_all(range(4), lambda key: barrier.wait() is not None, workers=4)
+        assert all(result.error is None for result in results)
+
+
+class TestParallelCache:
+    """Le cache ne sérialise plus les chargements."""
+
+    def test_cache_loads_outside_lock(self, tmp_path):
+        paths = []
+        for name in ('a', 'b'):
+            path = tmp_path / f'{name}.json'
+            path.write_text('{"flashcards": []}', encoding='utf-8')
+            paths.append((name, path))
+        cache = DeckCache()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def loader(path):
+            barrier.wait()
+            return json.loads(path.read_text(encoding='utf-8'))
+        results = load_all(paths, lambda item: cache.get(item[0], item[1], loader), workers=2)
+        assert all(result.error is None for result in results)
+        assert 'a' in cache and 'b' in cache
+
+
+class TestWarmUp:
+    """Préchargement du cache d'un JsonDeckStore."""
+
+    @pytest.mark.parametrize('executor', ['thread', 'process'])
+    def test_warm_up_fills_cache(self, tmp_path, executor):
+        store = make_store(tmp_path, load_workers=4, load_executor=executor)
+        write_decks(tmp_path, 6)
+        (tmp_path / 'decks' / 'broken.json').write_text('{pas du json', encoding='utf-8')
+
+        results = store.warm_up()
+        assert len(results) == 7
+        assert [result.key for result in results if result.error] == ['broken']
+        assert all(f'deck_{i}' in store.cache for i in range(6))
+
+        misses = store.cache.misses
+        assert store.get_deck('deck_3')['deck_name'] == 'Deck 3'
+        assert store.cache.misses == misses
+
+    def test_warm_up_respects_cache_budget(self, tmp_path):
+        write_decks(tmp_path, 6)
+        size = (tmp_path / 'decks' / 'deck_0.json').stat().st_size
+        store = make_store(tmp_path, cache_max_bytes=size * 3)
+        assert len(store.warm_up()) == 3
+
+    def test_load_decks_and_manifest(self, tmp_path):
+        store = make_store(tmp_path, load_workers=4)
+        write_decks(tmp_path, 5)
+        assert [summary['due_now'] for summary in store.list_summaries()] == [1] * 5
+        results = store.load_decks(['deck_1', 'absent'])
+        assert results[0].value['deck_name'] == 'Deck 1'
+        assert results[1].error.startswith('LookupError')
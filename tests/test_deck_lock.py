@@ -0,0 +1,123 @@
+"""
+Tests des verrous par deck et des écritures concurrentes.
+"""
+import json
+from pathlib import Path
+import sys
+import threading
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from deck_lock import atomic_write
+from deck_store import JsonDeckStore
+
+
+def make_store(root, journal_compact_bytes=256 * 1024):
+    return JsonDeckStore(root / 'decks', root / 'recall', root / 'manifest.json',
+                         journal_compact_bytes=journal_compact_bytes, lock_dir=root / 'locks')
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / 'decks').mkdir()
+    (tmp_path / 'recall').mkdir()
+    return tmp_path
+
+
+def count_success(card, review):
+    statistics = card.setdefault('statistics', {})
+    statistics['successes'] = statistics.get('successes', 0) + 1
+    card['next_review'] = review['at']
+
+
+def hammer(stores, deck_id, card_ids, per_thread):
+    """Lance un thread par (store, carte) qui enchaîne les révisions"""
+    errors = []
+
+    def worker(store, card_id):
+        try:
+            for i in range(per_thread):
+                store.apply_reviews(deck_id, [{'card_id': card_id, 'at': i}], count_success)
+        except Exception as e:  # pragma: no cover - remonté par l'assertion
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(store, card_id))
+               for store in stores for card_id in card_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+class TestConcurrentWriters:
+    """Aucune révision n'est perdue quand plusieurs écrivains visent un deck."""
+
+    def test_threads_sharing_a_store(self, root):
+        """Révisions concurrentes depuis un même processus"""
+        store = make_store(root)
+        store.save_deck('d', {'deck_name': 'd', 'flashcards': [{'id': 'a'}, {'id': 'b'}]})
+        hammer([store] * 4, 'd', ['a', 'b'], 25)
+
+        fresh = make_store(root)
+        successes = {c['id']: c['statistics']['successes'] for c in fresh.get_deck('d')['flashcards']}
+        assert successes == {'a': 100, 'b': 100}
+
+    def test_independent_stores_with_compaction(self, root):
+        """Des stores distincts (comme des workers) se synchronisent par le disque,
+        y compris pendant la compaction du journal"""
+        stores = [make_store(root, journal_compact_bytes=2048) for _ in range(3)]
+        stores[0].save_deck('d', {'deck_name': 'd', 'flashcards': [{'id': 'a'}, {'id': 'b'}]})
+        hammer(stores, 'd', ['a', 'b'], 20)
+
+        successes = {c['id']: c['statistics']['successes'] for c in make_store(root).get_deck('d')['flashcards']}
+        assert successes == {'a': 60, 'b': 60}
+
+    def test_concurrent_card_additions(self, root):
+        """Les ajouts de cartes concurrents sont tous conservés"""
+        stores = [make_store(root) for _ in range(2)]
+        stores[0].save_deck('d', {'deck_name': 'd', 'flashcards': []})
+        threads = [threading.Thread(target=lambda s=store, n=n: [
+                       s.add_card('d', {'id': f'{n}-{i}'}) for i in range(15)])
+                   for n, store in enumerate(stores * 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(make_store(root).get_deck('d')['flashcards']) == 60
+
+    def test_queued_writes_are_coalesced(self, root, monkeypatch):
+        """Les écritures en attente du verrou partagent un seul cycle d'écriture"""
+        store = make_store(root)
+        store.save_deck('d', {'deck_name': 'd', 'flashcards': [{'id': 'a'}]})
+        appends = []
+        original = store.journal.append_many
+        monkeypatch.setattr(store.journal, 'append_many',
+                            lambda deck_id, cards: appends.append(len(cards)) or original(deck_id, cards))
+
+        # Les révisions sont mises en attente pendant que le verrou est tenu
+        with store.locks.lock('d'):
+            threads = [threading.Thread(target=store.apply_reviews,
+                                        args=('d', [{'card_id': 'a', 'at': i}], count_success))
+                       for i in range(5)]
+            for thread in threads:
+                thread.start()
+            while len(store._pending.get('d', [])) < 5:
+                threading.Event().wait(0.001)
+        for thread in threads:
+            thread.join()
+
+        assert appends == [1]
+        assert store.get_card('d', 'a')['statistics']['successes'] == 5
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    """L'écriture atomique remplace le fichier sans laisser de fichier temporaire"""
+    path = tmp_path / 'deck.json'
+    path.write_text('{"old": true}')
+    atomic_write(path, json.dumps({'new': True}))
+    assert json.loads(path.read_text()) == {'new': True}
+    assert [p.name for p in tmp_path.iterdir()] == ['deck.json']
@@ -0,0 +1,82 @@
+"""
+Tests pour le manifeste des decks.
+"""
+import json
+import time
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from deck_manifest import DeckManifest, summarize_deck
+
+
+@pytest.fixture
+def decks_dir(tmp_path):
+    path = tmp_path / 'decks'
+    path.mkdir()
+    return path
+
+
+def _write_deck(decks_dir, deck_id, deck):
+    path = decks_dir / f'{deck_id}.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(deck, f)
+    return path
+
+
+class TestDeckManifest:
+    """Tests du manifeste des decks."""
+
+    def test_summary_counts(self):
+        """Le résumé compte les cartes dues et la prochaine échéance"""
+        now = time.time()
+        deck = {'deck_name': 'Maths', 'flashcards': [
+            {'id': 'a'},
+            {'id': 'b', 'next_review': now - 10},
+            {'id': 'c', 'next_review': now + 100},
+            {'id': 'd', 'next_review': now + 50}
+        ]}
+        summary = summarize_deck('maths', deck, now=now)
+        assert summary['card_count'] == 4
+        assert summary['due_now'] == 2
+        assert summary['next_due'] == now + 50
+
+    def test_sync_loads_only_changed_decks(self, tmp_path, decks_dir):
+        """Un second sync ne recharge aucun deck inchangé"""
+        _write_deck(decks_dir, 'maths', {'deck_name': 'Maths', 'flashcards': []})
+        _write_deck(decks_dir, 'info', {'deck_name': 'Info', 'flashcards': []})
+        loaded = []
+
+        def loader(deck_id):
+            loaded.append(deck_id)
+            with open(decks_dir / f'{deck_id}.json', encoding='utf-8') as f:
+                return json.load(f)
+
+        manifest = DeckManifest(tmp_path / 'manifest.json')
+        summaries = manifest.sync(decks_dir, loader)
+        assert [s['id'] for s in summaries] == ['info', 'maths']
+        assert sorted(loaded) == ['info', 'maths']
+
+        loaded.clear()
+        reopened = DeckManifest(tmp_path / 'manifest.json')
+        assert len(reopened.sync(decks_dir, loader)) == 2
+        assert loaded == []
+
+    def test_update_and_remove(self, tmp_path, decks_dir):
+        """Les écritures mettent le manifeste à jour incrémentalement"""
+        manifest = DeckManifest(tmp_path / 'manifest.json')
+        deck = {'deck_name': 'Maths', 'name': 'maths', 'flashcards': [{'id': 'a'}]}
+        path = _write_deck(decks_dir, 'maths', deck)
+        st = path.stat()
+        manifest.update('maths', deck, [st.st_mtime_ns, st.st_size])
+
+        assert manifest.has_name('maths')
+        assert manifest.get('maths')['card_count'] == 1
+
+        manifest.remove('maths')
+        assert not manifest.has_name('maths')
+        assert len(manifest) == 0
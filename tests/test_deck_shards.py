@@ -0,0 +1,118 @@
+"""
+Tests du format de deck découpé en fragments.
+"""
+import json
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from deck_shards import chunks_dir, is_sharded
+from deck_store import JsonDeckStore
+
+
+def make_store(root, **kwargs):
+    kwargs.setdefault('shard_bytes', 500)
+    kwargs.setdefault('chunk_cards', 10)
+    return JsonDeckStore(root / 'decks', root / 'recall', root / 'manifest.json',
+                         lock_dir=root / 'locks', **kwargs)
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / 'decks').mkdir()
+    (tmp_path / 'recall').mkdir()
+    return tmp_path
+
+
+def make_deck(count):
+    return {'deck_name': 'Gros', 'name': 'gros',
+            'flashcards': [{'id': f'c{i}', 'question': f'question {i}'} for i in range(count)]}
+
+
+def chunk_files(root):
+    return sorted(os.listdir(chunks_dir(root / 'decks' / 'gros.json')))
+
+
+def read_header(root):
+    with open(root / 'decks' / 'gros.json', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestShardedDecks:
+    """Tests de la conversion et des mises à jour par fragment."""
+
+    def test_small_deck_stays_monolithic(self, root):
+        """Un deck sous le seuil reste un fichier JSON classique"""
+        store = make_store(root)
+        store.save_deck('gros', make_deck(3))
+        assert not is_sharded(read_header(root))
+        assert not chunks_dir(root / 'decks' / 'gros.json').exists()
+
+    def test_large_deck_is_sharded_transparently(self, root):
+        """Au-delà du seuil, le deck est découpé mais relu à l'identique"""
+        store = make_store(root)
+        deck = make_deck(35)
+        store.save_deck('gros', deck)
+
+        header = read_header(root)
+        assert is_sharded(header)
+        assert header['deck']['deck_name'] == 'Gros'
+        assert len(header['chunks']) == 4
+
+        loaded = make_store(root).get_deck('gros')
+        assert loaded['deck_name'] == 'Gros'
+        assert [c['id'] for c in loaded['flashcards']] == [f'c{i}' for i in range(35)]
+        assert make_store(root).list_summaries()[0]['card_count'] == 35
+
+    def test_card_mutations_rewrite_one_chunk(self, root):
+        """Ajouter ou supprimer une carte ne réécrit qu'un fragment"""
+        store = make_store(root)
+        store.save_deck('gros', make_deck(35))
+        before = chunk_files(root)
+
+        assert store.add_card('gros', {'id': 'new', 'question': 'q'})
+        after_add = chunk_files(root)
+        assert len(set(before) - set(after_add)) == 1
+        assert read_header(root)['chunks'][:3] == before[:3]
+
+        assert store.delete_card('gros', 'c12') is True
+        after_delete = chunk_files(root)
+        assert len(set(after_add) - set(after_delete)) == 1
+
+        cards = [c['id'] for c in make_store(root).get_deck('gros')['flashcards']]
+        assert cards == [f'c{i}' for i in range(35) if i != 12] + ['new']
+
+    def test_emptied_chunk_is_dropped(self, root):
+        """Un fragment vidé disparaît de l'en-tête"""
+        store = make_store(root)
+        store.save_deck('gros', make_deck(35))
+        for i in range(30, 35):
+            store.delete_card('gros', f'c{i}')
+        assert len(read_header(root)['chunks']) == 3
+        assert store.add_card('gros', {'id': 'new'})
+        assert len(read_header(root)['chunks']) == 4
+        assert make_store(root).get_card('gros', 'new') is not None
+
+    def test_compaction_rewrites_reviewed_chunks(self, root):
+        """La compaction du journal ne réécrit que les fragments révisés"""
+        store = make_store(root, journal_compact_bytes=1)
+        store.save_deck('gros', make_deck(35))
+        before = chunk_files(root)
+
+        store.record_review('gros', {'id': 'c3', 'next_review': 1234})
+        assert store.journal.size('gros') == 0
+        assert len(set(before) - set(chunk_files(root))) == 1
+        assert make_store(root).get_card('gros', 'c3')['next_review'] == 1234
+
+    def test_delete_removes_chunks(self, root):
+        """Supprimer le deck supprime ses fragments"""
+        store = make_store(root)
+        store.save_deck('gros', make_deck(35))
+        assert store.delete_deck('gros')
+        assert not chunks_dir(root / 'decks' / 'gros.json').exists()
+        assert store.get_deck('gros') is None
@@ -0,0 +1,51 @@
+"""
+Tests pour l'index des échéances de révision.
+"""
+from pathlib import Path
+import sys
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from due_index import DueIndex
+
+
+def _cards():
+    return [
+        {'id': 'a'},
+        {'id': 'b', 'next_review': 300},
+        {'id': 'c', 'next_review': 100},
+        {'id': 'd', 'next_review': 200}
+    ]
+
+
+class TestDueIndex:
+    """Tests de l'index trié (next_review, card_id)."""
+
+    def test_queries(self):
+        """Cartes dues, à venir, compte et prochaine échéance"""
+        index = DueIndex(_cards())
+        assert [c['id'] for c in index.due(150)] == ['a', 'c']
+        assert [c['id'] for c in index.upcoming(150)] == ['d', 'b']
+        assert [c['id'] for c in index.upcoming(0, limit=2)] == ['c', 'd']
+        assert index.count_due(200) == 3
+        assert index.next_due(150) == 200
+        assert index.next_due(300) is None
+
+    def test_incremental_updates(self):
+        """L'index suit les ajouts, suppressions et révisions"""
+        cards = _cards()
+        index = DueIndex(cards)
+
+        index.add({'id': 'e', 'next_review': 50})
+        assert [c['id'] for c in index.due(100)] == ['a', 'e', 'c']
+
+        cards[0]['next_review'] = 1000
+        index.update(cards[0])
+        assert [c['id'] for c in index.upcoming(250)] == ['b', 'a']
+
+        assert index.remove('c')
+        assert not index.remove('c')
+        assert 'c' not in index
+        assert len(index) == 4
+        assert index.count_due(100) == 1
@@ -0,0 +1,124 @@
+"""
+Tests des instantanés binaires des flux de révision (flow_snapshot).
+"""
+from datetime import datetime, timedelta
+import json
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from compact_flow import CompactRevisionFlow
+from flow_snapshot import DELTA_HEADER, UPDATE, delta_path, is_snapshot
+from revision_flow import RevisionFlow
+
+
+def build(flow_class, count=200):
+    flow = flow_class()
+    for i in range(count):
+        flow.add_task(f'notion-{i}', [f'notion-{i - 1}'] if i % 10 else [])
+    return flow
+
+
+def state(flow):
+    return {name: (task.completed, task.next_revision, task.difficulty_factor,
+                   task.consecutive_correct, list(task.dependencies))
+            for name, task in flow.tasks.items()}
+
+
+@pytest.fixture(params=[RevisionFlow, CompactRevisionFlow])
+def flow_class(request):
+    return request.param
+
+
+class TestSnapshots:
+    """Base binaire, journal des modifications et compaction."""
+
+    def test_round_trip_with_deltas(self, flow_class, tmp_path):
+        path = str(tmp_path / 'state.bin')
+        flow = build(flow_class)
+        flow.save_state(path)
+        assert is_snapshot(path)
+        base_size = os.path.getsize(path)
+
+        flow.tasks['notion-0'].mark_completed(4)
+        flow.tasks['notion-10'].mark_completed(1)
+        flow.add_task('synthèse', ['notion-0', 'notion-10'])
+        flow.save_state(path)
+        # La base n'est pas réécrite : seules les modifications sont ajoutées
+        assert os.path.getsize(path) == base_size
+        assert os.path.getsize(delta_path(path)) > DELTA_HEADER.size + 2 * UPDATE.size
+
+        for loader in (RevisionFlow, CompactRevisionFlow):
+            loaded = loader()
+            loaded.load_state(path)
+            assert state(loaded) == state(flow)
+            assert [t.name for t in loaded.get_available_tasks()] == [t.name for t in flow.get_available_tasks()]
+
+    def test_saves_after_load_append(self, flow_class, tmp_path):
+        path = str(tmp_path / 'state.bin')
+        build(flow_class).save_state(path)
+        flow = flow_class()
+        flow.load_state(path)
+        flow.tasks['notion-5'].mark_completed(5)
+        delta_size = os.path.getsize(delta_path(path))
+        flow.save_state(path)
+        assert os.path.getsize(delta_path(path)) == delta_size + UPDATE.size
+
+        # Rien de modifié : rien d'écrit
+        flow.save_state(path)
+        assert os.path.getsize(delta_path(path)) == delta_size + UPDATE.size
+
+    def test_compaction(self, flow_class, tmp_path):
+        path = str(tmp_path / 'state.bin')
+        flow = build(flow_class)
+        flow.save_state(path)
+        for name in list(flow.tasks):
+            flow.tasks[name].mark_completed(4)
+        flow.save_state(path)
+        # Trop de modifications : base réécrite et journal vidé
+        assert os.path.getsize(delta_path(path)) == DELTA_HEADER.size
+
+        loaded = flow_class()
+        loaded.load_state(path)
+        assert state(loaded) == state(flow)
+
+    def test_stale_or_truncated_journal(self, flow_class, tmp_path):
+        path = str(tmp_path / 'state.bin')
+        flow = build(flow_class)
+        flow.save_state(path)
+        flow.tasks['notion-0'].mark_completed(4)
+        flow.save_state(path)
+        expected = state(flow)
+
+        # Enregistrement tronqué par une écriture interrompue
+        with open(delta_path(path), 'ab') as f:
+            f.write(b'U\x01\x00')
+        loaded = flow_class()
+        loaded.load_state(path)
+        assert state(loaded) == expected
+
+        # Journal d'une autre base : ignoré
+        journal = Path(delta_path(path)).read_bytes()
+        flow.save_state(path, full=True)
+        Path(delta_path(path)).write_bytes(journal[:8] + b'\0' * 8 + journal[16:])
+        loaded.load_state(path)
+        assert state(loaded) == expected
+
+    def test_legacy_json(self, flow_class, tmp_path):
+        path = tmp_path / 'state.json'
+        revision = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+        path.write_text(json.dumps({
+            'algèbre': {'completed': True, 'next_revision': revision.isoformat(),
+                        'difficulty_factor': 2.6, 'consecutive_correct': 1, 'dependencies': []},
+            'équations': {'completed': False, 'next_revision': None,
+                          'difficulty_factor': 2.5, 'consecutive_correct': 0, 'dependencies': ['algèbre']}
+        }), encoding='utf-8')
+        flow = flow_class()
+        flow.load_state(str(path))
+        assert flow.tasks['algèbre'].next_revision == revision
+        assert [t.name for t in flow.get_available_tasks()] == ['équations']
@@ -0,0 +1,95 @@
+"""
+Tests du stockage multimédia par contenu.
+"""
+import hashlib
+import io
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import create_app
+from media_store import MediaStore, MediaTooLarge
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 1000
+
+
+class TestMediaStore:
+    """Nommage par empreinte et déduplication."""
+
+    def test_same_content_stored_once(self, tmp_path):
+        media = MediaStore(tmp_path)
+        first = media.save(io.BytesIO(PNG), 'images', 'schema.PNG')
+        second = media.save(io.BytesIO(PNG), 'images', 'copie du schéma.png')
+        assert first == second == f"multimedia/images/{hashlib.sha256(PNG).hexdigest()}.png"
+        assert [path.name for path in (tmp_path / 'images').iterdir()] == [first.rsplit('/', 1)[1]]
+        assert (tmp_path / 'images' / first.rsplit('/', 1)[1]).read_bytes() == PNG
+
+    def test_too_large_leaves_nothing(self, tmp_path):
+        media = MediaStore(tmp_path, max_bytes=1000)
+        with pytest.raises(MediaTooLarge):
+            media.save(io.BytesIO(PNG), 'images', 'schema.png')
+        assert list((tmp_path / 'images').iterdir()) == []
+
+
+class TestUploadRoute:
+    """Ajout de cartes avec fichiers joints et accès à ces fichiers."""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        data = tmp_path / 'data'
+        app = create_app({
+            'DATA_FOLDER': str(data),
+            'DECKS_FOLDER': str(data / 'decks'),
+            'RECALL_FOLDER': str(data / 'recall'),
+            'MULTIMEDIA_FOLDER': str(data / 'multimedia'),
+            'CONFIG_FOLDER': str(tmp_path / 'config'),
+            'DECK_STORE': 'json',
+            'MIGRATIONS': 'off',
+            'CONFIG_RELOAD_INTERVAL': 0,
+            'MAX_CONTENT_LENGTH': 512 * 1024
+        })
+        client = app.test_client()
+        client.post('/api/decks', json={'name': 'Media'})
+        return client
+
+    def upload(self, client, content):
+        return client.post('/api/decks/media/cards', content_type='multipart/form-data', data={
+            'question': 'q', 'response': 'r', 'image': (io.BytesIO(content), 'schema.png')})
+
+    def test_uploads_are_deduplicated(self, client, tmp_path):
+        first = self.upload(client, PNG)
+        second = self.upload(client, PNG)
+        assert first.status_code == second.status_code == 201
+        image = first.get_json()['multimedia']['image']
+        assert image == second.get_json()['multimedia']['image']
+        assert len(list((tmp_path / 'data' / 'multimedia' / 'images').iterdir())) == 1
+
+    def test_max_upload_size(self, client):
+        response = self.upload(client, b'x' * (600 * 1024))
+        assert response.status_code == 413
+        assert 'error' in response.get_json()
+
+    def test_media_route(self, client):
+        path = self.upload(client, PNG).get_json()['multimedia']['image']
+        digest = hashlib.sha256(PNG).hexdigest()
+
+        response = client.get(f'/{path}')
+        assert response.status_code == 200
+        assert response.data == PNG
+        assert response.headers['ETag'] == f'"{digest}"'
+        assert 'immutable' in response.headers['Cache-Control']
+        assert response.headers['Accept-Ranges'] == 'bytes'
+
+        assert client.get(f'/{path}', headers={'If-None-Match': f'"{digest}"'}).status_code == 304
+
+        partial = client.get(f'/{path}', headers={'Range': 'bytes=8-15'})
+        assert partial.status_code == 206
+        assert partial.data == PNG[8:16]
+        assert partial.headers['Content-Range'] == f'bytes 8-15/{len(PNG)}'
+
+        assert client.get('/multimedia/../decks/media.json').status_code == 404
+        assert client.get('/multimedia/images/absent.png').status_code == 404
@@ -0,0 +1,135 @@
+"""
+Tests de l'initialisation paresseuse et des migrations versionnées.
+"""
+import json
+from pathlib import Path
+import sys
+import threading
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import create_app
+from deck_store import JsonDeckStore
+from migrations import SCHEMA_VERSION, add_deck_names, schema_version
+from sqlite_store import SqliteDeckStore
+
+
+@pytest.fixture
+def paths(tmp_path):
+    data = tmp_path / 'data'
+    return {
+        'DATA_FOLDER': str(data),
+        'DECKS_FOLDER': str(data / 'decks'),
+        'RECALL_FOLDER': str(data / 'recall'),
+        'MULTIMEDIA_FOLDER': str(data / 'multimedia'),
+        'CONFIG_FOLDER': str(tmp_path / 'config'),
+        'DECK_STORE': 'json'
+    }
+
+
+def write_legacy_deck(paths):
+    decks = Path(paths['DECKS_FOLDER'])
+    decks.mkdir(parents=True)
+    with open(decks / 'ancien.json', 'w', encoding='utf-8') as f:
+        json.dump({'deck_name': 'Ancien', 'flashcards': []}, f)
+
+
+def read_deck(paths):
+    with open(Path(paths['DECKS_FOLDER']) / 'ancien.json', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TestLazyInitialization:
+    """L'application ne touche au disque qu'à la première utilisation."""
+
+    def test_create_app_does_no_io(self, tmp_path, paths):
+        """Créer l'application ne crée aucun dossier"""
+        create_app(paths)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_first_request_creates_folders(self, paths):
+        """La première requête crée les dossiers de données"""
+        app = create_app(dict(paths, MIGRATIONS='off'))
+        assert app.test_client().get('/').status_code == 200
+        assert Path(paths['MULTIMEDIA_FOLDER'], 'images').is_dir()
+        assert schema_version(paths['DATA_FOLDER']) == 0
+
+
+class TestMigrations:
+    """Les migrations ne s'exécutent qu'une fois."""
+
+    def test_migrate_command(self, paths):
+        """`flask migrate` applique les migrations en attente puis plus rien"""
+        write_legacy_deck(paths)
+        app = create_app(dict(paths, MIGRATIONS='off'))
+        runner = app.test_cli_runner()
+
+        result = runner.invoke(args=['migrate'])
+        assert result.exit_code == 0
+        assert f"{SCHEMA_VERSION} migration(s)" in result.output
+        assert read_deck(paths)['name'] == 'ancien'
+        assert schema_version(paths['DATA_FOLDER']) == SCHEMA_VERSION
+
+        assert '0 migration(s)' in runner.invoke(args=['migrate']).output
+
+    def test_background_migrations(self, paths):
+        """Par défaut, les migrations tournent dans un thread à la première requête"""
+        write_legacy_deck(paths)
+        app = create_app(paths)
+        app.test_client().get('/')
+        thread = app.extensions['smart_revision']['migrations']
+        assert thread is not None
+        thread.join(timeout=10)
+        assert read_deck(paths)['name'] == 'ancien'
+
+        # Données déjà migrées : aucun thread n'est lancé
+        other = create_app(paths)
+        other.test_client().get('/')
+        assert other.extensions['smart_revision']['migrations'] is None
+
+
+def open_store(kind, tmp_path):
+    """Une instance de stockage, comme dans un worker distinct"""
+    if kind == 'sqlite':
+        return SqliteDeckStore(tmp_path / 'decks.sqlite3')
+    for name in ('decks', 'recall'):
+        (tmp_path / name).mkdir(exist_ok=True)
+    return JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                         lock_dir=tmp_path / 'locks')
+
+
+class TestAddDeckNames:
+    """La migration modifie chaque deck sous son verrou."""
+
+    @pytest.mark.parametrize('kind', ['json', 'sqlite'])
+    def test_concurrent_review_is_kept(self, kind, tmp_path):
+        store = open_store(kind, tmp_path)
+        store.create_deck('ancien', {'deck_name': 'Ancien',
+                                     'flashcards': [{'id': 'c1', 'question': 'q', 'response': 'r'}]})
+        other = open_store(kind, tmp_path)
+        reviewer = threading.Thread(target=other.record_review,
+                                    args=('ancien', {'id': 'c1', 'last_quality': 4, 'next_review': 1}))
+        blocked = []
+        update_deck = store.update_deck
+
+        def update_during_review(deck_id, update):
+            def apply(deck):
+                # La révision de l'autre worker attend la fin de la migration
+                reviewer.start()
+                reviewer.join(0.2)
+                blocked.append(reviewer.is_alive())
+                return update(deck)
+            return update_deck(deck_id, apply)
+
+        store.update_deck = update_during_review
+        add_deck_names(store)
+        reviewer.join(10)
+        assert blocked == [True]
+
+        deck = open_store(kind, tmp_path).get_deck('ancien')
+        assert deck['name'] == 'ancien'
+        assert deck['flashcards'][0]['last_quality'] == 4
+        assert store.update_deck('absent', lambda deck: True) is None
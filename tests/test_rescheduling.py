@@ -0,0 +1,185 @@
+"""
+Tests du recalcul groupé des échéances.
+"""
+from pathlib import Path
+import random
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+import rescheduling
+from app import create_app
+from deck_store import JsonDeckStore
+from rescheduling import Columns, changed_dues, histogram, recompute, reschedule
+from scheduler import Scheduler
+from sqlite_store import SqliteDeckStore
+
+NOW = 1_700_000_000
+DAY = 24 * 3600
+LEVELS = {'very_hard': 3, 'hard': 5, 'medium': 7, 'easy': 9, 'very_easy': 11}
+# Intervalles en jours (1440 minutes par jour)
+NEW_LEVELS = {level: minutes * 1440 for level, minutes in
+              {'very_hard': 1, 'hard': 2, 'medium': 3, 'easy': 4, 'very_easy': 5}.items()}
+
+
+def make_cards():
+    cards = [{'id': f'c{q}', 'question': 'q', 'response': 'r', 'date_last_reviewed': NOW,
+              'last_quality': q, 'next_review': NOW + LEVELS[rescheduling.LEVELS[q - 1]] * 60}
+             for q in range(1, 6)]
+    cards.append({'id': 'new', 'question': 'q', 'response': 'r', 'next_review': 0})
+    return cards
+
+
+def make_store(kind, tmp_path):
+    if kind == 'sqlite':
+        store = SqliteDeckStore(tmp_path / 'decks.sqlite3')
+    else:
+        for name in ('decks', 'recall'):
+            (tmp_path / name).mkdir()
+        store = JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                              lock_dir=tmp_path / 'locks')
+    store.create_deck('bio', {'deck_name': 'Bio', 'flashcards': make_cards()})
+    return store
+
+
+class TestRecompute:
+    """Calcul sur les colonnes, avec et sans NumPy."""
+
+    @pytest.fixture(params=['numpy', 'python'])
+    def backend(self, request, monkeypatch):
+        if request.param == 'numpy':
+            pytest.importorskip('numpy')
+        else:
+            monkeypatch.setattr(rescheduling, 'np', None)
+
+    def test_only_changed_cards(self, backend):
+        columns = Columns(make_cards())
+        assert changed_dues(columns, recompute(columns, LEVELS)) == {}
+
+        changes = changed_dues(columns, recompute(columns, dict(LEVELS, medium=60)))
+        assert changes == {'c3': NOW + 3600}
+        assert isinstance(changes['c3'], int)
+
+    def test_histogram(self, backend):
+        columns = Columns(make_cards())
+        due = recompute(columns, NEW_LEVELS)
+        # La carte jamais révisée est due immédiatement
+        assert histogram(due, NOW)[:7] == [1, 1, 1, 1, 1, 1, 0]
+        assert histogram([NOW + 90 * DAY], NOW)[-1] == 1
+
+
+def random_cards(count, seed):
+    rng = random.Random(seed)
+    cards = []
+    for i in range(count):
+        card = {'id': f'c{i}', 'next_review': rng.choice([0, NOW + rng.randint(-90, 90) * DAY])}
+        if rng.random() < 0.8:
+            card['date_last_reviewed'] = rng.choice([NOW - rng.randint(0, 60 * DAY), NOW - 0.5])
+            card['last_quality'] = rng.randint(-1, 6)
+        cards.append(card)
+    return cards
+
+
+class TestBackends:
+    """NumPy et Python pur donnent les mêmes résultats"""
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_same_results(self, seed, monkeypatch):
+        pytest.importorskip('numpy')
+        cards = random_cards(500, seed)
+        rng = random.Random(seed)
+        levels = {level: rng.randint(1, 60 * 1440) for level in rescheduling.LEVELS}
+
+        def run():
+            columns = Columns(cards)
+            due = recompute(columns, levels)
+            return changed_dues(columns, due), histogram(due, NOW), histogram(columns.next_review, NOW)
+
+        vectorized = run()
+        assert vectorized[0]
+        monkeypatch.setattr(rescheduling, 'np', None)
+        assert run() == vectorized
+
+
+class TestReschedule:
+    """Réécriture des seules échéances modifiées dans chaque stockage."""
+
+    @pytest.mark.parametrize('kind', ['json', 'sqlite'])
+    def test_reschedule_store(self, kind, tmp_path):
+        store = make_store(kind, tmp_path)
+        calls = []
+        dry = reschedule(store, NEW_LEVELS, dry_run=True, now=NOW,
+                         progress=lambda *args: calls.append(args))
+        assert calls == [(1, 1, 'bio', 5)]
+        assert (dry['cards'], dry['changed']) == (6, 5)
+        assert dry['before'][0] == 6 and dry['after'][:2] == [1, 1]
+        assert store.get_card('bio', 'c5')['next_review'] == NOW + 11 * 60
+
+        summary = reschedule(store, NEW_LEVELS, now=NOW)
+        assert summary['changed'] == 5
+        card = store.get_card('bio', 'c5')
+        assert card['next_review'] == NOW + 5 * DAY
+        assert card['last_quality'] == 5
+        assert store.count_due('bio', NOW + DAY) == 2
+
+        assert reschedule(store, NEW_LEVELS, now=NOW)['changed'] == 0
+
+    @pytest.mark.parametrize('kind', ['json', 'sqlite'])
+    def test_review_between_read_and_write(self, kind, tmp_path):
+        store = make_store(kind, tmp_path)
+        read = store.iter_cards
+        scheduler = Scheduler('levels', NEW_LEVELS)
+
+        def iter_cards(deck_id, fields=None):
+            cards = list(read(deck_id, fields))
+            # Révision concurrente, après la lecture des cartes
+            store.apply_reviews(deck_id, [{'card_id': 'c5'}],
+                                lambda card, review: scheduler.review(card, 1, NOW + 60))
+            return cards
+
+        store.iter_cards = iter_cards
+        summary = reschedule(store, NEW_LEVELS, now=NOW)
+        assert (summary['changed'], summary['skipped']) == (4, 1)
+        card = store.get_card('bio', 'c5')
+        assert (card['next_review'], card['last_quality']) == (NOW + 60 + DAY, 1)
+        assert store.get_card('bio', 'c4')['next_review'] == NOW + 4 * DAY
+
+
+class TestRescheduleRoute:
+    """Recalcul depuis l'API des paramètres de difficulté."""
+
+    def test_dry_run_then_apply(self, tmp_path):
+        data = tmp_path / 'data'
+        app = create_app({
+            'DATA_FOLDER': str(data),
+            'DECKS_FOLDER': str(data / 'decks'),
+            'RECALL_FOLDER': str(data / 'recall'),
+            'MULTIMEDIA_FOLDER': str(data / 'multimedia'),
+            'CONFIG_FOLDER': str(tmp_path / 'config'),
+            'DECK_STORE': 'json',
+            'MIGRATIONS': 'off',
+            'CONFIG_RELOAD_INTERVAL': 0,
+            'SCHEDULER': 'levels'
+        })
+        client = app.test_client()
+        client.post('/api/decks', json={'name': 'Bio'})
+        with app.app_context():
+            from app import store
+            for card in make_cards():
+                store.add_card('bio', card)
+        assert client.post('/api/settings/difficulty', json=NEW_LEVELS).status_code == 200
+
+        dry = client.post('/api/settings/difficulty/reschedule', json={'dry_run': True}).get_json()
+        assert dry['changed'] == 5 and dry['dry_run']
+        applied = client.post('/api/settings/difficulty/reschedule', json={}).get_json()
+        assert applied['changed'] == 5
+        assert client.post('/api/settings/difficulty/reschedule', json={}).get_json()['changed'] == 0
+
+        response = client.post('/api/settings/difficulty/reschedule', json={'deck_ids': ['absent']})
+        assert response.status_code == 404
+
+        result = app.test_cli_runner().invoke(args=['reschedule', '--dry-run'])
+        assert '0/6 carte(s) à modifier' in result.output
@@ -0,0 +1,83 @@
+"""
+Tests pour l'envoi groupé des révisions.
+"""
+from pathlib import Path
+import sys
+import time
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+import app as app_module
+
+
+class TestReviewBatch:
+    """Tests de la route /api/decks/<deck>/reviews."""
+
+    def _create_cards(self, client, count):
+        client.post('/api/decks', json={'name': 'Batch Deck'})
+        return [
+            client.post('/api/decks/batch_deck/cards', json={'question': f'q{i}', 'response': 'r'}).get_json()['id']
+            for i in range(count)
+        ]
+
+    def test_batch_applies_all_reviews_in_one_write(self, client, clean_data_dir, monkeypatch):
+        """Toutes les révisions du lot sont enregistrées en une seule écriture"""
+        card_ids = self._create_cards(client, 3)
+        writes = []
+        original = app_module.store.apply_reviews
+        monkeypatch.setattr(app_module.store, 'apply_reviews',
+                            lambda deck_id, reviews, apply, **kw: writes.append(len(reviews)) or original(deck_id, reviews, apply, **kw))
+
+        reviewed_at = int(time.time()) - 60
+        response = client.post('/api/decks/batch_deck/reviews', json={'reviews': [
+            {'card_id': card_ids[0], 'quality': 4, 'reviewed_at': reviewed_at},
+            {'card_id': card_ids[1], 'quality': 1},
+            {'card_id': 'flashcard_absent', 'quality': 4},
+            {'card_id': card_ids[2]}
+        ]})
+        assert response.status_code == 200
+        results = response.get_json()['results']
+        assert [r['success'] for r in results] == [True, True, False, False]
+        # Première bonne réponse : révision un jour plus tard (SM-2)
+        assert results[0]['next_review'] == reviewed_at + 24 * 3600
+        assert writes == [3]
+
+        cards = {c['id']: c for c in app_module.get_deck('batch_deck')['flashcards']}
+        assert cards[card_ids[0]]['statistics']['successes'] == 1
+        assert cards[card_ids[1]]['statistics']['failures'] == 1
+        assert 'next_review' not in cards[card_ids[2]]
+
+    def test_batch_errors(self, client, clean_data_dir):
+        """Lot vide ou deck inexistant"""
+        self._create_cards(client, 1)
+        assert client.post('/api/decks/batch_deck/reviews', json={'reviews': []}).status_code == 400
+        response = client.post('/api/decks/absent/reviews', json={'reviews': [{'card_id': 'x'}]})
+        assert response.status_code == 404
+
+    def test_invalid_reviewed_at(self, client, clean_data_dir):
+        """Dates de révision invalides refusées une par une, dates anciennes bornées"""
+        card_ids = self._create_cards(client, 4)
+        now = int(time.time())
+        response = client.post('/api/decks/batch_deck/reviews', json={'reviews': [
+            {'card_id': card_ids[0], 'quality': 4, 'reviewed_at': 'abc'},
+            {'card_id': card_ids[1], 'quality': 4, 'reviewed_at': {}},
+            {'card_id': card_ids[2], 'quality': 4, 'reviewed_at': -5},
+            {'card_id': card_ids[3], 'quality': 4, 'reviewed_at': None}
+        ]})
+        assert response.status_code == 200
+        results = response.get_json()['results']
+        assert [r['success'] for r in results] == [False, False, True, True]
+        assert results[0]['error'] == 'Date de révision invalide'
+
+        day = 24 * 3600
+        oldest = now - app_module.MAX_OFFLINE_AGE
+        assert oldest + day <= results[2]['next_review'] <= int(time.time()) - app_module.MAX_OFFLINE_AGE + day
+        assert now + day <= results[3]['next_review'] <= int(time.time()) + day
+
+    def test_reviewed_at_zero_is_not_now(self):
+        """0 est une date (bornée), pas une absence de date"""
+        now = int(time.time())
+        assert app_module.parse_reviewed_at(0, now) == now - app_module.MAX_OFFLINE_AGE
+        assert app_module.parse_reviewed_at(None, now) == now
+        assert app_module.parse_reviewed_at(now + 3600, now) == now
@@ -0,0 +1,108 @@
+"""
+Tests pour le journal des révisions.
+"""
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+import app as app_module
+from review_journal import ReviewJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return ReviewJournal(tmp_path, compact_threshold=1024)
+
+
+class TestReviewJournal:
+    """Tests du journal append-only des révisions."""
+
+    def test_replay_applies_latest_record(self, journal):
+        """Le dernier enregistrement d'une carte l'emporte"""
+        journal.append('maths', {'id': 'c1', 'next_review': 10, 'statistics': {'successes': 1, 'failures': 0}})
+        journal.append('maths', {'id': 'c1', 'next_review': 20, 'statistics': {'successes': 2, 'failures': 0}})
+        deck = {'flashcards': [{'id': 'c1', 'question': 'q'}, {'id': 'c2'}]}
+
+        assert journal.replay('maths', deck) == 1
+        assert deck['flashcards'][0]['next_review'] == 20
+        assert deck['flashcards'][0]['statistics']['successes'] == 2
+        assert 'next_review' not in deck['flashcards'][1]
+
+    def test_replay_is_idempotent(self, journal):
+        """Rejouer deux fois le journal ne change pas le résultat"""
+        journal.append('maths', {'id': 'c1', 'next_review': 10, 'statistics': {'successes': 1, 'failures': 0}})
+        deck = {'flashcards': [{'id': 'c1'}]}
+        journal.replay('maths', deck)
+        journal.replay('maths', deck)
+        assert deck['flashcards'][0]['statistics'] == {'successes': 1, 'failures': 0}
+
+    def test_truncated_line_is_ignored(self, journal):
+        """Une ligne tronquée par un arrêt brutal est ignorée"""
+        journal.append('maths', {'id': 'c1', 'next_review': 10})
+        with open(journal.path('maths'), 'a', encoding='utf-8') as f:
+            f.write('{"flashcard_id": "c1", "next_rev')
+        assert journal.latest('maths')['c1']['next_review'] == 10
+
+    def test_append_after_truncated_line(self, journal):
+        """Un ajout après une ligne tronquée n'est pas perdu"""
+        journal.append('maths', {'id': 'c1', 'next_review': 10})
+        path = Path(journal.path('maths'))
+        data = path.read_bytes()
+        path.write_bytes(data + data[:len(data) // 2])
+        journal.append_many('maths', [{'id': 'c2', 'next_review': 20}, {'id': 'c3', 'next_review': 30}])
+        latest = journal.latest('maths')
+        assert {card_id: record['next_review'] for card_id, record in latest.items()} == \
+            {'c1': 10, 'c2': 20, 'c3': 30}
+
+    def test_needs_compaction(self, journal):
+        """La compaction est demandée au-delà du seuil"""
+        assert not journal.needs_compaction('maths')
+        for i in range(50):
+            journal.append('maths', {'id': f'c{i}', 'next_review': i})
+        assert journal.needs_compaction('maths')
+        journal.clear('maths')
+        assert journal.size('maths') == 0
+
+
+class TestReviewEndpointJournal:
+    """Tests de l'écriture des révisions via le journal."""
+
+    def _create_card(self, client):
+        client.post('/api/decks', json={'name': 'Journal Deck'})
+        response = client.post('/api/decks/journal_deck/cards', json={'question': 'q', 'response': 'r'})
+        return response.get_json()['id']
+
+    def test_review_appends_without_rewriting_deck(self, client, clean_data_dir):
+        """Une révision n'écrit que dans le journal"""
+        card_id = self._create_card(client)
+        deck_path = app_module.decks_dir / 'journal_deck.json'
+        before = deck_path.stat().st_mtime_ns
+
+        response = client.post(f'/api/decks/journal_deck/cards/{card_id}/review',
+                               json={'quality': 4, 'next_interval': 10})
+        assert response.status_code == 200
+        assert deck_path.stat().st_mtime_ns == before
+        assert app_module.store.journal.size('journal_deck') > 0
+
+        app_module.store.cache.invalidate()
+        card = app_module.get_deck('journal_deck')['flashcards'][0]
+        assert card['statistics']['successes'] == 1
+        assert card['last_quality'] == 4
+
+    def test_compaction_folds_journal_into_deck(self, client, clean_data_dir, monkeypatch):
+        """Au-delà du seuil, le journal est replié dans le deck"""
+        card_id = self._create_card(client)
+        monkeypatch.setattr(app_module.store.journal, 'compact_threshold', 0)
+
+        client.post(f'/api/decks/journal_deck/cards/{card_id}/review',
+                    json={'quality': 1, 'next_interval': 10})
+
+        assert app_module.store.journal.size('journal_deck') == 0
+        with open(app_module.decks_dir / 'journal_deck.json', encoding='utf-8') as f:
+            card = json.load(f)['flashcards'][0]
+        assert card['statistics']['failures'] == 1
@@ -0,0 +1,122 @@
+"""
+Tests de la file de révision commune à tous les decks (/review/all).
+"""
+from pathlib import Path
+import sys
+import time
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app import create_app
+from deck_store import JsonDeckStore
+from review_queue import card_tags, merge_due
+from sqlite_store import SqliteDeckStore
+
+# Les résumés des decks sont calculés à l'heure courante
+NOW = int(time.time())
+
+
+def make_deck(prefix, dues, tags=()):
+    return {'deck_name': prefix, 'flashcards': [
+        {'id': f'{prefix}{i}', 'question': f'q{i}', 'next_review': NOW - 10000 + due, 'tags': list(tags)}
+        for i, due in enumerate(dues)
+    ]}
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        store = SqliteDeckStore(tmp_path / 'decks.sqlite3')
+    else:
+        (tmp_path / 'decks').mkdir()
+        (tmp_path / 'recall').mkdir()
+        store = JsonDeckStore(tmp_path / 'decks', tmp_path / 'recall', tmp_path / 'manifest.json',
+                              lock_dir=tmp_path / 'locks')
+    store.save_deck('a', make_deck('a', [100, 5000, 9000, 20000], tags=['python']))
+    store.save_deck('b', make_deck('b', [50, 7000, 30000], tags=[{'name': 'langues', 'subtags': [{'name': 'anglais'}]}]))
+    store.save_deck('c', make_deck('c', [50000]))
+    return store
+
+
+class TestDueQueue:
+    """Fusion des cartes dues de plusieurs decks."""
+
+    def test_merged_in_due_order(self, store):
+        queue = store.due_queue(NOW)
+        assert [card['id'] for _, card in queue] == ['b0', 'a0', 'a1', 'b1', 'a2']
+        assert [deck_id for deck_id, _ in queue] == ['b', 'a', 'a', 'b', 'a']
+
+    def test_limit_and_tags(self, store):
+        assert [card['id'] for _, card in store.due_queue(NOW, limit=2)] == ['b0', 'a0']
+        assert [card['id'] for _, card in store.due_queue(NOW, tags=['anglais'])] == ['b0', 'b1']
+        assert store.due_queue(NOW, tags=['absent']) == []
+
+    def test_decks_without_due_cards_are_not_read(self, store, monkeypatch):
+        store.list_summaries()
+        read = []
+        original = store.iter_due
+
+        def tracking(deck_id, now, page_size=100):
+            read.append(deck_id)
+            return original(deck_id, now, page_size)
+        monkeypatch.setattr(store, 'iter_due', tracking)
+        store.due_queue(NOW)
+        assert sorted(read) == ['a', 'b']
+
+
+def test_merge_reads_lazily():
+    """La fusion s'arrête à `limit` sans épuiser les flux"""
+    consumed = []
+
+    def stream(deck_id, dues):
+        for i, due in enumerate(dues):
+            consumed.append((deck_id, i))
+            yield {'id': str(i), 'next_review': due}
+
+    queue = merge_due({'x': stream('x', range(0, 1000, 2)), 'y': stream('y', range(1, 1000, 2))}, limit=3)
+    assert [(deck_id, card['next_review']) for deck_id, card in queue] == [('x', 0), ('y', 1), ('x', 2)]
+    assert len(consumed) <= 5
+
+
+def test_card_tags():
+    assert card_tags({'tags': ['a', {'name': 'b', 'subtags': [{'name': 'c'}]}]}) == {'a', 'b', 'c'}
+    assert card_tags({}) == set()
+
+
+class TestReviewAllRoutes:
+    """Routes /review/all et /api/review/due."""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        data = tmp_path / 'data'
+        app = create_app({
+            'DATA_FOLDER': str(data),
+            'DECKS_FOLDER': str(data / 'decks'),
+            'RECALL_FOLDER': str(data / 'recall'),
+            'MULTIMEDIA_FOLDER': str(data / 'multimedia'),
+            'CONFIG_FOLDER': str(tmp_path / 'config'),
+            'DECK_STORE': 'json',
+            'MIGRATIONS': 'off',
+            'CONFIG_RELOAD_INTERVAL': 0
+        })
+        return app.test_client()
+
+    def test_routes(self, client):
+        assert client.get('/review/all').status_code == 302
+        client.post('/api/decks', json={'name': 'Un'})
+        client.post('/api/decks', json={'name': 'Deux'})
+        client.post('/api/decks/un/cards', json={'question': 'q1', 'response': 'r', 'tags': ['x']})
+        client.post('/api/decks/deux/cards', json={'question': 'q2', 'response': 'r'})
+
+        cards = client.get('/api/review/due').get_json()['cards']
+        assert sorted(card['deck_id'] for card in cards) == ['deux', 'un']
+        cards = client.get('/api/review/due?tags=x&limit=5').get_json()['cards']
+        assert [card['question'] for card in cards] == ['q1']
+        assert client.get('/api/review/due?limit=abc').status_code == 400
+
+        html = client.get('/review/all').get_data(as_text=True)
+        assert 'Révision - Tous les decks' in html
+        assert 'Réviser tous les decks (2)' in client.get('/').get_data(as_text=True)
@@ -0,0 +1,108 @@
+"""
+Tests du flux de révision (revision_flow).
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from revision_flow import RevisionFlow
+
+
+def names(tasks):
+    return [task.name for task in tasks]
+
+
+@pytest.fixture
+def flow():
+    flow = RevisionFlow()
+    flow.add_task('algèbre')
+    flow.add_task('premier degré', ['algèbre'])
+    flow.add_task('second degré', ['premier degré'])
+    flow.add_task('systèmes', ['premier degré'])
+    flow.add_task('géométrie')
+    return flow
+
+
+class TestAvailability:
+    """Disponibilité tenue à jour par les compteurs de prérequis."""
+
+    def test_completion_unlocks_dependents(self, flow):
+        assert names(flow.get_available_tasks()) == ['algèbre', 'géométrie']
+
+        flow.tasks['algèbre'].mark_completed(4)
+        # Révisée : planifiée demain, plus disponible
+        assert names(flow.get_available_tasks()) == ['premier degré', 'géométrie']
+
+        flow.tasks['premier degré'].mark_completed(1)
+        assert names(flow.get_available_tasks()) == ['second degré', 'systèmes', 'géométrie']
+
+    def test_scheduled_task_comes_back(self, flow):
+        task = flow.tasks['géométrie']
+        task.mark_completed(4)
+        assert 'géométrie' not in names(flow.get_available_tasks())
+
+        # Entrée du tas devenue périmée, puis date de révision passée
+        task.next_revision = datetime.now() - timedelta(minutes=1)
+        flow._unlock(task)
+        assert 'géométrie' in names(flow.get_available_tasks())
+
+    def test_matches_full_scan(self, flow):
+        """Même résultat qu'un parcours complet des tâches et de leurs prérequis"""
+        for name in ('algèbre', 'géométrie', 'premier degré', 'géométrie'):
+            flow.tasks[name].mark_completed(2)
+        now = datetime.now()
+        expected = [task.name for task in flow.tasks.values()
+                    if not (task.next_revision and task.next_revision > now)
+                    and all(flow.tasks[dep].completed for dep in task.dependencies)]
+        assert names(flow.get_available_tasks()) == expected
+
+    def test_load_state_rebuilds_graph(self, flow, tmp_path):
+        flow.tasks['algèbre'].mark_completed(5)
+        path = tmp_path / 'state.bin'
+        flow.save_state(str(path))
+
+        loaded = RevisionFlow()
+        loaded.load_state(str(path))
+        assert names(loaded.get_available_tasks()) == ['premier degré', 'géométrie']
+        loaded.tasks['premier degré'].mark_completed(5)
+        assert names(loaded.get_available_tasks()) == ['second degré', 'systèmes', 'géométrie']
+
+
+class TestSession:
+    """Session ordonnée par un tas, enrichie au fil des déblocages."""
+
+    def test_priority_order(self, flow):
+        now = datetime.now()
+        flow.add_task('retard', [])
+        flow.add_task('difficile', [])
+        flow.tasks['retard'].next_revision = now - timedelta(days=2)
+        flow.tasks['difficile'].difficulty_factor = 1.3
+        flow._rebuild()
+
+        flow.start_session(timedelta(minutes=30))
+        order = [flow.get_next_task().name for _ in range(4)]
+        assert order == ['retard', 'difficile', 'algèbre', 'géométrie']
+        assert flow.get_next_task() is None
+
+    def test_unlocked_tasks_join_session(self, flow):
+        flow.start_session(timedelta(minutes=30))
+        reviewed = []
+        while task := flow.get_next_task():
+            reviewed.append(task.name)
+            task.mark_completed(4)
+        assert reviewed == ['algèbre', 'géométrie', 'premier degré', 'second degré', 'systèmes']
+
+    def test_reviewed_task_is_skipped(self, flow):
+        flow.start_session(timedelta(minutes=30))
+        flow.tasks['algèbre'].mark_completed(4)
+        assert flow.get_next_task().name == 'géométrie'
+
+    def test_session_end(self, flow):
+        assert flow.get_next_task() is None
+        flow.start_session(timedelta(minutes=-1))
+        assert flow.get_next_task() is None
@@ -0,0 +1,131 @@
+"""
+Tests du planificateur des révisions (SM-2 côté serveur).
+"""
+from array import array
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+import app as app_module
+from revision_flow import RevisionTask
+from scheduler import DAY, LEVELS, RETRY_INTERVAL, Scheduler, evaluate, next_state, parse_quality
+
+NOW = 1_700_000_000
+
+
+class TestSm2:
+    """Algorithme partagé avec RevisionTask."""
+
+    def test_sequence(self):
+        state = (2.5, 0)
+        intervals = []
+        for quality in (4, 5, 4, 2, 3):
+            ease, streak, interval = next_state(*state, quality)
+            state = (ease, streak)
+            intervals.append(interval)
+        assert intervals == [DAY, 3 * DAY, 5 * DAY, RETRY_INTERVAL, DAY]
+        assert state[1] == 1 and state[0] == pytest.approx(2.7)
+
+    def test_revision_task_uses_same_rules(self):
+        task = RevisionTask('Algèbre')
+        for quality in (4, 4, 4, 1):
+            task.mark_completed(quality)
+        assert (task.consecutive_correct, task.difficulty_factor) == (0, pytest.approx(2.6))
+
+    def test_batch_matches_single(self):
+        qualities = [5, 1, 3, 4]
+        eases = array('d', [2.5, 1.4, 2.0, 3.0])
+        streaks = array('l', [0, 4, 1, 6])
+        expected = [next_state(e, s, q) for e, s, q in zip(eases, streaks, qualities)]
+        intervals = evaluate(eases, streaks, qualities)
+        assert list(zip(eases, streaks, intervals)) == expected
+
+    @pytest.mark.parametrize('value', [-1, 6, 2.5, '4', True, None])
+    def test_invalid_quality(self, value):
+        with pytest.raises(ValueError):
+            parse_quality(value)
+
+
+class TestScheduler:
+    """Mise à jour des cartes, état rangé dans les statistiques."""
+
+    def test_state_is_kept_on_card(self):
+        card = {'id': 'c1'}
+        scheduler = Scheduler()
+        scheduler.review(card, 4, NOW)
+        scheduler.review(card, 4, NOW + DAY)
+        assert card['next_review'] == NOW + DAY + 3 * DAY
+        assert card['statistics'] == {'successes': 2, 'ease_factor': 2.7, 'consecutive_correct': 2}
+        assert card['last_quality'] == 4
+
+    def test_duplicates_in_batch_applied_in_order(self):
+        card, other = {'id': 'c1'}, {'id': 'c2'}
+        Scheduler().review_many([(card, 4, NOW), (other, 1, NOW), (card, 4, NOW + 10)])
+        assert card['statistics']['consecutive_correct'] == 2
+        assert card['next_review'] == NOW + 10 + 3 * DAY
+        assert other['next_review'] == NOW + RETRY_INTERVAL
+
+    def test_levels_policy(self):
+        levels = {'very_hard': 3, 'hard': 5, 'medium': 7, 'easy': 9, 'very_easy': 11}
+        card = {'id': 'c1'}
+        Scheduler('levels', levels).review(card, 2, NOW)
+        assert card['next_review'] == NOW + 5 * 60
+        assert card['statistics']['failures'] == 1
+        with pytest.raises(ValueError):
+            Scheduler('levels')
+
+    @pytest.mark.parametrize('quality, level', [(1, 'very_hard'), (2, 'hard'), (3, 'medium'),
+                                                (4, 'easy'), (5, 'very_easy')])
+    def test_levels_mapping(self, quality, level):
+        levels = {'very_hard': 3, 'hard': 5, 'medium': 7, 'easy': 9, 'very_easy': 11}
+        card = {'id': 'c1'}
+        Scheduler('levels', levels).review(card, quality, NOW)
+        assert card['next_review'] == NOW + levels[level] * 60
+
+    def test_levels_rejects_quality_zero(self):
+        scheduler = Scheduler('levels', {level: 1 for level in LEVELS})
+        with pytest.raises(ValueError):
+            scheduler.parse_quality(0)
+        card = {'id': 'c1'}
+        with pytest.raises(ValueError):
+            scheduler.review(card, 0, NOW)
+        assert card == {'id': 'c1'}
+        assert Scheduler().parse_quality(0) == 0
+
+
+class TestReviewRoute:
+    """L'échéance envoyée par le client est ignorée."""
+
+    def test_server_computes_interval(self, client, clean_data_dir):
+        client.post('/api/decks', json={'name': 'Sched Deck'})
+        card_id = client.post('/api/decks/sched_deck/cards',
+                              json={'question': 'q', 'response': 'r'}).get_json()['id']
+        response = client.post(f'/api/decks/sched_deck/cards/{card_id}/review',
+                               json={'quality': 5, 'next_interval': 1})
+        data = response.get_json()
+        assert response.status_code == 200
+        card, = app_module.get_deck('sched_deck')['flashcards']
+        assert data['next_review'] - card['date_last_reviewed'] == DAY
+
+        response = client.post(f'/api/decks/sched_deck/cards/{card_id}/review', json={'quality': 9})
+        assert response.status_code == 400
+
+    def test_levels_policy_rejects_quality_zero(self, client, clean_data_dir, monkeypatch):
+        monkeypatch.setitem(app_module.app.config, 'SCHEDULER', 'levels')
+        client.post('/api/decks', json={'name': 'Sched Deck'})
+        card_id = client.post('/api/decks/sched_deck/cards',
+                              json={'question': 'q', 'response': 'r'}).get_json()['id']
+        response = client.post(f'/api/decks/sched_deck/cards/{card_id}/review', json={'quality': 0})
+        assert response.status_code == 400
+
+        response = client.post('/api/decks/sched_deck/reviews',
+                               json={'reviews': [{'card_id': card_id, 'quality': 0},
+                                                 {'card_id': card_id, 'quality': 3}]})
+        results = response.get_json()['results']
+        assert [result['success'] for result in results] == [False, True]
+        card, = app_module.get_deck('sched_deck')['flashcards']
+        assert card['last_quality'] == 3
@@ -0,0 +1,118 @@
+"""
+Tests pour le backend SQLite et la migration depuis les decks JSON.
+"""
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+# Ajoute le répertoire parent au PYTHONPATH
+sys.path.append(str(Path(__file__).parent.parent))
+
+from review_journal import ReviewJournal
+from sqlite_store import SqliteDeckStore, migrate_json_to_sqlite
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SqliteDeckStore(tmp_path / 'decks.sqlite3')
+
+
+@pytest.fixture
+def deck():
+    return {
+        'deck_name': 'Maths',
+        'name': 'maths',
+        'date_created': 1700000000,
+        'flashcards': [
+            {'id': 'c1', 'question': 'q1', 'statistics': {'successes': 0, 'failures': 0}},
+            {'id': 'c2', 'question': 'q2', 'next_review': 2000, 'statistics': {'successes': 1, 'failures': 0}},
+            {'id': 'c3', 'question': 'q3', 'next_review': 1500, 'statistics': {'successes': 2, 'failures': 1}}
+        ]
+    }
+
+
+class TestSqliteDeckStore:
+    """Tests du backend SQLite."""
+
+    def test_roundtrip(self, store, deck):
+        """Un deck relu est identique au deck sauvegardé"""
+        store.save_deck('maths', deck)
+        loaded = store.get_deck('maths')
+        assert loaded['deck_name'] == 'Maths'
+        assert loaded['flashcards'] == deck['flashcards']
+        assert store.has_deck_name('maths')
+        assert store.count_decks() == 1
+
+    def test_due_and_upcoming(self, store, deck):
+        """Les cartes dues et à venir sont séparées et triées"""
+        store.save_deck('maths', deck)
+        assert [c['id'] for c in store.due_cards('maths', 1000)] == ['c1']
+        assert [c['id'] for c in store.upcoming_cards('maths', 1000)] == ['c3', 'c2']
+
+    def test_summaries(self, store, deck):
+        """Les résumés comptent les cartes dues sans charger le deck"""
+        store.save_deck('maths', deck)
+        summary = store.list_summaries()[0]
+        assert summary['id'] == 'maths'
+        assert summary['card_count'] == 3
+        assert summary['due_now'] == 3
+
+    def test_record_review_updates_row(self, store, deck):
+        """Une révision met à jour la carte et ajoute une ligne de révision"""
+        store.save_deck('maths', deck)
+        card = store.get_card('maths', 'c1')
+        card['next_review'] = 5000
+        card['statistics']['successes'] = 1
+        card['last_quality'] = 4
+        assert store.record_review('maths', card)
+
+        reloaded = store.get_card('maths', 'c1')
+        assert reloaded['next_review'] == 5000
+        assert reloaded['statistics']['successes'] == 1
+        reviews = store._connect().execute('SELECT COUNT(*) FROM reviews').fetchone()[0]
+        assert reviews == 1
+
+    def test_apply_reviews_reads_current_state(self, store, deck):
+        """Les révisions sont appliquées sur l'état courant, dans une transaction"""
+        store.save_deck('maths', deck)
+
+        def apply(card, review):
+            card['statistics']['successes'] += 1
+
+        results = store.apply_reviews('maths', [{'card_id': 'c2'}, {'card_id': 'absent'}, {'card_id': 'c2'}], apply)
+        assert [r is not None for r in results] == [True, False, True]
+        assert store.get_card('maths', 'c2')['statistics']['successes'] == 3
+
+    def test_card_operations(self, store, deck):
+        """Ajout et suppression de cartes, suppression du deck"""
+        store.save_deck('maths', deck)
+        assert store.add_card('maths', {'id': 'c4', 'question': 'q4'})
+        assert not store.add_card('absent', {'id': 'c5'})
+        assert store.delete_card('maths', 'c1') is True
+        assert store.delete_card('maths', 'c1') is False
+        assert store.delete_card('absent', 'c1') is None
+        assert [c['id'] for c in store.get_deck('maths')['flashcards']] == ['c2', 'c3', 'c4']
+
+        assert store.delete_deck('maths')
+        assert store.get_deck('maths') is None
+        assert store.get_card('maths', 'c2') is None
+
+
+def test_migrate_json_to_sqlite(tmp_path, deck):
+    """La migration convertit les decks et rejoue leur journal"""
+    decks_dir = tmp_path / 'decks'
+    recall_dir = tmp_path / 'recall'
+    decks_dir.mkdir()
+    recall_dir.mkdir()
+    with open(decks_dir / 'maths.json', 'w', encoding='utf-8') as f:
+        json.dump(deck, f)
+    ReviewJournal(recall_dir).append('maths', {'id': 'c1', 'next_review': 9000})
+
+    migrated = migrate_json_to_sqlite(decks_dir, tmp_path / 'decks.sqlite3', recall_dir)
+    assert migrated == ['maths']
+
+    store = SqliteDeckStore(tmp_path / 'decks.sqlite3')
+    assert store.get_card('maths', 'c1')['next_review'] == 9000
+    assert len(store.get_deck('maths')['flashcards']) == 3